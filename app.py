@@ -1,36 +1,113 @@
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import time
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from contextlib import asynccontextmanager
 
-from rag.rag_pipeline import RAGPipeline
+from rag.rag_pipeline import RAGPipeline, NOT_FOUND_ANSWER
+from rag.timing import PhaseTimer
+from rag.metrics import metrics
+from rag.llm_guard import classify_error
+from rag.precomputed import followup_query
+from retrieval.namespaces import UnknownNamespaceError, available_doc_ids
+from embeddings.model_registry import loaded_models
 
 
 # ---------------- GLOBAL PIPELINE ----------------
 
 rag = None
 
+# Caps in-flight /chat requests (set from config once the pipeline is up)
+chat_limiter = None
 
-# ---------------- LIFESPAN (IMPORTANT) ----------------
+# "starting" → "ready" | "failed"; /ready reports it
+startup_state = {"status": "starting", "error": None}
+
+# Phases of this lifespan's startup (lazily loaded namespaces time their own)
+startup_timer = None
+
+
+# ---------------- STARTUP ----------------
+
+def start_pipeline(timer):
+    """
+    Blocking: build the pipeline and warm it up (runs in a worker thread
+    so /health answers while the model and index load)
+    """
+
+    print("📄 Loading metadata and RAG pipeline...")
+
+    with timer.active():
+        pipeline = RAGPipeline()
+        pipeline.warm_up()
+
+    budget_ms = pipeline.config.get("server", {}).get("cold_start_budget_ms")
+    timer.report(budget_ms)
+
+    return pipeline
+
+
+async def startup(timer):
+    global rag, chat_limiter
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global rag
     try:
-        print("📄 Loading metadata and RAG pipeline...")
-        rag = RAGPipeline()
-        print("✅ RAG pipeline loaded successfully")
+        pipeline = await asyncio.to_thread(start_pipeline, timer)
     except Exception as e:
         print("❌ Failed to initialize RAG:", repr(e))
-        rag = None
+        startup_state.update(status="failed", error=repr(e))
+        return
+
+    max_concurrent = pipeline.config.get("server", {}).get("max_concurrent_requests", 8)
+    chat_limiter = asyncio.Semaphore(max_concurrent)
+
+    # Publish only once warm, so /ready and /chat never see a half-built pipeline
+    rag = pipeline
+    startup_state["status"] = "ready"
+    print("✅ RAG pipeline loaded successfully")
+
+
+def require_pipeline():
+
+    if rag is not None:
+        return
+
+    if startup_state["status"] == "starting":
+        raise HTTPException(status_code=503, detail="RAG pipeline is warming up")
+
+    raise HTTPException(
+        status_code=500,
+        detail="RAG pipeline not initialized"
+    )
+
+
+# ---------------- LIFESPAN (IMPORTANT) ----------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global startup_timer
+
+    startup_timer = PhaseTimer()
+    startup_task = asyncio.create_task(startup(startup_timer))
 
     yield
 
     print("🛑 Shutting down application...")
 
+    if not startup_task.done():
+        startup_task.cancel()
+
+    if rag is not None:
+        rag.executor.shutdown(wait=False)
+
+        if rag.batcher is not None:
+            rag.batcher.close()
+
 
 # ---------------- APP INIT ----------------
 # 🔥 lifespan MUST be passed here
@@ -49,15 +126,73 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 
+# ---------------- STAGE TIMING ----------------
+
+@app.middleware("http")
+async def stage_timing(request: Request, call_next):
+    """
+    Collect the pipeline's stage spans for this request: observed in
+    the Prometheus histograms and sent back as a Server-Timing header.
+    Request latency is observed once the body has been sent, so
+    /chat/stream and /chat/batch count until their last chunk.
+    """
+
+    if not (metrics.enabled or metrics.server_timing):
+        return await call_next(request)
+
+    trace, token = metrics.start_trace()
+    start = time.perf_counter()
+
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.end_trace(token)
+
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+
+    if metrics.enabled and endpoint != "/metrics":
+        response.body_iterator = observe_body(
+            response.body_iterator, endpoint, response.status_code, start
+        )
+
+    # Streaming bodies are still running here; their spans go in the `done` event
+    if metrics.server_timing and trace.spans:
+        response.headers["Server-Timing"] = (
+            f"{trace.server_timing()}, total;dur={elapsed * 1000:.2f}"
+        )
+        response.headers["Timing-Allow-Origin"] = "*"
+
+    return response
+
+
+async def observe_body(body, endpoint, status, start):
+    """
+    Pass the body through, then record the request latency
+    (also when the client disconnects mid-stream)
+    """
+
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        metrics.request(endpoint, status, time.perf_counter() - start)
+
+
 # ---------------- DATA MODELS ----------------
 
 class Source(BaseModel):
     section_id: str
     title: str
     chunk_id: str
+    relevance: Optional[float] = None
+    doc_id: Optional[str] = None
 
 
 class ChatTurn(BaseModel):
@@ -68,6 +203,15 @@ class ChatTurn(BaseModel):
 class ChatRequest(BaseModel):
     query: str
     chat_history: Optional[List[ChatTurn]] = []
+    # One document namespace or several; defaults to the main handbook
+    doc_id: Optional[Union[str, List[str]]] = None
+
+
+class BatchChatRequest(BaseModel):
+    queries: List[str]
+    doc_id: Optional[Union[str, List[str]]] = None
+    # Parallel generations; defaults to server.batch_concurrency
+    concurrency: Optional[int] = None
 
 
 class ChatResponse(BaseModel):
@@ -88,11 +232,71 @@ def health():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 200 only after the model, index and warm-up are done
+    """
+
+    if rag is None:
+        return JSONResponse(status_code=503, content=startup_state)
+
+    return {
+        "status": "ready",
+        "startup_ms": startup_timer.breakdown(),
+        "models": loaded_models()
+    }
+
+
 @app.get("/debug/rag")
 def debug_rag():
     return {
         "rag_is_none": rag is None,
-        "rag_type": str(type(rag))
+        "rag_type": str(type(rag)),
+        "answer_cache": (
+            rag.answer_cache.stats()
+            if rag is not None and rag.answer_cache is not None else None
+        ),
+        "query_batching": (
+            rag.batcher.stats()
+            if rag is not None and rag.batcher is not None else None
+        ),
+        "reranker": (
+            rag.reranker.stats()
+            if rag is not None and rag.reranker is not None else None
+        ),
+        "namespaces": rag.namespaces.stats() if rag is not None else None,
+        "llm_guard": rag.llm_guard.stats() if rag is not None else None,
+        "precomputed": (
+            {doc_id: store.stats() for doc_id, store in rag.precomputed.items()}
+            if rag is not None else None
+        )
+    }
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (metrics.enabled in config.yaml)
+    """
+
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    body, content_type = metrics.render()
+
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/documents")
+def documents():
+
+    require_pipeline()
+
+    return {
+        "default": rag.default_doc_id,
+        "available": available_doc_ids(rag.config),
+        "resident": list(rag.namespaces.resident)
     }
 
 
@@ -112,69 +316,87 @@ def rephrase_query(query: str, history: List[ChatTurn]) -> str:
     if len(query.split()) <= 5:
         is_followup = True
 
+    # Same wording as the precomputed follow-up answers
     if is_followup:
-        return (
-            f"Previous question: {last_turn.question}. "
-            f"Follow-up question: {query}. "
-            f"Answer using the policy document."
-        )
+        return followup_query(last_turn.question, query)
 
     return query
 
 
-# ---------------- MAIN CHAT ENDPOINT ----------------
+def prepare_query(request: ChatRequest) -> str:
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+    query = request.query.strip()
 
-    if rag is None:
-        raise HTTPException(
-            status_code=500,
-            detail="RAG pipeline not initialized"
-        )
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    history = request.chat_history[-5:] if request.chat_history else []
+
+    with metrics.span("rephrase"):
+        final_query = rephrase_query(query, history)
+
+    print("🔍 Final query:", final_query)
+
+    return final_query
+
+
+def resolve_documents(request: ChatRequest) -> List[str]:
 
     try:
-        query = request.query.strip()
+        return rag.namespaces.resolve(request.doc_id)
+    except UnknownNamespaceError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown doc_id: {e.args[0]}")
 
-        if not query:
-            raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-        history = request.chat_history[-5:] if request.chat_history else []
+def to_sources(raw_sources) -> List[Source]:
 
-        final_query = rephrase_query(query, history)
+    # Convert raw sources to exact metadata (NO "Source 1")
+    return [
+        Source(
+            section_id=src.get("section_id", "N/A"),
+            title=src.get("title", "Unknown Section"),
+            chunk_id=src.get("chunk_id", "N/A"),
+            relevance=src.get("score"),
+            doc_id=src.get("doc_id") or None
+        )
+        for src in raw_sources
+    ]
 
-        print("🔍 Final query:", final_query)
 
-        answer, sources = rag.ask(final_query)
-        answer, raw_sources = rag.ask(final_query)
+# ---------------- MAIN CHAT ENDPOINT ----------------
 
-        # Convert raw sources to exact metadata (NO "Source 1")
-        sources = [
-            Source(
-                section_id=src.get("section_id", "N/A"),
-                title=src.get("title", "Unknown Section"),
-                chunk_id=src.get("chunk_id", "N/A")
-            )
-            for src in raw_sources
-        ]
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+
+    require_pipeline()
+
+    try:
+        final_query = prepare_query(request)
+        doc_ids = resolve_documents(request)
+
+        async with chat_limiter:
+            answer, raw_sources = await rag.aask(final_query, doc_ids)
+
+        sources = to_sources(raw_sources)
 
         if not answer or not answer.strip():
-            answer = "This information isn't in the document."
+            answer = NOT_FOUND_ANSWER
             sources = []
 
-
-        
         return ChatResponse(
             answer=answer,
             sources=sources,
             timestamp=datetime.now()
         )
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         error_msg = str(e).lower()
         print("🔥 CHAT ERROR:", repr(e))
 
-        if "quota" in error_msg or "limit" in error_msg:
+        if classify_error(e) in ("rate_limit", "circuit_open"):
             return ChatResponse(
                 answer="API limit reached. Please try again later.",
                 sources=[],
@@ -191,6 +413,134 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ---------------- STREAMING CHAT ENDPOINT ----------------
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Server-Sent Events: one `sources` event right after retrieval,
+    then `token` events as Gemini generates, then `done`.
+    """
+
+    require_pipeline()
+
+    final_query = prepare_query(request)
+    doc_ids = resolve_documents(request)
+
+    async def event_source():
+        try:
+            async with chat_limiter:
+                async for kind, payload in rag.astream(final_query, doc_ids):
+
+                    if kind == "sources":
+                        yield sse_event(
+                            "sources",
+                            [src.model_dump() for src in to_sources(payload)]
+                        )
+                    else:
+                        yield sse_event("token", {"text": payload})
+
+        except Exception as e:
+            print("🔥 CHAT STREAM ERROR:", repr(e))
+            yield sse_event("error", {"detail": "Sorry, I encountered an error."})
+
+        done = {"timestamp": datetime.now().isoformat()}
+
+        trace = metrics.current_trace()
+
+        if metrics.server_timing and trace is not None:
+            done["timing_ms"] = trace.breakdown()
+
+        yield sse_event("done", done)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ---------------- BATCH CHAT ENDPOINT ----------------
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    NDJSON: one line per query as soon as its answer is ready
+    (completion order, with its `index` in the request), then a
+    final `done` line. Retrieval for the whole batch is one encode
+    and one FAISS search; generation runs `concurrency` at a time.
+    """
+
+    require_pipeline()
+
+    server_cfg = rag.config.get("server", {})
+    max_queries = server_cfg.get("batch_max_queries", 1000)
+
+    queries = [q.strip() for q in request.queries]
+
+    if not queries:
+        raise HTTPException(status_code=400, detail="queries cannot be empty")
+
+    if len(queries) > max_queries:
+        raise HTTPException(status_code=413, detail=f"At most {max_queries} queries per batch")
+
+    empty = [i for i, q in enumerate(queries) if not q]
+
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Empty queries at index {empty}")
+
+    doc_ids = resolve_documents(request)
+
+    concurrency = max(1, request.concurrency or server_cfg.get("batch_concurrency", 4))
+
+    async def lines():
+
+        start = time.perf_counter()
+        answered = 0
+
+        try:
+            # The whole batch counts as one in-flight request
+            async with chat_limiter:
+                async for index, answer, raw_sources in rag.aask_batch(queries, doc_ids, concurrency):
+
+                    sources = to_sources(raw_sources)
+
+                    if not answer or not answer.strip():
+                        answer = NOT_FOUND_ANSWER
+                        sources = []
+
+                    answered += 1
+
+                    yield json.dumps({
+                        "index": index,
+                        "query": queries[index],
+                        "answer": answer,
+                        "sources": [src.model_dump() for src in sources]
+                    }) + "\n"
+
+        except Exception as e:
+            print("🔥 CHAT BATCH ERROR:", repr(e))
+            yield json.dumps({"error": "Sorry, I encountered an error.", "answered": answered}) + "\n"
+
+        yield json.dumps({
+            "done": True,
+            "answered": answered,
+            "queries": len(queries),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "timestamp": datetime.now().isoformat()
+        }) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ---------------- LOCAL / HF RUN ----------------
 
 if __name__ == "__main__":
@@ -0,0 +1,333 @@
+"""
+Open-loop load generator for /chat.
+
+Requests are sent on a fixed schedule at the target rate, whether or
+not earlier ones have finished. Latency is measured from the scheduled
+send time, so a saturated server shows up as growing latency rather
+than as a lower request rate. Each arrival can fire a batch of
+concurrent requests.
+
+Reports achieved throughput, p50/p95/p99 latency, error rates, the
+per-stage Server-Timing breakdown and the server's LLM guard counters.
+
+--in-process starts the app in this process with the offline fake LLM
+(llm.fake in config.yaml; --llm-latency-ms / --tokens-per-s override it),
+so no Gemini quota is spent. Otherwise --url points at a running server
+(start it with LLM_PROVIDER=fake for an offline run).
+
+Usage:
+    python -m benchmarks.load_test --in-process --rate 20 --duration 30
+    python -m benchmarks.load_test --in-process --rate 5 --batch-size 8 --llm-latency-ms 1500
+    python -m benchmarks.load_test --url http://localhost:8000 --rate 50 --json load.json
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+
+import httpx
+import numpy as np
+
+from benchmarks.run_benchmarks import load_golden, percentiles, environment, load_config
+
+
+# ---------- CLIENTS ----------
+
+@asynccontextmanager
+async def in_process_client(args):
+    """
+    The FastAPI app with its lifespan running in this event loop,
+    called through httpx's ASGI transport (no sockets)
+    """
+
+    os.environ["LLM_PROVIDER"] = "fake"
+
+    import app as server
+    from rag.llm_provider import FakeProvider
+
+    async with server.lifespan(server.app):
+
+        deadline = time.perf_counter() + args.ready_timeout
+
+        while server.rag is None:
+            if server.startup_state["status"] == "failed" or time.perf_counter() > deadline:
+                raise RuntimeError(f"Pipeline did not start: {server.startup_state['error']}")
+            await asyncio.sleep(0.2)
+
+        rag = server.rag
+
+        if args.llm_latency_ms is not None or args.tokens_per_s is not None or args.error_rate is not None:
+            fake_cfg = rag.config.get("llm", {}).get("fake", {})
+            rag.llm = FakeProvider.from_config(dict(
+                fake_cfg,
+                **{
+                    key: value
+                    for key, value in (
+                        ("latency_ms", args.llm_latency_ms),
+                        ("tokens_per_s", args.tokens_per_s),
+                        ("error_rate", args.error_rate)
+                    )
+                    if value is not None
+                }
+            ))
+
+        if args.no_cache:
+            rag.answer_cache = None
+
+        transport = httpx.ASGITransport(app=server.app)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test", timeout=args.timeout
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def remote_client(args):
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+
+        response = await client.get("/ready")
+
+        if response.status_code != 200:
+            raise RuntimeError(f"Server not ready: {response.status_code} {response.text}")
+
+        yield client
+
+
+# ---------- LOAD ----------
+
+def parse_server_timing(header):
+    """
+    "retrieve;dur=12.3, llm;dur=800.1" → {"retrieve": 12.3, "llm": 800.1}
+    """
+
+    stages = {}
+
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+
+        if params.startswith("dur="):
+            stages[name] = float(params[4:])
+
+    return stages
+
+
+def arrival_offsets(rate, duration, arrival, seed):
+    """
+    Send times (s from start): evenly spaced, or a Poisson process
+    """
+
+    if arrival == "constant":
+        return [i / rate for i in range(int(rate * duration))]
+
+    rng = random.Random(seed)
+    offsets = []
+    t = rng.expovariate(rate)
+
+    while t < duration:
+        offsets.append(t)
+        t += rng.expovariate(rate)
+
+    return offsets
+
+
+async def send(client, query, scheduled, slots, results):
+
+    async with slots:
+        lag = time.perf_counter() - scheduled
+
+        try:
+            response = await client.post("/chat", json={"query": query})
+
+        except httpx.TimeoutException:
+            results.append({"error": "timeout", "latency_ms": (time.perf_counter() - scheduled) * 1000})
+            return
+
+        except httpx.HTTPError as e:
+            results.append({"error": type(e).__name__, "latency_ms": (time.perf_counter() - scheduled) * 1000})
+            return
+
+    result = {
+        "latency_ms": (time.perf_counter() - scheduled) * 1000,
+        "lag_ms": lag * 1000,
+        "stages": parse_server_timing(response.headers.get("server-timing", ""))
+    }
+
+    if response.status_code != 200:
+        result["error"] = f"http_{response.status_code}"
+    else:
+        result["answer"] = response.json().get("answer", "")
+
+    results.append(result)
+
+
+async def run_load(client, questions, args):
+
+    offsets = arrival_offsets(args.rate, args.duration, args.arrival, args.seed)
+
+    slots = asyncio.Semaphore(args.max_in_flight)
+    results = []
+    tasks = []
+
+    print(
+        f"🚰 {len(offsets)} arrivals × {args.batch_size} request(s) "
+        f"at {args.rate}/s ({args.arrival}) for {args.duration} s"
+    )
+
+    start = time.perf_counter()
+    n = 0
+
+    for offset in offsets:
+
+        delay = start + offset - time.perf_counter()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        scheduled = start + offset
+
+        for _ in range(args.batch_size):
+            query = questions[n % len(questions)]
+            n += 1
+            tasks.append(asyncio.create_task(send(client, query, scheduled, slots, results)))
+
+    await asyncio.gather(*tasks)
+
+    return results, time.perf_counter() - start
+
+
+# ---------- REPORT ----------
+
+def summarize(results, wall_seconds, args):
+
+    from rag.rag_pipeline import NOT_FOUND_ANSWER
+
+    ok = [r for r in results if "error" not in r]
+
+    errors = {}
+    for r in results:
+        if "error" in r:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    report = {
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": errors,
+        "error_rate": round(sum(errors.values()) / len(results), 4) if results else 0.0,
+        "offered_rps": round(args.rate * args.batch_size, 2),
+        "throughput_rps": round(len(ok) / wall_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        # The server turns exhausted LLM retries into the not-found answer
+        "not_found_answers": sum(1 for r in ok if r["answer"].strip() == NOT_FOUND_ANSWER)
+    }
+
+    if ok:
+        latencies = [r["latency_ms"] for r in ok]
+
+        report["latency"] = dict(
+            percentiles(latencies),
+            max_ms=round(max(latencies), 3)
+        )
+
+        # Time requests waited for a free --max-in-flight slot on our side
+        report["client_lag_p99_ms"] = round(float(np.percentile([r["lag_ms"] for r in ok], 99)), 3)
+
+        stages = {}
+        for r in ok:
+            for name, ms in r["stages"].items():
+                stages.setdefault(name, []).append(ms)
+
+        report["stages"] = {
+            name: {
+                "p50_ms": round(float(np.percentile(values, 50)), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3)
+            }
+            for name, values in stages.items()
+        }
+
+    return report
+
+
+def print_report(report):
+
+    print(f"\n📊 {report['ok']}/{report['requests']} ok in {report['wall_seconds']} s")
+    print(f"   throughput: {report['throughput_rps']} req/s (offered {report['offered_rps']})")
+    print(f"   errors: {report['error_rate'] * 100:.2f}% {report['errors'] or ''}")
+    print(f"   not-found answers: {report['not_found_answers']}")
+
+    if "latency" in report:
+        latency = report["latency"]
+        print(
+            f"   latency: p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms, "
+            f"p99 {latency['p99_ms']:.1f} ms, max {latency['max_ms']:.1f} ms"
+        )
+
+        for name, stage in sorted(report["stages"].items(), key=lambda kv: -kv[1]["p50_ms"]):
+            print(f"   {name:<14} p50 {stage['p50_ms']:>9.2f} ms   p95 {stage['p95_ms']:>9.2f} ms")
+
+    if report.get("server"):
+        print(f"   server llm_guard: {report['server'].get('llm_guard')}")
+
+
+async def main_async(args):
+
+    questions = [item["question"] for item in load_golden()]
+    random.Random(args.seed).shuffle(questions)
+
+    connect = in_process_client if args.in_process else remote_client
+
+    async with connect(args) as client:
+
+        results, wall_seconds = await run_load(client, questions, args)
+        report = summarize(results, wall_seconds, args)
+
+        try:
+            debug = (await client.get("/debug/rag")).json()
+            report["server"] = {key: debug.get(key) for key in ("llm_guard", "query_batching", "answer_cache")}
+        except Exception as e:
+            print("⚠ Could not read /debug/rag:", e)
+
+    return report
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Open-loop load test for /chat")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="run the app here with the fake LLM")
+    parser.add_argument("--rate", type=float, default=10.0, help="arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--batch-size", type=int, default=1, help="concurrent /chat requests per arrival")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="client-side concurrency cap")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=None, help="--in-process: fake first-token delay")
+    parser.add_argument("--tokens-per-s", type=float, default=None, help="--in-process: fake output rate")
+    parser.add_argument("--error-rate", type=float, default=None, help="--in-process: fake 503 fraction")
+    parser.add_argument("--no-cache", action="store_true", help="--in-process: disable the answer cache")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    report["meta"] = dict(environment(load_config()), args=vars(args))
+
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        print("\n💾 Results saved:", args.json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Performance benchmarks for every pipeline stage.
+
+For each synthetic handbook size: HTML parse, chunking, embedding
+throughput and FAISS search latency. Against the real handbook index:
+recall@k on the golden question set and end-to-end /chat latency with
+a stubbed LLM (no Gemini calls). Results are written as JSON together
+with the commit and settings they were measured with, so runs from
+different versions can be compared with --baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000 10000 --json bench.json
+    python -m benchmarks.run_benchmarks --skip-chat --baseline bench.json
+"""
+
+import os
+import json
+import time
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import yaml
+
+from benchmarks.synthetic_handbook import generate_handbook_html
+from rag.llm_provider import FakeProvider
+
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+
+
+def load_config():
+    with open("config/config.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def percentiles(latencies_ms):
+    return {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment(config):
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "embedding_model": config["embedding"]["model_name"],
+        "embedding_backend": config["embedding"].get("backend", "torch"),
+        "index_type": config.get("index", {}).get("type", "flat"),
+        "chunking_strategy": config["chunking"].get("strategy", "tokenizer")
+    }
+
+
+# ---------- PIPELINE STAGES ----------
+
+def bench_parse(html):
+
+    from ingestion.normalize import parse_html_to_structured
+
+    start = time.perf_counter()
+    sections = parse_html_to_structured(html)
+    seconds = time.perf_counter() - start
+
+    return sections, {
+        "seconds": round(seconds, 4),
+        "sections_per_s": round(len(sections) / seconds, 1)
+    }
+
+
+def bench_chunk(sections, config):
+    """
+    chunk_section (word windows) always; the token chunker too when
+    it is the configured strategy. Returns the configured strategy's chunks.
+    """
+
+    from chunking.semantic_chunker import chunk_section
+
+    chunk_cfg = config["chunking"]
+    report = {}
+
+    start = time.perf_counter()
+    chunks = [
+        chunk
+        for section in sections
+        for chunk in chunk_section(section, chunk_cfg["max_tokens"], chunk_cfg["overlap_tokens"])
+    ]
+    seconds = time.perf_counter() - start
+
+    report["words"] = {
+        "chunks": len(chunks),
+        "seconds": round(seconds, 4),
+        "sections_per_s": round(len(sections) / seconds, 1)
+    }
+
+    if chunk_cfg.get("strategy", "tokenizer") == "tokenizer":
+        from chunking.token_chunker import TokenChunker
+
+        chunker = TokenChunker(
+            config["embedding"]["model_name"],
+            max_tokens=chunk_cfg.get("tokenizer_max_tokens"),
+            overlap_tokens=chunk_cfg.get("tokenizer_overlap", 32)
+        )
+
+        start = time.perf_counter()
+        chunks = [chunk for section in sections for chunk in chunker.chunk_section(section)]
+        seconds = time.perf_counter() - start
+
+        report["tokenizer"] = {
+            "chunks": len(chunks),
+            "seconds": round(seconds, 4),
+            "sections_per_s": round(len(sections) / seconds, 1)
+        }
+
+    return chunks, report
+
+
+def bench_embed(embedder, chunks, limit):
+
+    texts = [c["text"] for c in chunks[:limit]]
+
+    start = time.perf_counter()
+    vectors = embedder.generate_embeddings(texts)
+    seconds = time.perf_counter() - start
+
+    return np.asarray(vectors, dtype="float32"), {
+        "chunks": len(texts),
+        "seconds": round(seconds, 3),
+        "chunks_per_s": round(len(texts) / seconds, 1)
+    }
+
+
+def bench_faiss(vectors, queries, config, k):
+
+    from embeddings.vector_store import FAISSStore
+
+    start = time.perf_counter()
+    store = FAISSStore(vectors.shape[1], config.get("index", {}), n_train=len(vectors))
+    store.add_embeddings(vectors)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        store.index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    store.index.search(queries, k)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    return dict(
+        {"vectors": int(store.index.ntotal), "build_ms": round(build_ms, 2)},
+        **percentiles(latencies),
+        batch_ms=round(batch_ms, 3),
+        queries=len(queries)
+    )
+
+
+def bench_size(n_sections, config, embedder, args):
+
+    print(f"\n📏 {n_sections} sections")
+
+    html = generate_handbook_html(n_sections, seed=args.seed)
+
+    sections, parse = bench_parse(html)
+    print(f"   parse: {parse['seconds']} s")
+
+    chunks, chunk = bench_chunk(sections, config)
+    print(f"   chunk: {len(chunks)} chunks")
+
+    row = {
+        "sections": n_sections,
+        "html_kb": round(len(html.encode("utf-8")) / 1024, 1),
+        "parse": parse,
+        "chunk": chunk
+    }
+
+    if embedder is None:
+        return row
+
+    vectors, row["embed"] = bench_embed(embedder, chunks, args.embed_limit)
+    print(f"   embed: {row['embed']['chunks_per_s']} chunks/s")
+
+    titles = list(dict.fromkeys(s["title"] for s in sections))[:args.queries]
+    queries = np.asarray(embedder.encode(titles), dtype="float32")
+
+    row["faiss"] = bench_faiss(vectors, queries, config, config["retrieval"]["top_k"])
+    print(f"   faiss: p50 {row['faiss']['p50_ms']} ms")
+
+    return row
+
+
+# ---------- SERVING ----------
+
+def load_golden():
+    with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bench_recall(rag, golden):
+    """
+    Hit if any expected section title is among the top-k retrieved chunks
+    """
+
+    k = rag.top_k
+    ranks = []
+
+    for item in golden:
+        _, _, chunks = rag.retrieve(item["question"])
+
+        titles = [c.get("title") for c in chunks or []]
+        rank = next((i for i, t in enumerate(titles, 1) if t in item["titles"]), None)
+        ranks.append(rank)
+
+    report = {
+        f"recall@{j}": round(sum(1 for r in ranks if r is not None and r <= j) / len(ranks), 4)
+        for j in sorted({1, 3, k})
+        if j <= k
+    }
+
+    report["mrr"] = round(float(np.mean([1 / r if r else 0.0 for r in ranks])), 4)
+    report["questions"] = len(golden)
+    report["missed"] = [item["question"] for item, r in zip(golden, ranks) if r is None]
+
+    return report
+
+
+def bench_chat(golden, llm_latency_ms, repeats, ready_timeout):
+    """
+    Drive the FastAPI app in-process: real retrieval and prompt
+    building, stubbed generation, answer cache off
+    """
+
+    from fastapi.testclient import TestClient
+
+    # No Gemini client (or API key) needed
+    os.environ["LLM_PROVIDER"] = "fake"
+
+    import app as server
+
+    with TestClient(server.app) as client:
+
+        deadline = time.perf_counter() + ready_timeout
+
+        while client.get("/ready").status_code != 200:
+            if server.startup_state["status"] == "failed" or time.perf_counter() > deadline:
+                raise RuntimeError(f"Pipeline did not start: {server.startup_state['error']}")
+            time.sleep(0.2)
+
+        rag = server.rag
+        # Fixed delay, no token streaming: /chat timings exclude the real LLM
+        rag.llm = FakeProvider(latency_ms=llm_latency_ms, tokens_per_s=0)
+        rag.answer_cache = None
+
+        recall = bench_recall(rag, golden)
+        print(f"   recall: {recall}")
+
+        latencies = []
+        errors = 0
+
+        for _ in range(repeats):
+            for item in golden:
+                start = time.perf_counter()
+                response = client.post("/chat", json={"query": item["question"]})
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                errors += response.status_code != 200
+
+    chat = dict(
+        {"requests": len(latencies), "errors": errors, "llm_latency_ms": llm_latency_ms},
+        **percentiles(latencies)
+    )
+
+    return recall, chat
+
+
+# ---------- REPORT ----------
+
+def flatten(report, prefix=""):
+
+    if isinstance(report, dict):
+        for key, value in report.items():
+            yield from flatten(value, f"{prefix}{key}.")
+
+    elif isinstance(report, list):
+        for i, value in enumerate(report):
+            # Size rows are matched by section count, not position
+            key = value.get("sections", i) if isinstance(value, dict) else i
+            yield from flatten(value, f"{prefix}{key}.")
+
+    elif isinstance(report, (int, float)) and not isinstance(report, bool):
+        yield prefix[:-1], report
+
+
+def compare(report, baseline_path):
+    """
+    Print every timing / throughput / recall metric next to the baseline
+    """
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = dict(flatten({k: v for k, v in json.load(f).items() if k != "meta"}))
+
+    current = dict(flatten({k: v for k, v in report.items() if k != "meta"}))
+
+    print(f"\n📊 Compared with {baseline_path}")
+
+    for key, value in current.items():
+
+        tracked = key.endswith(("_ms", "seconds", "_per_s", "mrr")) or "recall@" in key
+
+        if not tracked or key not in baseline:
+            continue
+
+        old = baseline[key]
+        change = (value - old) / old * 100 if old else 0.0
+
+        print(f"{key:<45}{old:>12}{value:>12}{change:>+9.1f}%")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Pipeline performance benchmarks")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000], help="synthetic section counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-limit", type=int, default=2000, help="max chunks embedded per size")
+    parser.add_argument("--queries", type=int, default=200, help="FAISS queries per size")
+    parser.add_argument("--skip-embed", action="store_true")
+    parser.add_argument("--skip-chat", action="store_true")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="stubbed LLM delay per call")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the golden questions for /chat")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--json", dest="json_path", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    config = load_config()
+
+    report = {"meta": environment(config), "sizes": []}
+
+    embedder = None
+
+    if not args.skip_embed:
+        from embeddings.embedder import EmbeddingModel
+
+        # No embedding cache: measure the encoder, not disk reads
+        embedder = EmbeddingModel.from_config(dict(config["embedding"], cache_dir=None), verbose=False)
+
+    for n_sections in args.sizes:
+        report["sizes"].append(bench_size(n_sections, config, embedder, args))
+
+    if not args.skip_chat:
+        print("\n🤖 /chat with stubbed LLM")
+        report["recall"], report["chat"] = bench_chat(
+            load_golden(), args.llm_latency_ms, args.repeats, args.ready_timeout
+        )
+        print(f"   chat: p50 {report['chat']['p50_ms']} ms, p95 {report['chat']['p95_ms']} ms")
+
+    with open(args.json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n💾 Results saved:", args.json_path)
+
+    if args.baseline:
+        compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
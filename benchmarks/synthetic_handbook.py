@@ -0,0 +1,196 @@
+"""
+Synthetic employee handbook in the Google Docs export format.
+
+Headings follow the I → A → 1 → a numbering that
+ingestion.normalize.is_section_heading expects, behind a Table of
+Contents that ends at "I. Welcome". Some numbered headings are split
+from their title across two paragraphs, as in real exports. Output is
+deterministic for a given size and seed.
+
+Usage:
+    python -m benchmarks.synthetic_handbook --sections 1000 --out data/raw/synthetic.html
+"""
+
+import random
+import argparse
+from html import escape
+
+
+TOPICS = [
+    "Leave", "Overtime", "Payroll", "Holiday", "Travel", "Expense", "Safety",
+    "Security", "Training", "Benefits", "Insurance", "Conduct", "Dress Code",
+    "Attendance", "Remote Work", "Equipment", "Privacy", "Email", "Internet",
+    "Social Media", "Harassment", "Grievance", "Promotion", "Performance",
+    "Relocation", "Parking", "Visitor", "Gift", "Conflict of Interest",
+    "Recruitment", "Probation", "Termination", "Retirement", "Wellness"
+]
+
+QUALIFIERS = [
+    "Policy", "Procedure", "Eligibility", "Guidelines", "Requirements",
+    "Approval", "Reporting", "Exceptions", "Records", "Responsibilities"
+]
+
+WORDS = (
+    "employee employees company manager supervisor department policy request "
+    "approval written notice days weeks hours period eligible regular full-time "
+    "part-time pay salary rate benefit coverage plan claim report record form "
+    "office work schedule shift leave absence holiday travel expense receipt "
+    "safety equipment training review performance annual quarterly human "
+    "resources payroll account system access password confidential information "
+    "customer business conduct standard procedure exception must should may "
+    "will within before after during following applicable required immediately"
+).split()
+
+HEAD = (
+    '<html><head><meta content="text/html; charset=UTF-8" http-equiv="content-type">'
+    '<style type="text/css">.c1{text-align:justify}.c3{font-size:9pt}.c8{font-weight:700}</style>'
+    '</head><body class="c24 doc-content">'
+)
+
+TAIL = "</body></html>"
+
+
+# ---------- NUMBERING ----------
+
+def roman(n):
+
+    numerals = [
+        (1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+        (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")
+    ]
+
+    out = ""
+
+    for value, symbol in numerals:
+        while n >= value:
+            out += symbol
+            n -= value
+
+    return out
+
+
+def part_numerals():
+    """
+    II, III, IV, VI, ... — only [IVX]+ numerals longer than one letter
+    are read as parts (single letters count as A/B/C level)
+    """
+
+    n = 2
+
+    while True:
+        numeral = roman(n)
+
+        if len(numeral) > 1 and set(numeral) <= set("IVX"):
+            yield numeral
+
+        n += 1
+
+        if n >= 40:
+            n = 2
+
+
+def letters(upper):
+    base = ord("A") if upper else ord("a")
+    return [chr(base + i) for i in range(26)]
+
+
+def heading_plan(n_sections, rng):
+    """
+    (prefix, level) in document order, starting with I. Welcome
+    """
+
+    plan = [("I", "part")]
+    parts = part_numerals()
+
+    while len(plan) < n_sections:
+
+        plan.append((next(parts), "part"))
+
+        for alpha in letters(True)[:rng.randint(2, 5)]:
+            plan.append((alpha, "alpha"))
+
+            for num in range(1, rng.randint(2, 7)):
+                plan.append((str(num), "num"))
+
+                for sub in letters(False)[:rng.randint(0, 3)]:
+                    plan.append((sub, "sub"))
+
+    return plan[:n_sections]
+
+
+# ---------- TEXT ----------
+
+def sentence(rng):
+    words = rng.choices(WORDS, k=rng.randint(8, 20))
+    return words[0].capitalize() + " " + " ".join(words[1:]) + "."
+
+
+def paragraph(rng):
+    return " ".join(sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def title(rng, index):
+    return f"{rng.choice(TOPICS)} {rng.choice(QUALIFIERS)} {index}"
+
+
+def block(text, bold=False):
+    span_class = "c8" if bold else "c3"
+    return f'<p class="c1"><span class="{span_class}">{escape(text)}</span></p>'
+
+
+# ---------- DOCUMENT ----------
+
+def generate_handbook_html(n_sections, seed=0):
+    """
+    HTML string with exactly n_sections section headings
+    """
+
+    rng = random.Random(seed)
+
+    plan = heading_plan(n_sections, rng)
+    titles = ["Welcome"] + [title(rng, i) for i in range(1, len(plan))]
+
+    out = [HEAD, block("Employee Handbook", bold=True), block("Table of Contents", bold=True)]
+
+    # Skipped by the parser up to "I. Welcome"
+    for (prefix, _), name in list(zip(plan, titles))[1:21]:
+        out.append(block(f"{name} ........ {rng.randint(2, 200)}"))
+
+    for i, ((prefix, level), name) in enumerate(zip(plan, titles)):
+
+        if i and i % 25 == 0:
+            out.append('<hr style="page-break-before:always;display:none;">')
+
+        # "2." and its title in separate paragraphs
+        if level == "num" and rng.random() < 0.05:
+            out.append(block(f"{prefix}.", bold=True))
+            out.append(block(name, bold=True))
+        else:
+            out.append(block(f"{prefix}. {name}", bold=True))
+
+        for _ in range(rng.randint(1, 3)):
+            out.append(block(paragraph(rng)))
+
+    out.append(TAIL)
+
+    return "".join(out)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Synthetic handbook generator")
+    parser.add_argument("--sections", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    html = generate_handbook_html(args.sections, args.seed)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    print(f"💾 {args.sections} sections ({len(html) / 1024:.0f} KB) written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have if in into is it its of on or
+that the their this to was were will with you your we our any all not no
+""".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def build_inverted_index(chunks):
+    """
+    Term-major postings for BM25.
+    Row t of the (terms × chunks) CSR arrays lists the chunks
+    containing term t and its frequency in each.
+    """
+
+    builder = InvertedIndexBuilder()
+
+    for chunk in chunks:
+        builder.add(chunk)
+
+    return builder.build()
+
+
+class InvertedIndexBuilder:
+    """
+    Accumulates postings one chunk at a time, so a streaming
+    pipeline never holds the chunk texts
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.postings = []
+        self.doc_lengths = []
+        self.chunk_ids = []
+
+    def add(self, chunk):
+
+        doc = len(self.doc_lengths)
+        tokens = tokenize(chunk["text"])
+
+        self.doc_lengths.append(len(tokens))
+        self.chunk_ids.append(chunk["chunk_id"])
+
+        for term, tf in Counter(tokens).items():
+            term_id = self.vocab.setdefault(term, len(self.vocab))
+
+            if term_id == len(self.postings):
+                self.postings.append([])
+
+            self.postings[term_id].append((doc, tf))
+
+    def build(self):
+
+        postings = self.postings
+
+        indptr = np.zeros(len(postings) + 1, dtype="int64")
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+
+        indices = np.fromiter(
+            (doc for p in postings for doc, _ in p), dtype="int32", count=indptr[-1]
+        )
+        freqs = np.fromiter(
+            (tf for p in postings for _, tf in p), dtype="int32", count=indptr[-1]
+        )
+
+        return {
+            "terms": np.array(list(self.vocab), dtype=str),
+            "indptr": indptr,
+            "indices": indices,
+            "freqs": freqs,
+            "doc_lengths": np.array(self.doc_lengths, dtype="int32"),
+            "chunk_ids": np.array(self.chunk_ids, dtype=str)
+        }
+
+
+def save_inverted_index(index, path):
+    np.savez_compressed(path, **index)
+
+
+def load_inverted_index(path):
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
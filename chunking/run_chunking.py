@@ -1,6 +1,12 @@
+import os
+import sys
 import json
+import time
 import yaml
 from chunking.semantic_chunker import chunk_section
+from chunking.token_chunker import TokenChunker
+from chunking.inverted_index import build_inverted_index, save_inverted_index
+from retrieval.namespaces import selected_documents, namespace_paths
 
 
 def load_config():
@@ -14,36 +20,76 @@ def load_structured_data(path):
 
 
 def save_chunks(chunks, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
     with open(path, "w", encoding="utf-8") as f:
         json.dump(chunks, f, indent=2)
 
     print(f"✅ Chunked file saved at: {path}")
 
 
-def main():
-
-    config = load_config()
-
-    input_path = config["paths"]["structured_input"]
-    output_path = config["paths"]["chunked_output"]
+def chunk_document(doc_id, paths, config, token_chunker=None):
 
     max_tokens = config["chunking"]["max_tokens"]
     overlap = config["chunking"]["overlap_tokens"]
 
-    print("📂 Loading structured document...")
-    structured_sections = load_structured_data(input_path)
+    print(f"📂 Loading structured document ({doc_id})...")
+    structured_sections = load_structured_data(paths["structured"])
+
+    if token_chunker is not None:
+        report = token_chunker.truncation_report(structured_sections, max_tokens, overlap)
+
+        print(
+            f"📏 Old settings ({max_tokens} words, {overlap} overlap): "
+            f"{report['truncated']}/{report['old_chunks']} chunks exceed "
+            f"{token_chunker.model_limit} tokens — "
+            f"{report['tokens_never_embedded']} of {report['tokens']} tokens never embedded"
+        )
 
     all_chunks = []
 
     print("✂ Chunking sections...")
+    start = time.perf_counter()
 
     for section in structured_sections:
-        section_chunks = chunk_section(section, max_tokens, overlap)
+
+        if token_chunker is not None:
+            section_chunks = token_chunker.chunk_section(section, doc_id=doc_id)
+        else:
+            section_chunks = chunk_section(section, max_tokens, overlap, doc_id=doc_id)
+
         all_chunks.extend(section_chunks)
 
-    print(f"📊 Total chunks created: {len(all_chunks)}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📊 Total chunks created: {len(all_chunks)} in {elapsed_ms:.0f} ms")
+
+    save_chunks(all_chunks, paths["chunks_output"])
+
+    print("🗂 Building BM25 inverted index...")
+    save_inverted_index(build_inverted_index(all_chunks), paths["sparse_index"])
+    print(f"✅ Sparse index saved at: {paths['sparse_index']}")
+
+
+def main():
+
+    config = load_config()
+
+    chunk_cfg = config["chunking"]
+    token_chunker = None
+
+    # Chunks sized in the embedding model's own tokens (default)
+    if chunk_cfg.get("strategy", "tokenizer") == "tokenizer":
+        token_chunker = TokenChunker(
+            config["embedding"]["model_name"],
+            max_tokens=chunk_cfg.get("tokenizer_max_tokens"),
+            overlap_tokens=chunk_cfg.get("tokenizer_overlap", 32)
+        )
+
+        print(f"✂ Token chunking: ≤ {token_chunker.max_tokens} wordpieces per chunk")
 
-    save_chunks(all_chunks, output_path)
+    for doc_id, _ in selected_documents(config, sys.argv[1:]):
+        chunk_document(doc_id, namespace_paths(config, doc_id), config, token_chunker)
 
     print("\n✅ STEP 2 CHUNKING COMPLETED SUCCESSFULLY")
 
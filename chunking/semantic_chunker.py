@@ -34,9 +34,10 @@ def split_text(text, max_tokens=800, overlap=100):
     return chunks
 
 
-def chunk_section(section_data, max_tokens, overlap):
+def chunk_section(section_data, max_tokens, overlap, doc_id="employee_handbook_v1"):
     """
-    Chunk single section safely
+    Chunk single section safely.
+    A doc_id stored on the section wins over the one passed in.
     """
 
     full_text = f"{section_data['title']}. {section_data['text']}"
@@ -48,7 +49,7 @@ def chunk_section(section_data, max_tokens, overlap):
     for idx, chunk in enumerate(chunks, 1):
 
         processed_chunks.append({
-            "doc_id": section_data.get("doc_id", "employee_handbook_v1"),
+            "doc_id": section_data.get("doc_id", doc_id),
             "section_id": section_data["section_id"],
             "chunk_id": f"{section_data['section_id']}_chunk_{idx}",
             "title": section_data["title"],
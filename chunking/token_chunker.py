@@ -0,0 +1,154 @@
+import re
+import copy
+
+import numpy as np
+
+from chunking.semantic_chunker import split_text
+
+
+# Sentence starts: after . ! ? (optionally closed by a quote/bracket) or a line break
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+
+
+def sentence_starts(text):
+    return np.fromiter(
+        (m.end() for m in SENTENCE_BREAK.finditer(text)),
+        dtype="int64"
+    )
+
+
+class TokenChunker:
+    """
+    Chunks measured in the embedding model's own wordpieces.
+
+    Every chunk fits the model's max_seq_length, so nothing is silently
+    truncated at embedding time. Chunks end on sentence boundaries
+    where possible and overlap by whole sentences.
+    """
+
+    def __init__(self, model_name, max_tokens=None, overlap_tokens=32):
+
+        from embeddings.model_registry import get_model
+
+        model = get_model(model_name)
+
+        # Own copy: a fast tokenizer shared with a concurrent encode()
+        # can fail with "Already borrowed"
+        self.tokenizer = copy.deepcopy(model.tokenizer)
+
+        # [CLS] and [SEP] take two of the model's positions
+        self.model_limit = model.max_seq_length - 2
+        self.max_tokens = min(max_tokens or self.model_limit, self.model_limit)
+        self.overlap_tokens = min(overlap_tokens, self.max_tokens // 2)
+
+    # ---------- TOKENS ----------
+
+    def token_counts(self, texts):
+        encoded = self.tokenizer(
+            list(texts), add_special_tokens=False, verbose=False
+        )
+        return np.array([len(ids) for ids in encoded["input_ids"]], dtype="int64")
+
+    def token_starts(self, text):
+        """
+        Character offset where each token starts
+        """
+
+        encoded = self.tokenizer(
+            [text],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False
+        )
+
+        offsets = np.asarray(encoded["offset_mapping"][0], dtype="int64").reshape(-1, 2)
+
+        return offsets[:, 0]
+
+    # ---------- CHUNKING ----------
+
+    def split(self, text):
+        """
+        Returns [(chunk_text, token_count)]
+        """
+
+        starts = self.token_starts(text)
+        n_tokens = len(starts)
+
+        if n_tokens == 0:
+            return []
+
+        # Sentence starts mapped to token positions in one vectorized pass
+        boundaries = np.unique(np.concatenate([
+            np.searchsorted(starts, sentence_starts(text), side="left"),
+            [0, n_tokens]
+        ]))
+
+        chunks = []
+        start = 0
+
+        while start < n_tokens:
+
+            limit = start + self.max_tokens
+
+            if limit >= n_tokens:
+                end = n_tokens
+            else:
+                # Last sentence boundary that fits; hard cut inside a
+                # sentence longer than the whole budget
+                fit = boundaries[np.searchsorted(boundaries, limit, side="right") - 1]
+                end = int(fit) if fit > start else limit
+
+            char_start = starts[start]
+            char_end = starts[end] if end < n_tokens else len(text)
+
+            chunks.append((text[char_start:char_end].strip(), end - start))
+
+            if end >= n_tokens:
+                break
+
+            # Step back whole sentences for the overlap
+            back = boundaries[np.searchsorted(boundaries, end - self.overlap_tokens, side="left")]
+            start = int(back) if start < back < end else end
+
+        return chunks
+
+    def chunk_section(self, section_data, doc_id="employee_handbook_v1"):
+
+        full_text = f"{section_data['title']}. {section_data['text']}"
+
+        return [
+            {
+                "doc_id": section_data.get("doc_id", doc_id),
+                "section_id": section_data["section_id"],
+                "chunk_id": f"{section_data['section_id']}_chunk_{idx}",
+                "title": section_data["title"],
+                "text": chunk,
+                "token_count": int(token_count)
+            }
+            for idx, (chunk, token_count) in enumerate(self.split(full_text), 1)
+        ]
+
+    # ---------- REPORT ----------
+
+    def truncation_report(self, sections, max_words, overlap_words):
+        """
+        How the old word-window settings fare against the model limit
+        """
+
+        old_chunks = [
+            chunk
+            for section in sections
+            for chunk in split_text(
+                f"{section['title']}. {section['text']}", max_words, overlap_words
+            )
+        ]
+
+        counts = self.token_counts(old_chunks) if old_chunks else np.zeros(0, dtype="int64")
+
+        return {
+            "old_chunks": len(old_chunks),
+            "truncated": int((counts > self.model_limit).sum()),
+            "tokens": int(counts.sum()),
+            "tokens_never_embedded": int(np.maximum(counts - self.model_limit, 0).sum())
+        }
@@ -0,0 +1,181 @@
+"""
+Compare embedding backends against the fp32 PyTorch model.
+
+Parity: cosine drift of every chunk and query vector from its fp32
+counterpart, and how many of the fp32 top-k chunks each backend still
+retrieves. Latency: p50/p95 single-query encode time and batch
+throughput over the chunk texts.
+
+Usage:
+    python -m embeddings.backend_report
+    python -m embeddings.backend_report --backends onnx int8 --json backend_report.json
+"""
+
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import yaml
+
+from embeddings.backends import BACKENDS, backend_options
+from embeddings.model_registry import get_model
+
+
+def load_config():
+    with open("config/config.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def load_texts(config):
+
+    with open(config["paths"]["chunked_input"], "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    documents = [c["text"] for c in chunks if c.get("text", "").strip()]
+
+    # Section titles make realistic short queries
+    queries = list(dict.fromkeys(c["title"] for c in chunks))
+
+    return documents, queries
+
+
+def encode(model, texts, batch_size):
+    return np.asarray(
+        model.encode(texts, batch_size=batch_size, normalize_embeddings=True),
+        dtype="float32"
+    )
+
+
+def top_k_ids(queries, documents, k):
+    return np.argsort(-(queries @ documents.T), axis=1)[:, :k]
+
+
+def measure(model, documents, queries, batch_size, repeats):
+    """
+    (document vectors, query vectors, latency stats)
+    """
+
+    # Warm-up: first calls pay for graph/session initialisation
+    encode(model, queries[:4], batch_size)
+
+    start = time.perf_counter()
+    doc_vectors = encode(model, documents, batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    latencies = []
+    query_vectors = []
+
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            vector = encode(model, [query], batch_size)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            if len(query_vectors) < len(queries):
+                query_vectors.append(vector[0])
+
+    return doc_vectors, np.array(query_vectors), {
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "chunks_per_s": round(len(documents) / batch_seconds, 1)
+    }
+
+
+def drift(vectors, reference):
+    # Both sides are unit length: 1 - cosine per row
+    return 1.0 - np.sum(vectors * reference, axis=1)
+
+
+def build_report(config, backends, k, repeats):
+
+    embedding_cfg = config["embedding"]
+    model_name = embedding_cfg["model_name"]
+    batch_size = embedding_cfg.get("batch_size", 64)
+    options = backend_options(embedding_cfg)
+
+    documents, queries = load_texts(config)
+    k = min(k, len(documents))
+
+    print(f"📂 {len(documents)} chunks, {len(queries)} queries")
+
+    reference = None
+    report = []
+
+    for backend in ["torch"] + [b for b in backends if b != "torch"]:
+
+        try:
+            model = get_model(model_name, **dict(options, backend=backend))
+        except Exception as e:
+            print(f"⚠ Skipping {backend}: {e}")
+            continue
+
+        print(f"⏱ Measuring {backend}...")
+        doc_vectors, query_vectors, row = measure(model, documents, queries, batch_size, repeats)
+
+        if reference is None:
+            reference = (doc_vectors, query_vectors, top_k_ids(query_vectors, doc_vectors, k))
+
+        ref_docs, ref_queries, ref_top = reference
+        cosine_drift = np.concatenate([drift(doc_vectors, ref_docs), drift(query_vectors, ref_queries)])
+        top = top_k_ids(query_vectors, doc_vectors, k)
+
+        report.append(dict(
+            {"backend": backend},
+            mean_drift=round(float(cosine_drift.mean()), 6),
+            max_drift=round(float(cosine_drift.max()), 6),
+            **{f"top{k}_agreement": round(float(np.mean([
+                len(set(a) & set(b)) / k for a, b in zip(top, ref_top)
+            ])), 4)},
+            **row
+        ))
+
+    return report
+
+
+def print_report(report):
+
+    columns = list(report[0].keys())
+
+    print(" | ".join(f"{c:>14}" for c in columns))
+
+    for row in report:
+        print(" | ".join(f"{row[c]!s:>14}" for c in columns))
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Embedding backend parity / latency report")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--k", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the queries for latency")
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    config = load_config()
+    k = args.k or config["retrieval"]["top_k"]
+    max_drift = config["embedding"].get("max_cosine_drift", 0.02)
+
+    report = build_report(config, args.backends, k, args.repeats)
+
+    print_report(report)
+
+    failed = [row["backend"] for row in report if row["max_drift"] > max_drift]
+
+    if failed:
+        print(f"❌ Cosine drift above {max_drift}: {', '.join(failed)}")
+    else:
+        print(f"✅ All backends within {max_drift} cosine drift of fp32")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"max_cosine_drift": max_drift, "backends": report}, f, indent=2)
+        print("💾 Report saved:", args.json_path)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import os
+
+
+# torch = fp32 PyTorch (as before), onnx = ONNX Runtime fp32,
+# int8 = ONNX Runtime with dynamically quantized weights
+BACKENDS = ("torch", "onnx", "int8")
+
+# Instruction sets sentence-transformers has int8 presets for
+QUANTIZATIONS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+
+def backend_options(embedding_config):
+    """
+    get_model() keyword arguments from the `embedding` config section
+    """
+
+    return {
+        "backend": embedding_config.get("backend", "torch"),
+        "model_dir": embedding_config.get("model_dir"),
+        "quantization": embedding_config.get("quantization", "avx2")
+    }
+
+
+def cache_key(model_name, backend="torch"):
+    """
+    Embedding-cache namespace: vectors from different backends differ
+    slightly and must not be mixed
+    """
+
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def local_model_path(model_dir, model_name):
+    return os.path.join(model_dir, model_name.replace("/", "__"))
+
+
+def quantized_file_name(quantization):
+    return f"model_qint8_{quantization}.onnx"
+
+
+def has_file(path, file_name):
+    return any(
+        os.path.exists(os.path.join(path, sub, file_name))
+        for sub in ("", "onnx")
+    )
+
+
+# ---------- LOADERS ----------
+
+def load_torch(model_name, model_dir):
+    """
+    A local copy in model_dir wins over the hub / HF cache
+    """
+
+    from sentence_transformers import SentenceTransformer
+
+    if model_dir is not None:
+        path = local_model_path(model_dir, model_name)
+
+        # The ONNX export shares the directory but has no torch weights
+        if has_file(path, "model.safetensors") or has_file(path, "pytorch_model.bin"):
+            return SentenceTransformer(path)
+
+    return SentenceTransformer(model_name)
+
+
+def load_onnx(model_name, model_dir):
+    """
+    Load the exported ONNX graph, exporting (and saving) it on first use
+    """
+
+    from sentence_transformers import SentenceTransformer
+
+    if model_dir is None:
+        print("⚠ embedding.model_dir not set — exporting to ONNX on every start")
+        return SentenceTransformer(model_name, backend="onnx")
+
+    path = local_model_path(model_dir, model_name)
+
+    if has_file(path, "model.onnx"):
+        return SentenceTransformer(
+            path, backend="onnx", model_kwargs={"file_name": "model.onnx"}
+        )
+
+    print(f"🔄 Exporting {model_name} to ONNX...")
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save(path)
+    print(f"💾 Saved ONNX model to {path}")
+
+    return model
+
+
+def load_int8(model_name, model_dir, quantization):
+    """
+    Dynamic int8 quantization of the ONNX export (no calibration data)
+    """
+
+    from sentence_transformers import SentenceTransformer
+
+    if model_dir is None:
+        raise ValueError("The int8 backend needs embedding.model_dir to store the quantized model")
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+
+    path = local_model_path(model_dir, model_name)
+    file_name = quantized_file_name(quantization)
+
+    if not has_file(path, file_name):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        onnx_model = load_onnx(model_name, model_dir)
+
+        print(f"🔄 Quantizing {model_name} to int8 ({quantization})...")
+        export_dynamic_quantized_onnx_model(onnx_model, quantization, path)
+        print(f"💾 Saved {file_name} to {path}")
+
+    return SentenceTransformer(
+        path, backend="onnx", model_kwargs={"file_name": file_name}
+    )
+
+
+def load_sentence_transformer(model_name, backend="torch", model_dir=None, quantization="avx2"):
+
+    if backend == "torch":
+        return load_torch(model_name, model_dir)
+
+    if backend == "onnx":
+        return load_onnx(model_name, model_dir)
+
+    if backend == "int8":
+        return load_int8(model_name, model_dir, quantization)
+
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
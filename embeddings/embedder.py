@@ -1,12 +1,201 @@
-from sentence_transformers import SentenceTransformer
+import os
+import time
+import atexit
+
+import numpy as np
+
+from embeddings.backends import backend_options as config_backend_options, cache_key
+from embeddings.embedding_cache import shared_cache
+from embeddings.model_registry import get_model
 
 
 class EmbeddingModel:
 
-    def __init__(self, model_name):
-        print("🔄 Loading embedding model...")
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name,
+        cache_dir=None,
+        cache_max_mb=512,
+        verbose=True,
+        batch_size=64,
+        sort_by_length=True,
+        workers=0,
+        min_pool_texts=2048,
+        backend_options=None
+    ):
+        backend_options = backend_options or {}
+
+        self.model = get_model(model_name, **backend_options)
         print("✅ Embedding model loaded")
 
+        # Progress bar + per-call cache line (off for batch-by-batch callers)
+        self.verbose = verbose
+
+        self.batch_size = batch_size
+        self.sort_by_length = sort_by_length
+
+        # Multi-process encoding: 0/1 = in-process, -1 = one worker per core
+        self.workers = (os.cpu_count() or 1) if workers == -1 else workers
+        self.min_pool_texts = min_pool_texts
+        self.pool = None
+
+        # Throughput counters
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+        # Vectors for previously seen texts are read back from disk
+        self.cache = (
+            shared_cache(
+                cache_dir,
+                cache_key(model_name, backend_options.get("backend", "torch")),
+                cache_max_mb
+            )
+            if cache_dir else None
+        )
+
+    @staticmethod
+    def from_config(embedding_config, **kwargs):
+        """
+        Build from the `embedding` section of config.yaml
+        """
+
+        return EmbeddingModel(
+            embedding_config["model_name"],
+            cache_dir=embedding_config.get("cache_dir"),
+            cache_max_mb=embedding_config.get("cache_max_mb", 512),
+            batch_size=embedding_config.get("batch_size", 64),
+            sort_by_length=embedding_config.get("sort_by_length", True),
+            workers=embedding_config.get("workers", 0),
+            min_pool_texts=embedding_config.get("min_pool_texts", 2048),
+            backend_options=config_backend_options(embedding_config),
+            **kwargs
+        )
+
+    # ---------- ENCODING ----------
+
+    def get_pool(self, n_texts):
+        """
+        Worker processes are only worth their start-up for large inputs
+        """
+
+        if self.workers <= 1 or n_texts < self.min_pool_texts:
+            return None
+
+        if self.pool is None:
+            print(f"🧵 Starting {self.workers} encoding processes...")
+
+            # Split the cores between workers instead of oversubscribing
+            previous = os.environ.get("OMP_NUM_THREADS")
+            os.environ["OMP_NUM_THREADS"] = str(max(1, (os.cpu_count() or 1) // self.workers))
+
+            try:
+                self.pool = self.model.start_multi_process_pool(["cpu"] * self.workers)
+            finally:
+                if previous is None:
+                    del os.environ["OMP_NUM_THREADS"]
+                else:
+                    os.environ["OMP_NUM_THREADS"] = previous
+
+            atexit.register(self.close)
+
+        return self.pool
+
+    def close(self):
+
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+    def encode(self, texts):
+        """
+        Unit-length vectors (inner product == cosine similarity).
+        Texts are encoded longest first so each batch pads to similar
+        lengths; vectors come back in the original order.
+        """
+
+        texts = list(texts)
+
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+
+        start = time.perf_counter()
+
+        order = None
+
+        if self.sort_by_length:
+            order = np.argsort([-len(t) for t in texts], kind="stable")
+            texts = [texts[i] for i in order]
+
+        pool = self.get_pool(len(texts))
+
+        if pool is not None:
+            vectors = self.model.encode_multi_process(
+                texts,
+                pool,
+                batch_size=self.batch_size,
+                normalize_embeddings=True
+            )
+        else:
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                show_progress_bar=self.verbose,
+                normalize_embeddings=True
+            )
+
+        vectors = np.asarray(vectors, dtype="float32")
+
+        if order is not None:
+            restored = np.empty_like(vectors)
+            restored[order] = vectors
+            vectors = restored
+
+        elapsed = time.perf_counter() - start
+
+        self.encoded += len(texts)
+        self.encode_seconds += elapsed
+
+        if self.verbose:
+            print(
+                f"⚡ Embedded {len(texts)} chunks in {elapsed:.2f} s "
+                f"({len(texts) / elapsed:.0f} chunks/s, batch {self.batch_size}, "
+                f"{self.workers if pool is not None else 1} process(es))"
+            )
+
+        return vectors
+
+    def throughput(self):
+        return self.encoded / self.encode_seconds if self.encode_seconds else 0.0
+
     def generate_embeddings(self, texts):
-        return self.model.encode(texts, show_progress_bar=True)
+
+        if self.cache is None:
+            return self.encode(texts)
+
+        vectors, missing = self.cache.lookup(texts)
+
+        if missing:
+            new_vectors = np.array(
+                self.encode([texts[i] for i in missing])
+            ).astype("float32")
+
+            self.cache.store([texts[i] for i in missing], new_vectors)
+
+            if vectors is None:
+                vectors = np.zeros((len(texts), new_vectors.shape[1]), dtype="float32")
+
+            vectors[missing] = new_vectors
+
+        else:
+            self.cache.flush()
+
+        if not self.verbose:
+            return vectors
+
+        stats = self.cache.stats()
+        print(
+            f"📦 Embedding cache: {len(texts) - len(missing)}/{len(texts)} hits "
+            f"(lifetime hit rate {stats['hit_rate']:.0%}, {stats['size_mb']} MB)"
+        )
+
+        return vectors
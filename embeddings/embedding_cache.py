@@ -0,0 +1,345 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers in this process are coordinated
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, on-disk embedding cache.
+
+    Layout (one directory per model):
+        vectors.f32   raw float32 rows, read through np.memmap
+        keys.npy      sha1 of (model name, text) per row, as uint8[20]
+        ticks.npy     last-use counter per row (for eviction)
+        meta.json     model name + embedding dimension
+        lock          flock()ed while reading or writing the files
+
+    Several processes (the server, run_embedding) may share a directory:
+    each reloads the index when another writer has changed it, and new
+    rows are numbered from the length of vectors.f32. Within a process
+    use shared_cache() so every model shares one instance.
+    """
+
+    def __init__(self, cache_dir, model_name, max_mb=512):
+
+        self.model_name = model_name
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+
+        slug = model_name.replace("/", "__")
+        self.dir = os.path.join(cache_dir, slug)
+        os.makedirs(self.dir, exist_ok=True)
+
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.keys_path = os.path.join(self.dir, "keys.npy")
+        self.ticks_path = os.path.join(self.dir, "ticks.npy")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, "lock")
+
+        self.lock = threading.Lock()
+
+        self.dim = None
+        self.rows = {}
+        self.ticks = np.zeros(0, dtype="int64")
+        self.tick = 0
+        self._vectors = None
+
+        # Files as this instance last read or wrote them
+        self.disk_version = None
+
+        self.hits = 0
+        self.misses = 0
+
+        with self._file_lock(exclusive=True):
+            self._load()
+
+    # ---------- KEYS ----------
+
+    def key(self, text):
+        return hashlib.sha1(
+            f"{self.model_name}\0{text}".encode("utf-8")
+        ).digest()
+
+    # ---------- LOOKUP / STORE ----------
+
+    def lookup(self, texts):
+        """
+        Returns (vectors, missing_positions).
+        vectors is None while the cache is still empty.
+        """
+
+        with self.lock, self._file_lock(exclusive=False):
+
+            self._sync()
+
+            if self.dim is None:
+                self.misses += len(texts)
+                return None, list(range(len(texts)))
+
+            vectors = np.zeros((len(texts), self.dim), dtype="float32")
+            missing = []
+            found_rows = []
+            found_positions = []
+
+            for pos, text in enumerate(texts):
+                row = self.rows.get(self.key(text))
+
+                if row is None:
+                    missing.append(pos)
+                else:
+                    found_rows.append(row)
+                    found_positions.append(pos)
+
+            if found_rows:
+                self.tick += 1
+                self.ticks[found_rows] = self.tick
+                vectors[found_positions] = self._memmap()[found_rows]
+
+            self.hits += len(found_rows)
+            self.misses += len(missing)
+
+            return vectors, missing
+
+    def store(self, texts, vectors):
+
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+
+        with self.lock, self._file_lock(exclusive=True):
+
+            # Pick up rows other writers added, so numbering follows the file
+            self._sync()
+
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+
+            next_row = self._rows_on_disk()
+            new_rows = []
+
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+
+                if key in self.rows:
+                    continue
+
+                self.rows[key] = next_row + len(new_rows)
+                new_rows.append(vector)
+
+            if not new_rows:
+                return
+
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.stack(new_rows).tobytes())
+
+            self.tick += 1
+            self.ticks = np.concatenate(
+                [self.ticks, np.full(len(new_rows), self.tick, dtype="int64")]
+            )
+            self._vectors = None
+
+            if self.max_bytes and self.size_bytes() > self.max_bytes:
+                self._evict()
+
+            self._save_index()
+
+    def flush(self):
+
+        with self.lock, self._file_lock(exclusive=True):
+
+            # Another writer's newer index wins over our use counters
+            if self.dim is not None and self._disk_version() == self.disk_version:
+                self._save_index()
+
+    def stats(self):
+        total = self.hits + self.misses
+
+        return {
+            "entries": len(self.rows),
+            "size_mb": round(self.size_bytes() / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def size_bytes(self):
+        return len(self.rows) * (self.dim or 0) * 4
+
+    # ---------- EVICTION ----------
+
+    def _evict(self):
+        """
+        Keep the most recently used rows, down to 80% of the size limit
+        """
+
+        keep_count = int(0.8 * self.max_bytes / (self.dim * 4))
+
+        keys_by_row = [None] * len(self.rows)
+        for key, row in self.rows.items():
+            keys_by_row[row] = key
+
+        keep = np.sort(np.argsort(-self.ticks, kind="stable")[:keep_count])
+
+        kept_vectors = np.array(self._memmap()[keep])
+
+        self._vectors = None
+
+        # Replace rather than rewrite: other processes' memmaps keep the old file
+        tmp_path = self.vectors_path + ".tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(kept_vectors.tobytes())
+
+        os.replace(tmp_path, self.vectors_path)
+
+        self.rows = {keys_by_row[row]: new for new, row in enumerate(keep)}
+        self.ticks = self.ticks[keep]
+
+        print(f"🧹 Embedding cache evicted {len(keys_by_row) - len(keep)} entries")
+
+    # ---------- CONCURRENCY ----------
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _disk_version(self):
+
+        version = []
+
+        for path in (self.keys_path, self.vectors_path):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                version.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            else:
+                version.append(None)
+
+        return version
+
+    def _rows_on_disk(self):
+
+        if not os.path.exists(self.vectors_path):
+            return 0
+
+        return os.path.getsize(self.vectors_path) // (self.dim * 4)
+
+    def _sync(self):
+        """
+        Reload the index if another writer changed the files since we
+        last read or wrote them (call with the file lock held)
+        """
+
+        if self._disk_version() == self.disk_version:
+            return
+
+        self.dim = None
+        self.rows = {}
+        self.ticks = np.zeros(0, dtype="int64")
+        self._vectors = None
+
+        self._load()
+
+    # ---------- PERSISTENCE ----------
+
+    def _memmap(self):
+
+        if self._vectors is None:
+            self._vectors = np.memmap(
+                self.vectors_path,
+                dtype="float32",
+                mode="r",
+                shape=(len(self.rows), self.dim)
+            )
+
+        return self._vectors
+
+    def _save_index(self):
+
+        keys = [None] * len(self.rows)
+        for key, row in self.rows.items():
+            keys[row] = key
+
+        # uint8 rows rather than an "S20" array: numpy strips trailing NUL bytes
+        np.save(
+            self.keys_path,
+            np.frombuffer(b"".join(keys), dtype="uint8").reshape(-1, 20)
+        )
+        np.save(self.ticks_path, self.ticks)
+
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+
+        self.disk_version = self._disk_version()
+
+    def _load(self):
+
+        self.disk_version = self._disk_version()
+
+        if not os.path.exists(self.meta_path):
+            return
+
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            keys = np.load(self.keys_path)
+            ticks = np.load(self.ticks_path)
+
+        except Exception as e:
+            print("⚠ Embedding cache unreadable — starting empty")
+            print(e)
+            return
+
+        dim = meta["dim"]
+        rows_on_disk = os.path.getsize(self.vectors_path) // (dim * 4)
+
+        # A crash between appending vectors and saving keys leaves extra rows
+        count = min(len(keys), rows_on_disk)
+
+        self.dim = dim
+        self.rows = {k.tobytes(): i for i, k in enumerate(keys[:count])}
+        self.ticks = ticks[:count].astype("int64")
+        self.tick = int(self.ticks.max()) if count else 0
+
+        if rows_on_disk != count:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(count * dim * 4)
+
+            self.disk_version = self._disk_version()
+
+
+# One instance per cache directory, shared by every EmbeddingModel
+# in the process (as model_registry shares the models)
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(cache_dir, model_name, max_mb=512):
+
+    key = (os.path.abspath(cache_dir), model_name)
+
+    with _caches_lock:
+
+        cache = _caches.get(key)
+
+        if cache is None:
+            cache = _caches[key] = EmbeddingCache(cache_dir, model_name, max_mb)
+
+    return cache
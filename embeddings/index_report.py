@@ -0,0 +1,144 @@
+"""
+Compare ANN index types against the exact flat index.
+
+Reports recall@k, p50/p99 single-query search latency and
+serialized index size for every type in INDEX_TYPES.
+
+Usage:
+    python -m embeddings.index_report
+    python -m embeddings.index_report --types hnsw ivf_flat --k 10 --json report.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import yaml
+
+from embeddings.embedder import EmbeddingModel
+from embeddings.vector_store import FAISSStore, INDEX_TYPES, index_size_bytes
+
+
+def load_config():
+    with open("config/config.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def load_vectors(config):
+
+    with open(config["paths"]["chunked_input"], "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    embedder = EmbeddingModel.from_config(config["embedding"])
+
+    # Section titles make realistic short queries
+    corpus = np.array(embedder.generate_embeddings([c["text"] for c in chunks])).astype("float32")
+    queries = np.array(embedder.generate_embeddings([c["title"] for c in chunks])).astype("float32")
+
+    return corpus, queries
+
+
+def measure(index, queries, k):
+
+    latencies = []
+    all_ids = []
+
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, ids = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        all_ids.append(ids[0])
+
+    return np.array(all_ids), np.array(latencies)
+
+
+def recall_at_k(ids, truth):
+
+    hits = [
+        len(set(row[row != -1]) & set(exact)) / len(exact)
+        for row, exact in zip(ids, truth)
+    ]
+
+    return float(np.mean(hits))
+
+
+def build_report(corpus, queries, index_config, types, k):
+
+    k = min(k, len(corpus))
+
+    flat = FAISSStore(corpus.shape[1], {"type": "flat"})
+    flat.add_embeddings(corpus)
+    truth, _ = measure(flat.index, queries, k)
+
+    report = []
+
+    for index_type in types:
+
+        cfg = dict(index_config, type=index_type)
+
+        try:
+            store = FAISSStore(corpus.shape[1], cfg, n_train=len(corpus))
+
+            start = time.perf_counter()
+            store.add_embeddings(corpus)
+            build_ms = (time.perf_counter() - start) * 1000
+
+        except Exception as e:
+            print(f"⚠ Skipping {index_type}: {e}")
+            continue
+
+        ids, latencies = measure(store.index, queries, k)
+
+        report.append({
+            "type": index_type,
+            f"recall@{k}": round(recall_at_k(ids, truth), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+            "build_ms": round(build_ms, 2),
+            "size_bytes": index_size_bytes(store.index)
+        })
+
+    return report
+
+
+def print_report(report):
+
+    if not report:
+        print("❌ No index could be built")
+        return
+
+    columns = list(report[0].keys())
+
+    print(" | ".join(f"{c:>12}" for c in columns))
+
+    for row in report:
+        print(" | ".join(f"{row[c]!s:>12}" for c in columns))
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="ANN index recall / latency report")
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES))
+    parser.add_argument("--k", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    config = load_config()
+    k = args.k or config["retrieval"]["top_k"]
+
+    print("📂 Embedding chunks and queries...")
+    corpus, queries = load_vectors(config)
+
+    report = build_report(corpus, queries, config.get("index", {}), args.types, k)
+
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("💾 Report saved:", args.json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import hashlib
+from collections import Counter
+
+import numpy as np
+
+from embeddings.vector_store import FAISSStore, has_id_map, index_matches_config
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def chunk_keys(chunks):
+    """
+    chunk_id is not unique (a document can repeat a section number),
+    so a chunk is identified by its chunk_id and occurrence count
+    """
+
+    return occurrence_keys(chunk["chunk_id"] for chunk in chunks)
+
+
+def occurrence_keys(chunk_ids):
+
+    seen = Counter()
+    keys = []
+
+    for chunk_id in chunk_ids:
+        seen[chunk_id] += 1
+        keys.append((chunk_id, seen[chunk_id]))
+
+    return keys
+
+
+class StableIds:
+    """
+    plan_update()'s id assignment one chunk at a time, for streamed
+    builds: a chunk keeps the id its (chunk_id, occurrence) had in the
+    previous metadata; new chunks get ids past the previous maximum
+    """
+
+    def __init__(self, previous_metadata=None):
+
+        previous_metadata = previous_metadata or []
+
+        self.previous = {
+            key: c["id"]
+            for key, c in zip(chunk_keys(previous_metadata), previous_metadata)
+            if "id" in c
+        }
+
+        self.next_id = max(self.previous.values(), default=-1) + 1
+        self.seen = Counter()
+        self.reused = 0
+
+    def assign(self, chunk):
+
+        self.seen[chunk["chunk_id"]] += 1
+        old = self.previous.get((chunk["chunk_id"], self.seen[chunk["chunk_id"]]))
+
+        if old is None:
+            chunk["id"] = self.next_id
+            self.next_id += 1
+        else:
+            chunk["id"] = old
+            self.reused += 1
+
+        return chunk["id"]
+
+
+def plan_update(chunks, previous_metadata=None):
+    """
+    Assign every chunk its `content_hash` and a stable integer `id`
+    (reused from the previous run when the chunk is already known).
+
+    Returns (changed_chunks, stale_ids):
+    chunks that need embedding, and ids whose vectors must be removed.
+    """
+
+    previous = {
+        key: c
+        for key, c in zip(chunk_keys(previous_metadata or []), previous_metadata or [])
+        if "id" in c
+    }
+
+    next_id = max((c["id"] for c in previous.values()), default=-1) + 1
+
+    changed = []
+    stale_ids = []
+
+    for key, chunk in zip(chunk_keys(chunks), chunks):
+
+        chunk["content_hash"] = content_hash(chunk["text"])
+
+        old = previous.pop(key, None)
+
+        if old is None:
+            chunk["id"] = next_id
+            next_id += 1
+            changed.append(chunk)
+
+        else:
+            chunk["id"] = old["id"]
+
+            if old.get("content_hash") != chunk["content_hash"]:
+                stale_ids.append(old["id"])
+                changed.append(chunk)
+
+    # Chunks that disappeared from the document
+    stale_ids.extend(c["id"] for c in previous.values())
+
+    return changed, stale_ids
+
+
+def embed_chunks(embedder, chunks):
+    embeddings = embedder.generate_embeddings([c["text"] for c in chunks])
+    return np.array(embeddings).astype("float32")
+
+
+def build_index(chunks, embedder, index_config=None, previous_metadata=None):
+    """
+    Full build: embed every chunk.
+    Ids stay stable if previous metadata is given.
+    """
+
+    plan_update(chunks, previous_metadata)
+
+    embeddings = embed_chunks(embedder, chunks)
+
+    store = FAISSStore(embeddings.shape[1], index_config, n_train=len(embeddings))
+    store.add_embeddings(embeddings, ids=[c["id"] for c in chunks])
+
+    return store.index
+
+
+def can_update(index, previous_metadata, index_config=None):
+
+    if not has_id_map(index):
+        print("ℹ Existing index has no id map — full rebuild needed")
+        return False
+
+    if not index_matches_config(index, index_config):
+        print("ℹ Existing index was built with another index.type — full rebuild needed")
+        return False
+
+    if not previous_metadata or any(not c.get("content_hash") for c in previous_metadata):
+        print("ℹ Existing metadata has no content hashes — full rebuild needed")
+        return False
+
+    return True
+
+
+def update_index(index, chunks, previous_metadata, embedder):
+    """
+    Incremental update in place: re-embed only new or changed chunks
+    and drop vectors of changed or deleted ones.
+    Returns (changed_chunks, stale_ids).
+    """
+
+    changed, stale_ids = plan_update(chunks, previous_metadata)
+
+    if stale_ids:
+        # Raises for index types without removal support (e.g. HNSW)
+        index.remove_ids(np.array(stale_ids, dtype="int64"))
+
+    if changed:
+        embeddings = embed_chunks(embedder, changed)
+
+        if embeddings.shape[1] != index.d:
+            raise ValueError("Embedding dimension changed — full rebuild needed")
+
+        index.add_with_ids(
+            embeddings,
+            np.array([c["id"] for c in changed], dtype="int64")
+        )
+
+    return changed, stale_ids
+
+
+class StreamingIndexBuilder:
+    """
+    Builds a FAISS index batch by batch as embeddings arrive.
+    Index types that need training (IVF, PQ, SQ8) buffer vectors until
+    train_size have arrived or the stream ends, then stream the rest.
+    """
+
+    def __init__(self, index_config=None, train_size=20000):
+        self.index_config = index_config or {}
+        self.train_size = train_size
+
+        self.store = None
+        self.pending = []
+        self.pending_count = 0
+
+    def add(self, embeddings, ids):
+
+        if self.store is None:
+
+            if not self.pending:
+                store = FAISSStore(embeddings.shape[1], self.index_config)
+
+                if store.index.is_trained:
+                    self.store = store
+
+            if self.store is None:
+                self.pending.append((embeddings, np.asarray(ids, dtype="int64")))
+                self.pending_count += len(embeddings)
+
+                if self.pending_count >= self.train_size:
+                    self.flush_pending()
+
+                return
+
+        self.store.add_embeddings(embeddings, ids)
+
+    def flush_pending(self):
+
+        embeddings = np.concatenate([e for e, _ in self.pending])
+        ids = np.concatenate([i for _, i in self.pending])
+
+        self.pending = []
+        self.pending_count = 0
+
+        # n_train known now, so nlist can be clamped to the sample
+        self.store = FAISSStore(embeddings.shape[1], self.index_config, n_train=len(embeddings))
+        self.store.add_embeddings(embeddings, ids)
+
+    def finish(self):
+
+        if self.store is None and self.pending:
+            self.flush_pending()
+
+        return self.store.index if self.store is not None else None
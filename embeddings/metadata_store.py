@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import sqlite3
+import threading
+
+
+SCHEMA = """
+CREATE TABLE chunks (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    doc_id TEXT,
+    section_id TEXT,
+    chunk_id TEXT,
+    title TEXT,
+    token_count INTEGER,
+    content_hash TEXT,
+    text TEXT
+)
+"""
+
+FIELDS = ("id", "doc_id", "section_id", "chunk_id", "title", "token_count", "content_hash")
+
+
+class ChunkRecord:
+    """
+    Per-chunk metadata kept in memory (text stays on disk).
+    Repeated strings are interned so every record shares them.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, id, doc_id, section_id, chunk_id, title, token_count, content_hash):
+        self.id = id
+        self.doc_id = sys.intern(doc_id or "")
+        self.section_id = sys.intern(section_id or "")
+        self.chunk_id = chunk_id
+        self.title = sys.intern(title or "")
+        self.token_count = token_count
+        self.content_hash = content_hash
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+class MetadataStore:
+    """
+    Chunk metadata in SQLite, addressed by FAISS id.
+    Row lookup goes through the INTEGER PRIMARY KEY (rowid),
+    and text is only read for the chunks actually returned.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    # ---------- WRITE ----------
+
+    @staticmethod
+    def write(chunks, path):
+        """
+        Replace the store atomically with `chunks` (a list of dicts)
+        """
+
+        with MetadataWriter(path) as writer:
+            writer.append(chunks)
+
+    @staticmethod
+    def open(path):
+        """
+        Open the store, migrating a legacy metadata.json next to it
+        """
+
+        legacy_path = os.path.splitext(path)[0] + ".json"
+
+        if not os.path.exists(path) and os.path.exists(legacy_path):
+            print("♻ Migrating", legacy_path, "→", path)
+
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                MetadataStore.write(json.load(f), path)
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+
+        return MetadataStore(path)
+
+    # ---------- READ ----------
+
+    def load_records(self):
+        """
+        All rows without their text, in document order: {id: ChunkRecord}
+        """
+
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM chunks ORDER BY position"
+            ).fetchall()
+
+        return {row[0]: ChunkRecord(*row) for row in rows}
+
+    def fetch_texts(self, ids):
+
+        ids = list(dict.fromkeys(int(i) for i in ids))
+
+        if not ids:
+            return {}
+
+        placeholders = ", ".join("?" * len(ids))
+
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, text FROM chunks WHERE id IN ({placeholders})",
+                ids
+            ).fetchall()
+
+        return dict(rows)
+
+    def chunk_index(self):
+        """
+        (chunk_id, id, content_hash) per chunk in document order,
+        as needed to plan an incremental re-index
+        """
+
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT chunk_id, id, content_hash FROM chunks ORDER BY position"
+            ).fetchall()
+
+        return [
+            {"chunk_id": chunk_id, "id": id, "content_hash": content_hash}
+            for chunk_id, id, content_hash in rows
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+class MetadataWriter:
+    """
+    Streams chunk rows into a temporary database, batch by batch,
+    and swaps it in atomically on a clean exit
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.position = 0
+
+    def __enter__(self):
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+        self.conn = sqlite3.connect(self.tmp_path)
+        self.conn.execute(SCHEMA)
+
+        return self
+
+    def append(self, chunks):
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        chunk.get("id", pos),
+                        pos,
+                        chunk.get("doc_id"),
+                        chunk.get("section_id"),
+                        chunk.get("chunk_id"),
+                        chunk.get("title"),
+                        chunk.get("token_count"),
+                        chunk.get("content_hash"),
+                        chunk.get("text", "")
+                    )
+                    for pos, chunk in enumerate(chunks, self.position)
+                )
+            )
+
+        self.position += len(chunks)
+
+    def __exit__(self, exc_type, exc, tb):
+
+        self.conn.close()
+
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
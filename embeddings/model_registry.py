@@ -0,0 +1,60 @@
+import threading
+
+
+# One SentenceTransformer per model name, shared by the retriever
+# and every index builder in the process
+_models = {}
+_lock = threading.Lock()
+
+
+def get_model(model_name, backend="torch", model_dir=None, quantization="avx2"):
+    """
+    Load the model on first use; later calls return the same instance.
+    sentence_transformers (and torch) are only imported here.
+    Non-torch backends are cached separately (see embeddings.backends).
+    """
+
+    key = model_name if backend == "torch" else (backend, model_name)
+
+    with _lock:
+
+        model = _models.get(key)
+
+        if model is None:
+            from embeddings.backends import load_sentence_transformer
+
+            print(f"🔄 Loading embedding model {model_name} ({backend})...")
+            model = load_sentence_transformer(model_name, backend, model_dir, quantization)
+            _models[key] = model
+
+    return model
+
+
+def get_cross_encoder(model_name):
+    """
+    Same as get_model() for reranking cross-encoders
+    """
+
+    key = ("cross-encoder", model_name)
+
+    with _lock:
+
+        model = _models.get(key)
+
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            print(f"🔄 Loading cross-encoder {model_name}...")
+            model = CrossEncoder(model_name, device="cpu")
+            _models[key] = model
+
+    return model
+
+
+def loaded_models():
+    """
+    Names of the resident models, e.g. for /ready
+    """
+
+    with _lock:
+        return [key if isinstance(key, str) else "/".join(key) for key in _models]
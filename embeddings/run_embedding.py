@@ -1,8 +1,11 @@
+import sys
 import json
 import yaml
-import numpy as np
 from embeddings.embedder import EmbeddingModel
-from embeddings.vector_store import FAISSStore
+from embeddings.vector_store import FAISSStore, faiss_exists
+from embeddings.indexer import build_index, can_update, update_index
+from embeddings.metadata_store import MetadataStore
+from retrieval.namespaces import selected_documents, namespace_paths
 
 
 def load_config():
@@ -30,58 +33,132 @@ def load_chunks(path):
         exit()
 
 
-def main():
-
-    config = load_config()
-
-    input_path = config["paths"]["chunked_input"]
-    index_path = config["paths"]["vector_index"]
-    metadata_path = config["paths"]["vector_metadata"]
+def embed_document(doc_id, paths, embedder, index_config, full_rebuild):
 
-    model_name = config["embedding"]["model_name"]
+    input_path = paths["chunks"]
+    index_path = paths["vector_index"]
+    metadata_path = paths["vector_metadata"]
 
-    print("📂 Loading chunked data...")
+    print(f"📂 Loading chunked data ({doc_id})...")
     chunks = load_chunks(input_path)
 
     # Safe text extraction
-    texts = []
+    chunks = [c for c in chunks if "text" in c and c["text"].strip()]
 
-    for chunk in chunks:
-        if "text" in chunk and chunk["text"].strip():
-            texts.append(chunk["text"])
-
-    if not texts:
+    if not chunks:
         print("❌ No valid text found for embedding")
         return
 
+    previous_index = None
+    previous_metadata = None
+
+    if not full_rebuild and faiss_exists(index_path):
+        try:
+            store = MetadataStore.open(metadata_path)
+            previous_metadata = store.chunk_index()
+            store.close()
+
+            previous_index = FAISSStore.load(index_path, index_config)
+
+        except FileNotFoundError:
+            print("ℹ No previous metadata — full rebuild needed")
+
+        except Exception as e:
+            print("⚠ Could not load the existing index — full rebuild needed")
+            print(e)
+            previous_index = None
+
+        if previous_index is not None and not can_update(previous_index, previous_metadata, index_config):
+            previous_index = None
+
+    index = None
+
+    if previous_index is not None:
+        try:
+            print("🔁 Updating FAISS index incrementally...")
+            changed, stale_ids = update_index(
+                previous_index, chunks, previous_metadata, embedder
+            )
+            index = previous_index
+
+            print(
+                f"📊 {len(changed)} chunks embedded, "
+                f"{len(stale_ids)} vectors removed, "
+                f"{len(chunks) - len(changed)} unchanged"
+            )
+
+        except Exception as e:
+            print("⚠ Incremental update not possible — rebuilding")
+            print(e)
+
+    if index is None:
+        try:
+            print(f"📦 Creating FAISS index ({index_config.get('type', 'flat')})...")
+            index = build_index(chunks, embedder, index_config, previous_metadata)
+        except Exception as e:
+            print("❌ Embedding or index build failed")
+            print(e)
+            return
+
     try:
-        embedder = EmbeddingModel(model_name)
-        embeddings = embedder.generate_embeddings(texts)
+        print("💾 Saving FAISS index...")
+        FAISSStore.save_index(index, index_path)
+
+        print("💾 Saving metadata...")
+        MetadataStore.write(chunks, metadata_path)
+
     except Exception as e:
-        print("❌ Embedding generation failed")
+        print("❌ Failed while saving index or metadata")
         print(e)
         return
 
-    embeddings = np.array(embeddings).astype("float32")
+    print(f"✅ {doc_id}: {len(chunks)} chunks indexed")
 
-    print("📦 Creating FAISS index...")
-    store = FAISSStore(embeddings.shape[1])
-    store.add_embeddings(embeddings)
 
-    try:
-        print("💾 Saving FAISS index...")
-        store.save(index_path)
+def main():
 
-        print("💾 Saving metadata...")
-        store.save_metadata(chunks, metadata_path)
+    config = load_config()
 
+    index_config = config.get("index", {})
+
+    # --full forces a rebuild (e.g. after changing index type or model)
+    full_rebuild = "--full" in sys.argv[1:]
+
+    # One model (and embedding cache) shared by every document
+    try:
+        embedder = EmbeddingModel.from_config(config["embedding"])
     except Exception as e:
-        print("❌ Failed while saving index or metadata")
+        print("❌ Failed to load embedding model")
         print(e)
         return
 
+    # Separate index + metadata pair per document
+    for doc_id, _ in selected_documents(config, sys.argv[1:]):
+        embed_document(
+            doc_id,
+            namespace_paths(config, doc_id),
+            embedder,
+            index_config,
+            full_rebuild
+        )
+
+    if embedder.encoded:
+        print(
+            f"\n⚡ Encoded {embedder.encoded} chunks at "
+            f"{embedder.throughput():.0f} chunks/s"
+        )
+
+    embedder.close()
+
     print("\n✅ STEP 3 — EMBEDDING + INDEXING COMPLETED SUCCESSFULLY")
 
+    # The rebuilt index invalidated the stored answers; refresh them
+    if config.get("precomputed", {}).get("build_on_index", False):
+        from rag.precompute_answers import build_all
+
+        print("\n📚 Precomputing canonical answers...")
+        build_all([doc_id for doc_id, _ in selected_documents(config, sys.argv[1:])])
+
 
 if __name__ == "__main__":
     main()
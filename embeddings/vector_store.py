@@ -4,21 +4,175 @@ import json
 import os
 
 
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq", "sq8", "sq_fp16")
+
+METRICS = {
+    "inner_product": faiss.METRIC_INNER_PRODUCT,
+    "l2": faiss.METRIC_L2
+}
+
+
+def index_factory_string(index_config, n_train=None):
+    """
+    Translate the `index` section of config.yaml into a
+    faiss.index_factory description
+    """
+
+    index_config = index_config or {}
+    index_type = index_config.get("type", "flat")
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown index type '{index_type}' (expected one of {', '.join(INDEX_TYPES)})"
+        )
+
+    if index_type == "flat":
+        return "Flat"
+
+    if index_type == "hnsw":
+        return f"HNSW{index_config.get('hnsw_m', 32)}"
+
+    if index_type == "sq8":
+        return "SQ8"
+
+    if index_type == "sq_fp16":
+        return "SQfp16"
+
+    # IVF variants: k-means needs at least one training point per list
+    nlist = index_config.get("nlist", 100)
+
+    if n_train is not None and n_train < nlist:
+        print(f"⚠ Only {n_train} vectors — reducing nlist from {nlist} to {n_train}")
+        nlist = max(1, n_train)
+
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+
+    pq_m = index_config.get("pq_m", 16)
+    pq_nbits = index_config.get("pq_nbits", 8)
+
+    return f"IVF{nlist},PQ{pq_m}x{pq_nbits}"
+
+
+def base_index(index):
+    """
+    The index under an id map, downcast to its concrete class
+    """
+
+    if has_id_map(index):
+        index = index.index
+
+    return faiss.downcast_index(index)
+
+
+def index_type_of(index):
+    """
+    The `index.type` an index actually is, whatever config.yaml says
+    (None for structures this repo does not build)
+    """
+
+    base = base_index(index)
+
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf_flat"
+
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        return "sq_fp16" if base.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+
+    if isinstance(base, faiss.IndexFlat):
+        return "flat"
+
+    return None
+
+
+def index_matches_config(index, index_config):
+    return index_type_of(index) == (index_config or {}).get("type", "flat")
+
+
+def configure_search(index, index_config):
+    """
+    Apply query-time parameters (nprobe / efSearch).
+    These are not stored reliably in the index file.
+    Only parameters the loaded index supports are set, so an index
+    built with a different `index.type` still loads.
+    """
+
+    index_config = index_config or {}
+    index_type = index_type_of(index)
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        faiss.extract_index_ivf(base_index(index)).nprobe = index_config.get("nprobe", 10)
+
+    if index_type == "hnsw":
+        base_index(index).hnsw.efSearch = index_config.get("ef_search", 64)
+
+    return index
+
+
 class FAISSStore:
 
-    def __init__(self, dim):
-        self.index = faiss.IndexFlatL2(dim)
+    def __init__(self, dim, index_config=None, n_train=None):
+
+        self.index_config = index_config or {}
+
+        # Embeddings are L2-normalized, so inner product == cosine similarity
+        base = faiss.index_factory(
+            dim,
+            index_factory_string(self.index_config, n_train),
+            METRICS[self.index_config.get("metric", "inner_product")]
+        )
+
+        if self.index_config.get("type") == "hnsw":
+            faiss.downcast_index(base).hnsw.efConstruction = (
+                self.index_config.get("ef_construction", 200)
+            )
+
+        # Vectors are stored under each chunk's stable id, not its position
+        self.index = faiss.IndexIDMap2(base)
+
+        configure_search(self.index, self.index_config)
+
+    def train(self, embeddings):
+
+        if not self.index.is_trained:
+            print(f"🏋 Training {self.index_config.get('type')} index on {len(embeddings)} vectors...")
+            self.index.train(embeddings)
+
+    def add_embeddings(self, embeddings, ids=None):
 
-    def add_embeddings(self, embeddings):
-        self.index.add(embeddings)
+        self.train(embeddings)
+
+        if ids is None:
+            ids = np.arange(self.index.ntotal, self.index.ntotal + len(embeddings))
+
+        self.index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
 
     def save(self, index_path):
+        FAISSStore.save_index(self.index, index_path)
+
+    @staticmethod
+    def save_index(index, index_path):
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
-        faiss.write_index(self.index, index_path)
+        faiss.write_index(index, index_path)
 
     @staticmethod
-    def load(index_path):
-        return faiss.read_index(index_path)
+    def load(index_path, index_config=None):
+
+        index = faiss.read_index(index_path)
+
+        if not index_matches_config(index, index_config):
+            print(
+                f"⚠ {index_path} is a {index_type_of(index)} index but index.type is "
+                f"{(index_config or {}).get('type', 'flat')} — rebuild with run_embedding --full"
+            )
+
+        return configure_search(index, index_config)
 
     @staticmethod
     def save_metadata(metadata, path):
@@ -34,4 +188,24 @@ class FAISSStore:
 # ---------- NEW HELPER ----------
 
 def faiss_exists(index_path):
-    return os.path.exists(index_path)
\ No newline at end of file
+    return os.path.exists(index_path)
+
+
+def has_id_map(index):
+    return isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2))
+
+
+def similarity_scores(index, distances):
+    """
+    Cosine similarity from FAISS distances (vectors are unit length).
+    Older L2 indexes return squared distances: cos = 1 - d / 2.
+    """
+
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        return distances
+
+    return 1.0 - distances / 2.0
+
+
+def index_size_bytes(index):
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,156 @@
+"""
+Benchmark the streaming HTML normalizer against the BeautifulSoup one.
+
+The raw export is repeated --scale times inside one <body> to mimic
+a document of several hundred pages. Each parser runs in a fresh
+process so its peak RSS is measured in isolation.
+
+Usage:
+    python -m ingestion.benchmark_normalize
+    python -m ingestion.benchmark_normalize --scale 50 --json normalize_report.json
+"""
+
+import os
+import json
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+import yaml
+
+
+def load_config():
+    with open("config/config.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def scaled_copy(html_path, scale):
+    """
+    Write the export with its body repeated `scale` times
+    """
+
+    with open(html_path, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    body_start = html.index(">", html.index("<body")) + 1
+    body_end = html.rindex("</body>")
+
+    fd, path = tempfile.mkstemp(suffix=".html")
+
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html[:body_start])
+
+        for _ in range(scale):
+            f.write(html[body_start:body_end])
+
+        f.write(html[body_end:])
+
+    return path
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_parser(name, html_path, results):
+
+    from ingestion.normalize import parse_html_to_structured, stream_html_to_structured
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+
+    if name == "beautifulsoup":
+        with open(html_path, "r", encoding="utf-8") as f:
+            records = parse_html_to_structured(f.read())
+
+        sections = len(records)
+        ids = [r["section_id"] for r in records]
+
+    else:
+        # Consume the generator without keeping the records
+        sections = 0
+        ids = []
+
+        for record in stream_html_to_structured(html_path):
+            sections += 1
+
+            if len(ids) < 500:
+                ids.append(record["section_id"])
+
+    results.put({
+        "parser": name,
+        "sections": sections,
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(peak_rss_mb() - baseline, 1),
+        "first_ids": ids[:500]
+    })
+
+
+def measure(name, html_path):
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+
+    process = ctx.Process(target=run_parser, args=(name, html_path, results))
+    process.start()
+    result = results.get()
+    process.join()
+
+    return result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="HTML normalizer benchmark")
+    parser.add_argument("--html", default=None, help="raw export (default: paths.raw_data/raw_doc.html)")
+    parser.add_argument("--scale", type=int, default=20, help="times to repeat the body")
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    html_path = args.html or os.path.join(load_config()["paths"]["raw_data"], "raw_doc.html")
+
+    print(f"📂 Building a {args.scale}× copy of {html_path}...")
+    scaled_path = scaled_copy(html_path, args.scale)
+
+    try:
+        size_mb = os.path.getsize(scaled_path) / (1024 * 1024)
+
+        report = {
+            "html": html_path,
+            "scale": args.scale,
+            "size_mb": round(size_mb, 1),
+            "parsers": [measure(name, scaled_path) for name in ("beautifulsoup", "streaming")]
+        }
+
+    finally:
+        os.remove(scaled_path)
+
+    baseline, streaming = report["parsers"]
+
+    report["same_sections"] = (
+        baseline["sections"] == streaming["sections"]
+        and baseline["first_ids"] == streaming["first_ids"]
+    )
+
+    print(f"\n📄 {report['size_mb']} MB of HTML")
+    print(f"{'parser':<15}{'sections':>10}{'seconds':>10}{'peak MB':>10}")
+
+    for row in report["parsers"]:
+        print(f"{row['parser']:<15}{row['sections']:>10}{row['seconds']:>10}{row['peak_rss_mb']:>10}")
+
+    print("✅ Same sections" if report["same_sections"] else "❌ Section output differs")
+
+    for row in report["parsers"]:
+        del row["first_ids"]
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("💾 Report saved:", args.json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,32 @@
 from bs4 import BeautifulSoup
+from lxml import etree
 import re
 
 
+WHITESPACE = re.compile(r"\s+")
+
+# I. Welcome / A. Policy / 1. Hiring Policy / a. Equal Employment Policy
+SECTION_HEADING = re.compile(r"^([IVX]+|[A-Z]|\d+|[a-z])\.\s+.+")
+
+# A heading number split from its title ("2." then "Hiring Policy")
+BROKEN_HEADING = re.compile(r"^(\d+|[A-Za-z]|[IVX]+)\.$")
+
+# First real section, right after the Table of Contents
+TOC_END = re.compile(r"^I\.\s+Welcome")
+
+BLOCK_TAGS = ("p", "div", "hr")
+
+# Raw-byte scanning for streaming segmentation
+BLOCK_OR_DIV_END = re.compile(rb"<(/)?(p|div|hr)(?=[\s>/])", re.IGNORECASE)
+META_CHARSET = re.compile(rb"charset=[\"']?([A-Za-z0-9_-]+)", re.IGNORECASE)
+
+READ_BYTES = 1 << 16
+SEGMENT_BYTES = 1 << 20
+
+
 def clean_text(text):
     text = text.replace("\xa0", " ")
-    text = re.sub(r"\s+", " ", text)
+    text = WHITESPACE.sub(" ", text)
     return text.strip()
 
 
@@ -16,16 +38,181 @@ def is_section_heading(text):
     1. Hiring Policy
     a. Equal Employment Policy
     """
-    pattern = r"^([IVX]+|[A-Z]|\d+|[a-z])\.\s+.+"
-    return re.match(pattern, text)
+    return SECTION_HEADING.match(text)
 
 
 def parse_html_to_structured(html):
+    """
+    Builds the full BeautifulSoup tree first — fine for small exports,
+    see stream_html_to_structured for large ones
+    """
 
     soup = BeautifulSoup(html, "lxml")
-    body = soup.body
 
-    records = []
+    blocks = (
+        (el.name, clean_text(el.get_text()))
+        for el in soup.body.find_all(list(BLOCK_TAGS))
+    )
+
+    return list(iter_sections(blocks))
+
+
+def iter_html_segments(f, segment_bytes=SEGMENT_BYTES):
+    """
+    Split a raw HTML byte stream into segments that each start at a
+    top-level block tag (outside any div), so every segment parses on
+    its own. libxml2's HTML push parser keeps all input fed into one
+    document; closing the document after each segment is what keeps
+    memory bounded.
+    """
+
+    buffer = b""
+
+    while True:
+
+        data = f.read(READ_BYTES)
+        buffer += data
+
+        while len(buffer) >= segment_bytes or (not data and buffer):
+
+            cut = top_level_cut(buffer) if data else None
+
+            if cut is None:
+                if data:
+                    break   # one huge div: keep reading until it closes
+
+                yield buffer
+                return
+
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+        if not data:
+            return
+
+
+def top_level_cut(buffer):
+    """
+    Offset of the last block start at div depth 0 (not at offset 0)
+    """
+
+    depth = 0
+    cut = None
+
+    for match in BLOCK_OR_DIV_END.finditer(buffer):
+
+        tag = match.group(2).lower()
+
+        if match.group(1):
+            if tag == b"div":
+                depth = max(depth - 1, 0)
+            continue
+
+        if depth == 0 and match.start() > 0:
+            cut = match.start()
+
+        if tag == b"div":
+            depth += 1
+
+    return cut
+
+
+class BlockCollector:
+    """
+    lxml SAX target: collects (tag, text) per p/div/hr without building
+    a tree. Text belongs to the innermost open block, so a nested
+    block's text is yielded once.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.blocks = []
+
+    def start(self, tag, attrib):
+        if tag in BLOCK_TAGS:
+            self.stack.append([])
+
+    def data(self, text):
+        if self.stack:
+            self.stack[-1].append(text)
+
+    def end(self, tag):
+        if tag in BLOCK_TAGS and self.stack:
+            self.blocks.append((tag, clean_text("".join(self.stack.pop()))))
+
+    def close(self):
+        return None
+
+    def drain(self):
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+
+def iter_html_blocks(source):
+    """
+    (tag, text) for every p/div/hr, streamed through a SAX parser.
+    source: a file path or a binary file object.
+    """
+
+    f = open(source, "rb") if isinstance(source, str) else source
+
+    try:
+        head = f.read(4096)
+        match = META_CHARSET.search(head)
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+
+        # One parser for every segment: close() ends the document and
+        # frees its input (fresh parsers would pile up until the next gc)
+        collector = BlockCollector()
+        parser = etree.HTMLParser(target=collector, encoding=encoding)
+
+        for segment in iter_html_segments(ChainedReader(head, f)):
+
+            for offset in range(0, len(segment), READ_BYTES):
+                parser.feed(segment[offset:offset + READ_BYTES])
+                yield from collector.drain()
+
+            parser.close()
+            yield from collector.drain()
+
+    finally:
+        if isinstance(source, str):
+            f.close()
+
+
+class ChainedReader:
+    """
+    Re-reads the bytes already taken for charset sniffing
+    """
+
+    def __init__(self, head, f):
+        self.head = head
+        self.f = f
+
+    def read(self, size):
+
+        if self.head:
+            data, self.head = self.head[:size], self.head[size:]
+            return data
+
+        return self.f.read(size)
+
+
+def stream_html_to_structured(source):
+    """
+    Generator of section records, same output as parse_html_to_structured
+    """
+
+    return iter_sections(iter_html_blocks(source))
+
+
+def iter_sections(blocks):
+    """
+    Turns (tag, text) blocks into section records, tracking the
+    I → A → 1 → a heading hierarchy for section_id
+    """
+
+    blocks = iter(blocks)
 
     # Hierarchy tracker
     hierarchy = {
@@ -41,52 +228,37 @@ def parse_html_to_structured(html):
 
     toc_skipped = False
 
-    elements = body.find_all(["p", "div", "hr"])
-
-    i = 0
-
-    while i < len(elements):
-
-        el = elements[i]
+    for tag, text in blocks:
 
         # Ignore page break tags now
-        if el.name == "hr":
-            i += 1
-            continue
-
-        text = clean_text(el.get_text())
-
-        if not text:
-            i += 1
+        if tag == "hr" or not text:
             continue
 
         # Skip Table of Contents
         if not toc_skipped:
-            if re.match(r"^I\.\s+Welcome", text):
+            if TOC_END.match(text):
                 toc_skipped = True
             else:
-                i += 1
                 continue
 
         # Fix broken headings
         # Example:
         # 2.
         # Hiring Policy
-        if re.match(r"^(\d+|[A-Za-z]|[IVX]+)\.$", text):
-            next_text = clean_text(elements[i + 1].get_text())
+        if BROKEN_HEADING.match(text):
+            _, next_text = next(blocks, (None, ""))
             text = text + " " + next_text
-            i += 1
 
         # Detect section heading
         if is_section_heading(text):
 
-            # Save previous section block
+            # Emit previous section block
             if buffer:
-                records.append({
+                yield {
                     "section_id": current_section_id,
                     "title": current_title,
                     "text": " ".join(buffer).strip()
-                })
+                }
                 buffer = []
 
             prefix, title = text.split(".", 1)
@@ -115,14 +287,10 @@ def parse_html_to_structured(html):
         else:
             buffer.append(text)
 
-        i += 1
-
-    # Save final section
+    # Emit final section
     if buffer:
-        records.append({
+        yield {
             "section_id": current_section_id,
             "title": current_title,
             "text": " ".join(buffer).strip()
-        })
-
-    return records
+        }
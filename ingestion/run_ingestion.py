@@ -1,9 +1,11 @@
+import sys
 import yaml
 import json
 import os
 
 from ingestion.fetch_doc import fetch_google_doc_html
-from ingestion.normalize import parse_html_to_structured
+from ingestion.normalize import stream_html_to_structured
+from retrieval.namespaces import selected_documents, namespace_paths
 
 
 def load_config():
@@ -23,22 +25,36 @@ def save_json(data, path, filename):
     print("✅ Structured JSON saved:", file_path)
 
 
-def main():
-
-    config = load_config()
+def ingest_document(doc_id, doc_url, paths):
 
-    doc_url = config["google_doc_url"]
-    raw_path = config["paths"]["raw_data"]
-    processed_path = config["paths"]["processed_data"]
+    if not doc_url:
+        print(f"❌ No google_doc_url configured for {doc_id}")
+        return
 
-    print("\n📥 Fetching Google Doc HTML...")
-    html = fetch_google_doc_html(doc_url, raw_path)
+    print(f"\n📥 Fetching Google Doc HTML ({doc_id})...")
+    fetch_google_doc_html(doc_url, paths["raw"])
 
     print("🧠 Normalizing HTML into structured JSON (section-based)...")
-    structured_data = parse_html_to_structured(html)
+    structured_data = [
+        dict(section, doc_id=doc_id)
+        for section in stream_html_to_structured(os.path.join(paths["raw"], "raw_doc.html"))
+    ]
 
     print("💾 Saving structured JSON...")
-    save_json(structured_data, processed_path, "structured_doc.json")
+    save_json(
+        structured_data,
+        os.path.dirname(paths["structured"]),
+        os.path.basename(paths["structured"])
+    )
+
+
+def main():
+
+    config = load_config()
+
+    # One structured file per document (--doc <doc_id> to pick some)
+    for doc_id, doc_url in selected_documents(config, sys.argv[1:]):
+        ingest_document(doc_id, doc_url, namespace_paths(config, doc_id))
 
     print("\n✅ INGESTION + NORMALIZATION COMPLETED")
 
@@ -0,0 +1,210 @@
+"""
+Normalize → chunk → embed in one streaming pass per document.
+
+Each stage is a generator running in its own thread, joined by
+bounded queues, so HTML parsing, chunking and embedding overlap and
+memory stays flat (apart from the FAISS index itself). Sections and
+chunks are written as JSONL; vectors and metadata rows are added to
+the index as each batch is embedded.
+
+Usage:
+    python -m pipeline.run_pipeline
+    python -m pipeline.run_pipeline --fetch --doc handbook_emea
+"""
+
+import os
+import time
+import argparse
+from contextlib import closing
+
+import yaml
+
+from ingestion.fetch_doc import fetch_google_doc_html
+from ingestion.normalize import stream_html_to_structured
+from chunking.semantic_chunker import chunk_section
+from chunking.inverted_index import InvertedIndexBuilder, save_inverted_index
+from embeddings.embedder import EmbeddingModel
+from embeddings.indexer import StreamingIndexBuilder, StableIds, content_hash, embed_chunks
+from embeddings.metadata_store import MetadataStore, MetadataWriter
+from embeddings.vector_store import FAISSStore
+from pipeline.stream import tee_jsonl, threaded, batched, jsonl_path, jsonl_to_json
+from retrieval.namespaces import selected_documents, namespace_paths
+
+
+def load_config():
+    with open("config/config.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def make_chunker(config):
+    """
+    section, doc_id → chunks, per chunking.strategy
+    """
+
+    chunk_cfg = config["chunking"]
+
+    if chunk_cfg.get("strategy", "tokenizer") == "tokenizer":
+        from chunking.token_chunker import TokenChunker
+
+        chunker = TokenChunker(
+            config["embedding"]["model_name"],
+            max_tokens=chunk_cfg.get("tokenizer_max_tokens"),
+            overlap_tokens=chunk_cfg.get("tokenizer_overlap", 32)
+        )
+
+        return chunker.chunk_section
+
+    return lambda section, doc_id: chunk_section(
+        section, chunk_cfg["max_tokens"], chunk_cfg["overlap_tokens"], doc_id=doc_id
+    )
+
+
+# ---------- STAGES ----------
+
+def sections_stage(doc_id, raw_file):
+    for section in stream_html_to_structured(raw_file):
+        yield dict(section, doc_id=doc_id)
+
+
+def chunks_stage(sections, chunker, doc_id):
+    for section in sections:
+        yield from chunker(section, doc_id)
+
+
+def previous_chunk_index(metadata_path):
+    """
+    (chunk_id, id) rows of the current index, so a rebuild keeps ids
+    """
+
+    if not os.path.exists(metadata_path):
+        return []
+
+    try:
+        store = MetadataStore.open(metadata_path)
+        rows = store.chunk_index()
+        store.close()
+        return rows
+
+    except Exception as e:
+        print("⚠ Could not read previous metadata — assigning fresh ids")
+        print(e)
+        return []
+
+
+def run_document(doc_id, doc_url, paths, config, chunker, embedder, fetch=False):
+
+    pipe_cfg = config.get("pipeline", {})
+    queue_size = pipe_cfg.get("queue_size", 256)
+    batch_size = pipe_cfg.get("batch_size", 64)
+
+    if fetch:
+        print(f"\n📥 Fetching Google Doc HTML ({doc_id})...")
+        fetch_google_doc_html(doc_url, paths["raw"])
+
+    raw_file = os.path.join(paths["raw"], "raw_doc.html")
+
+    print(f"\n🚰 Streaming {raw_file} → {doc_id} index...")
+    start = time.perf_counter()
+
+    sections = tee_jsonl(sections_stage(doc_id, raw_file), jsonl_path(paths["structured"]))
+    sections = threaded(sections, queue_size, "normalize")
+
+    chunks = tee_jsonl(chunks_stage(sections, chunker, doc_id), jsonl_path(paths["chunks"]))
+    chunks = threaded(chunks, queue_size, "chunk")
+
+    index_builder = StreamingIndexBuilder(
+        config.get("index", {}),
+        train_size=pipe_cfg.get("train_size", 20000)
+    )
+    sparse = InvertedIndexBuilder()
+
+    # Same stable ids as run_embedding's incremental update
+    ids = StableIds(previous_chunk_index(paths["vector_metadata"]))
+    count = 0
+
+    # closing(): a failure here also stops the stage threads
+    with closing(chunks), MetadataWriter(paths["vector_metadata"]) as metadata:
+
+        for batch in batched(chunks, batch_size):
+
+            batch = [c for c in batch if c["text"].strip()]
+
+            if not batch:
+                continue
+
+            for chunk in batch:
+                ids.assign(chunk)
+                chunk["content_hash"] = content_hash(chunk["text"])
+                count += 1
+
+                sparse.add(chunk)
+
+            index_builder.add(embed_chunks(embedder, batch), [c["id"] for c in batch])
+            metadata.append(batch)
+
+            elapsed = time.perf_counter() - start
+            print(f"\r⚡ {count} chunks embedded ({count / elapsed:.0f}/s)", end="", flush=True)
+
+        print()
+
+        index = index_builder.finish()
+
+        if index is None:
+            raise ValueError(f"No chunks produced for {doc_id}")
+
+        # Index first, metadata swapped in on leaving the block
+        print("💾 Saving FAISS index...")
+        FAISSStore.save_index(index, paths["vector_index"])
+
+        print("💾 Saving sparse index...")
+        save_inverted_index(sparse.build(), paths["sparse_index"])
+
+    # run_embedding, the retriever fallback and index_report read the JSON files
+    print("💾 Writing structured / chunk JSON...")
+    jsonl_to_json(jsonl_path(paths["structured"]), paths["structured"])
+    jsonl_to_json(jsonl_path(paths["chunks"]), paths["chunks"])
+
+    print(
+        f"✅ {doc_id}: {count} chunks indexed ({ids.reused} kept their ids) "
+        f"in {time.perf_counter() - start:.1f} s"
+    )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Streaming normalize → chunk → embed pipeline")
+    parser.add_argument("--fetch", action="store_true", help="download the Google Doc first")
+    parser.add_argument("--doc", action="append", default=[], help="only this doc_id (repeatable)")
+    args = parser.parse_args()
+
+    config = load_config()
+
+    argv = [arg for doc_id in args.doc for arg in ("--doc", doc_id)]
+
+    chunker = make_chunker(config)
+
+    embedder = EmbeddingModel.from_config(config["embedding"], verbose=False)
+
+    for doc_id, doc_url in selected_documents(config, argv):
+        run_document(
+            doc_id,
+            doc_url,
+            namespace_paths(config, doc_id),
+            config,
+            chunker,
+            embedder,
+            fetch=args.fetch
+        )
+
+    print("\n✅ STREAMING PIPELINE COMPLETED")
+
+    # The rebuilt index invalidated the stored answers; refresh them
+    if config.get("precomputed", {}).get("build_on_index", False):
+        from rag.precompute_answers import build_all
+
+        print("\n📚 Precomputing canonical answers...")
+        build_all([doc_id for doc_id, _ in selected_documents(config, argv)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import json
+import queue
+import threading
+
+
+# ---------- JSONL ----------
+
+def jsonl_path(json_path):
+    return os.path.splitext(json_path)[0] + ".jsonl"
+
+
+def iter_jsonl(path):
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def tee_jsonl(records, path):
+    """
+    Pass records through while writing one JSON object per line.
+    The file replaces `path` only once the stream is complete.
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            yield record
+
+    os.replace(tmp_path, path)
+
+
+def jsonl_to_json(path, json_path):
+    """
+    Rewrite a JSONL file as the indented JSON array the step-by-step
+    scripts produce, one record at a time (never the whole list in memory)
+    """
+
+    tmp_path = json_path + ".tmp"
+    count = 0
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+
+        for record in iter_jsonl(path):
+            body = json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            f.write(("," if count else "") + "\n  " + body)
+            count += 1
+
+        f.write("\n]" if count else "]")
+
+    os.replace(tmp_path, json_path)
+
+    return count
+
+
+# ---------- STAGES ----------
+
+class StageError:
+
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+
+def threaded(records, maxsize, name):
+    """
+    Run a generator stage in its own thread, handing records over
+    through a bounded queue. The producer blocks when the consumer
+    falls behind, so at most `maxsize` records are in flight. If the
+    consumer stops (it raised, or closed the generator) the producer
+    stops too instead of waiting on a full queue forever.
+    """
+
+    handoff = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        # False once the consumer has gone away
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def produce():
+        try:
+            for record in records:
+                if not put(record):
+                    break
+            else:
+                put(_DONE)
+
+        except BaseException as e:
+            put(StageError(e))
+
+        finally:
+            # Also stops an upstream threaded() stage
+            if hasattr(records, "close"):
+                records.close()
+
+    threading.Thread(target=produce, name=f"pipeline-{name}", daemon=True).start()
+
+    try:
+        while True:
+
+            record = handoff.get()
+
+            if record is _DONE:
+                return
+
+            if isinstance(record, StageError):
+                raise record.error
+
+            yield record
+
+    finally:
+        stop.set()
+
+
+def batched(records, size):
+
+    batch = []
+
+    for record in records:
+        batch.append(record)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
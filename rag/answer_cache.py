@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def file_version(paths):
+    """
+    Fingerprint of the files an answer depends on.
+    Any rebuild of the index or metadata changes it.
+    """
+
+    version = []
+
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            version.append([path, stat.st_mtime_ns, stat.st_size])
+        else:
+            version.append([path, None, None])
+
+    return version
+
+
+def normalize(vector):
+    vector = np.asarray(vector, dtype="float32").reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by query embedding.
+    A lookup hits when a cached query lies within
+    max_distance (cosine) of the new one and was asked
+    against the same scope (set of document namespaces).
+
+    Entries are dropped when a watched index file changes; the files
+    are stat'ed at most once per check_interval_s, and each namespace
+    registers its own files with watch() when it loads.
+    """
+
+    def __init__(
+        self,
+        watch_paths,
+        max_distance=0.08,
+        max_entries=512,
+        ttl_seconds=3600,
+        persist_path=None,
+        check_interval_s=1.0
+    ):
+
+        self.watch_paths = list(watch_paths)
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.check_interval_s = check_interval_s
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        # Stacked vectors of self.entries, rebuilt lazily after changes
+        self._keys = []
+        self._scopes = None
+        self._matrix = None
+
+        self.version = file_version(self.watch_paths)
+        self.checked_at = time.monotonic()
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    # ---------- LOOKUP ----------
+
+    def lookup(self, query_vector, scope=None):
+        """
+        Returns (answer, sources) for a near-duplicate query, else None
+        """
+
+        query_vector = normalize(query_vector)
+
+        with self.lock:
+
+            self._check_version()
+            self._expire()
+
+            if not self.entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._keys = list(self.entries.keys())
+                self._matrix = np.stack(
+                    [self.entries[k]["vector"] for k in self._keys]
+                )
+                self._scopes = np.array(
+                    [self.entries[k].get("scope") or "" for k in self._keys]
+                )
+
+            similarities = self._matrix @ query_vector
+            similarities[self._scopes != (scope or "")] = -1.0
+            best = int(np.argmax(similarities))
+
+            if 1.0 - float(similarities[best]) > self.max_distance:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            entry = self.entries[key]
+            self.entries.move_to_end(key)
+
+            self.hits += 1
+
+            return entry["answer"], entry["sources"]
+
+    def put(self, query, query_vector, answer, sources, scope=None):
+
+        key = " ".join(query.lower().split())
+
+        if scope:
+            key = f"{scope}|{key}"
+
+        with self.lock:
+
+            self._check_version()
+
+            self.entries[key] = {
+                "vector": normalize(query_vector),
+                "answer": answer,
+                "sources": sources,
+                "scope": scope,
+                "created_at": time.time()
+            }
+            self.entries.move_to_end(key)
+
+            # LRU eviction
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+            self._matrix = None
+
+    def watch(self, paths):
+        """
+        Also drop entries when these files change (a namespace's index
+        and metadata, registered as it loads)
+        """
+
+        with self.lock:
+
+            new = [path for path in paths if path not in self.watch_paths]
+
+            if not new:
+                return
+
+            self.watch_paths.extend(new)
+            self.version = self.version + file_version(new)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self._matrix = None
+
+    def stats(self):
+        total = self.hits + self.misses
+
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    # ---------- EVICTION ----------
+
+    def _check_version(self):
+
+        now = time.monotonic()
+
+        if now - self.checked_at < self.check_interval_s:
+            return
+
+        self.checked_at = now
+
+        version = file_version(self.watch_paths)
+
+        if version != self.version:
+            print("♻ Index changed — clearing answer cache")
+            self.entries.clear()
+            self._matrix = None
+            self.version = version
+
+    def _expire(self):
+
+        if not self.ttl_seconds:
+            return
+
+        cutoff = time.time() - self.ttl_seconds
+
+        expired = [k for k, e in self.entries.items() if e["created_at"] < cutoff]
+
+        for key in expired:
+            del self.entries[key]
+
+        if expired:
+            self._matrix = None
+
+    # ---------- PERSISTENCE ----------
+
+    def save(self):
+
+        if not self.persist_path:
+            return
+
+        with self.lock:
+
+            keys = list(self.entries.keys())
+
+            meta = {
+                "version": self.version,
+                "entries": [
+                    {
+                        "key": k,
+                        "answer": self.entries[k]["answer"],
+                        "sources": self.entries[k]["sources"],
+                        "scope": self.entries[k].get("scope"),
+                        "created_at": self.entries[k]["created_at"]
+                    }
+                    for k in keys
+                ]
+            }
+
+            vectors = (
+                np.stack([self.entries[k]["vector"] for k in keys])
+                if keys else np.zeros((0, 0), dtype="float32")
+            )
+
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+
+        with open(self.persist_path, "wb") as f:
+            np.savez(f, vectors=vectors, meta=np.array(json.dumps(meta)))
+
+    def load(self):
+
+        if not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                meta = json.loads(str(data["meta"]))
+
+        except Exception as e:
+            print("⚠ Could not read answer cache — starting empty")
+            print(e)
+            return
+
+        # Compare the files the saved entries were built from, which
+        # may include namespaces that have not been loaded yet
+        saved_paths = [path for path, _, _ in meta["version"]]
+
+        if file_version(saved_paths) != meta["version"]:
+            print("♻ Persisted answer cache is stale — discarding")
+            return
+
+        new = [path for path in saved_paths if path not in self.watch_paths]
+        self.watch_paths.extend(new)
+        self.version = self.version + file_version(new)
+
+        for vector, entry in zip(vectors, meta["entries"]):
+            self.entries[entry["key"]] = {
+                "vector": vector.astype("float32"),
+                "answer": entry["answer"],
+                "sources": entry["sources"],
+                "scope": entry.get("scope"),
+                "created_at": entry["created_at"]
+            }
+
+        self._expire()
+
+        print(f"✅ Answer cache restored ({len(self.entries)} entries)")
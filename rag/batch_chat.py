@@ -0,0 +1,157 @@
+"""
+Answer a file of questions in one batch (e.g. a nightly handbook audit).
+
+Questions come from a text file (one per line, # comments), a JSON
+list, or JSONL; strings or objects with a "question" / "query" field
+(benchmarks/golden_questions.json works as is). Answers are written as
+NDJSON in completion order, each with the `index` of its question.
+
+By default the questions go to a running server's POST /chat/batch.
+--local answers them in this process with the same pipeline. Pass
+--sequential to time the old one-/chat-per-question loop instead.
+
+Usage:
+    python -m rag.batch_chat questions.txt --out answers.ndjson
+    python -m rag.batch_chat benchmarks/golden_questions.json --url http://localhost:8000 --concurrency 8
+    python -m rag.batch_chat questions.txt --local --doc employee_handbook_v2
+"""
+
+import json
+import time
+import asyncio
+import argparse
+
+
+def load_questions(path):
+
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    if path.endswith(".json"):
+        items = json.loads(text)
+    elif path.endswith(".jsonl"):
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        items = [
+            line.strip()
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+    return [
+        item if isinstance(item, str) else item.get("question") or item.get("query")
+        for item in items
+    ]
+
+
+# ---------- SERVER ----------
+
+async def run_remote(questions, args, out):
+
+    import httpx
+
+    payload = {"queries": questions, "doc_id": args.doc, "concurrency": args.concurrency}
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+
+        if args.sequential:
+            for index, query in enumerate(questions):
+                response = await client.post("/chat", json={"query": query, "doc_id": args.doc})
+                response.raise_for_status()
+                out(dict(response.json(), index=index, query=query))
+            return
+
+        async with client.stream("POST", "/chat/batch", json=payload) as response:
+            response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                if line.strip():
+                    out(json.loads(line))
+
+
+# ---------- IN PROCESS ----------
+
+async def run_local(questions, args, out):
+
+    from rag.rag_pipeline import RAGPipeline, NOT_FOUND_ANSWER
+
+    rag = RAGPipeline()
+    rag.warm_up()
+
+    concurrency = args.concurrency or rag.config.get("server", {}).get("batch_concurrency", 4)
+
+    def line(index, answer, chunks):
+        return {
+            "index": index,
+            "query": questions[index],
+            "answer": answer if answer and answer.strip() else NOT_FOUND_ANSWER,
+            "sources": [
+                {key: chunk.get(key) for key in ("section_id", "title", "chunk_id", "score", "doc_id")}
+                for chunk in chunks or []
+            ]
+        }
+
+    try:
+        if args.sequential:
+            for index, query in enumerate(questions):
+                answer, chunks = await rag.aask(query, args.doc)
+                out(line(index, answer, chunks))
+            return
+
+        async for index, answer, chunks in rag.aask_batch(questions, args.doc, concurrency):
+            out(line(index, answer, chunks))
+
+    finally:
+        rag.executor.shutdown(wait=False)
+
+        if rag.batcher is not None:
+            rag.batcher.close()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Batch question answering (NDJSON out)")
+    parser.add_argument("questions", help=".txt (one per line), .json list or .jsonl")
+    parser.add_argument("--out", default="batch_answers.ndjson")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--local", action="store_true", help="run the pipeline in this process")
+    parser.add_argument("--doc", default=None, help="doc_id to ask (default document if omitted)")
+    parser.add_argument("--concurrency", type=int, default=None, help="parallel generations")
+    parser.add_argument("--sequential", action="store_true", help="one /chat call per question, for comparison")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    print(f"📚 {len(questions)} questions from {args.questions}")
+
+    start = time.perf_counter()
+    answered = 0
+
+    with open(args.out, "w", encoding="utf-8") as f:
+
+        def out(record):
+            nonlocal answered
+
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+            if "index" in record:
+                answered += 1
+                print(f"✅ [{record['index']}] {record['query']}")
+            elif "error" in record:
+                print("❌", record["error"])
+
+        runner = run_local if args.local else run_remote
+        asyncio.run(runner(questions, args, out))
+
+    seconds = time.perf_counter() - start
+
+    print(
+        f"\n⏱ {answered}/{len(questions)} answered in {seconds:.1f} s "
+        f"({answered / seconds:.2f} questions/s{', sequential' if args.sequential else ''})"
+    )
+    print("💾 Answers saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
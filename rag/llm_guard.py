@@ -0,0 +1,630 @@
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from rag.metrics import metrics
+
+
+# HTTP statuses worth retrying: throttling and transient server faults
+RATE_LIMIT_CODES = {429}
+SERVER_CODES = {500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised without calling the provider while it is throttling us
+    """
+
+    def __init__(self, retry_in):
+        super().__init__(f"LLM circuit open — retry in {retry_in:.0f} s")
+        self.retry_in = retry_in
+
+
+# ---------- ERROR CLASSIFICATION ----------
+
+def error_code(e):
+    """
+    HTTP status of a provider error (google-genai APIError.code,
+    or a status_code / code attribute on other clients)
+    """
+
+    for attr in ("code", "status_code"):
+        code = getattr(e, attr, None)
+
+        if isinstance(code, int):
+            return code
+
+    return None
+
+
+def classify_error(e):
+    """
+    "circuit_open" | "rate_limit" | "server" | "context_length" | "other"
+    """
+
+    if isinstance(e, CircuitOpenError):
+        return "circuit_open"
+
+    code = error_code(e)
+
+    if code in RATE_LIMIT_CODES or getattr(e, "status", None) == "RESOURCE_EXHAUSTED":
+        return "rate_limit"
+
+    if code in SERVER_CODES or isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+        return "server"
+
+    # Over-long prompts come back as a plain 400 INVALID_ARGUMENT
+    if code == 400 and "token" in str(getattr(e, "message", "") or e).lower():
+        return "context_length"
+
+    return "other"
+
+
+def retry_delay(e):
+    """
+    Server-suggested wait in seconds (google.rpc.RetryInfo), if any
+    """
+
+    details = getattr(e, "details", None)
+
+    if not isinstance(details, dict):
+        return None
+
+    for item in details.get("error", {}).get("details", []):
+        if str(item.get("@type", "")).endswith("RetryInfo"):
+            try:
+                return float(str(item.get("retryDelay", "")).rstrip("s"))
+            except ValueError:
+                return None
+
+    return None
+
+
+def prompt_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+# ---------- CIRCUIT BREAKER ----------
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive throttling / server
+    errors and fails fast for `reset_seconds` (or the provider's
+    suggested delay, if longer). Then one probe call is let through:
+    success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.trips = 0
+
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+
+        if self.failures < self.failure_threshold:
+            return "closed"
+
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError while open; returns True if this call
+        is the half-open probe
+        """
+
+        with self.lock:
+
+            if self.failures < self.failure_threshold:
+                return False
+
+            now = time.monotonic()
+
+            if now < self.open_until or self.probing:
+                raise CircuitOpenError(max(self.open_until - now, 0.0))
+
+            # Half-open: this caller is the probe
+            self.probing = True
+            return True
+
+    def abandoned(self, probe):
+        """
+        The call ended without an answer (cancelled, generator closed):
+        let the next caller probe instead
+        """
+
+        if probe:
+            with self.lock:
+                self.probing = False
+
+    def success(self):
+
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+
+    def failure(self, delay_hint=None):
+
+        with self.lock:
+
+            self.failures += 1
+            self.probing = False
+
+            if self.failures >= self.failure_threshold:
+
+                wait = max(self.reset_seconds, delay_hint or 0.0)
+                self.open_until = time.monotonic() + wait
+
+                if self.failures == self.failure_threshold:
+                    self.trips += 1
+                    print(f"⚠ LLM circuit open for {wait:.0f} s")
+
+
+# ---------- SHARED STREAMS ----------
+
+class SharedStream:
+    """
+    Chunks of one upstream stream, replayed to every subscriber
+    (late joiners start from the first chunk)
+    """
+
+    def __init__(self, condition):
+        self.condition = condition
+        self.chunks = []
+        self.done = False
+        self.error = None
+
+
+# ---------- GUARD ----------
+
+class LLMGuard:
+    """
+    Every upstream LLM call goes through here:
+
+    - identical in-flight prompts share one call (single-flight);
+      streamed calls fan their chunks out to every subscriber
+    - at most `max_concurrent` calls are in flight at once
+    - rate-limit / server errors are retried with exponential
+      backoff and full jitter
+    - a circuit breaker fails fast while the provider keeps throttling
+
+    Async callers (API server) and sync callers (Streamlit) have
+    separate semaphores of the same size.
+    """
+
+    def __init__(
+        self,
+        max_concurrent=4,
+        max_retries=3,
+        base_delay=0.5,
+        max_delay=8.0,
+        failure_threshold=5,
+        reset_seconds=30.0,
+        single_flight=True
+    ):
+
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.single_flight = single_flight
+
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+
+        self.async_slots = asyncio.Semaphore(max_concurrent)
+        self.sync_slots = threading.BoundedSemaphore(max_concurrent)
+
+        # prompt key → Task / Future / SharedStream shared by every waiter
+        self.async_inflight = {}
+        self.inflight = {}
+        self.async_streams = {}
+        self.streams = {}
+        self.inflight_lock = threading.Lock()
+
+        # The loop only keeps weak references to tasks: hold the stream pumps
+        self.pumps = set()
+
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+
+    def backoff(self, attempt, hint=None):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(delay, hint or 0.0)
+
+    def should_retry(self, e, attempt):
+        """
+        Record the failure; returns the delay before the next attempt,
+        or None to give up
+        """
+
+        kind = classify_error(e)
+
+        if kind not in ("rate_limit", "server"):
+            # The provider answered, so it is not throttling us
+            self.breaker.success()
+            return None
+
+        hint = retry_delay(e)
+        self.breaker.failure(hint)
+
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+
+        self.retries += 1
+        metrics.llm_retry(kind)
+
+        return self.backoff(attempt, hint)
+
+    # ---------- ASYNC ----------
+
+    async def acall(self, call, key=None):
+        """
+        Await call() (a coroutine factory) under the guard.
+        Callers passing the same key while it runs get its result.
+        """
+
+        if key is None or not self.single_flight:
+            return await self._acall(call)
+
+        # Only touched from the event loop thread: no lock needed
+        shared = self.async_inflight.get(key)
+
+        if shared is None:
+            shared = asyncio.ensure_future(self._acall(call))
+            self.async_inflight[key] = shared
+            shared.add_done_callback(lambda task: self._async_done(key, task))
+        else:
+            self.coalesced += 1
+            metrics.llm_coalesced()
+
+        # One client disconnecting must not cancel everyone else's call
+        return await asyncio.shield(shared)
+
+    def _async_done(self, key, task):
+
+        self.async_inflight.pop(key, None)
+
+        # Mark the error as seen even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def _acall(self, call):
+
+        attempt = 0
+
+        while True:
+
+            probe = self.breaker.before_call()
+
+            try:
+                async with self.async_slots:
+                    self.calls += 1
+                    result = await call()
+
+            except Exception as e:
+                delay = self.should_retry(e, attempt)
+
+                if delay is None:
+                    raise
+
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            except BaseException:
+                self.breaker.abandoned(probe)
+                raise
+
+            self.breaker.success()
+            return result
+
+    async def astream(self, open_stream, key=None):
+        """
+        Async generator over the chunks of open_stream() (awaitable
+        returning an async iterator). Callers passing the same key
+        while it runs share one upstream stream.
+        """
+
+        if key is None or not self.single_flight:
+            async for chunk in self._astream(open_stream):
+                yield chunk
+            return
+
+        # Only touched from the event loop thread: no lock needed
+        shared = self.async_streams.get(key)
+
+        if shared is None:
+            shared = SharedStream(asyncio.Condition())
+            self.async_streams[key] = shared
+            # Runs to the end even if its first subscriber disconnects
+            pump = asyncio.ensure_future(self._apump(key, shared, open_stream))
+            self.pumps.add(pump)
+            pump.add_done_callback(self.pumps.discard)
+        else:
+            self.coalesced += 1
+            metrics.llm_coalesced()
+
+        seen = 0
+
+        while True:
+
+            async with shared.condition:
+                await shared.condition.wait_for(
+                    lambda: len(shared.chunks) > seen or shared.done
+                )
+                pending = shared.chunks[seen:]
+                finished = shared.done
+
+            for chunk in pending:
+                yield chunk
+
+            seen += len(pending)
+
+            if finished:
+                if shared.error is not None:
+                    raise shared.error
+                return
+
+    async def _apump(self, key, shared, open_stream):
+
+        try:
+            async for chunk in self._astream(open_stream):
+                async with shared.condition:
+                    shared.chunks.append(chunk)
+                    shared.condition.notify_all()
+
+        except asyncio.CancelledError:
+            shared.error = RuntimeError("LLM stream cancelled")
+
+        except Exception as e:
+            shared.error = e
+
+        finally:
+            # Later identical prompts start a fresh call
+            self.async_streams.pop(key, None)
+
+            async with shared.condition:
+                shared.done = True
+                shared.condition.notify_all()
+
+    async def _astream(self, open_stream):
+        """
+        Retried only until the first chunk arrives;
+        the slot is held until the stream ends
+        """
+
+        attempt = 0
+
+        while True:
+
+            probe = self.breaker.before_call()
+            started = False
+
+            try:
+                async with self.async_slots:
+                    self.calls += 1
+
+                    async for chunk in await open_stream():
+
+                        if not started:
+                            started = True
+                            self.breaker.success()
+
+                        yield chunk
+
+                if not started:
+                    self.breaker.success()
+
+                return
+
+            except Exception as e:
+                delay = None if started else self.should_retry(e, attempt)
+
+                if delay is None:
+                    raise
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+            except BaseException:
+                # Client went away before the first chunk
+                if not started:
+                    self.breaker.abandoned(probe)
+                raise
+
+    # ---------- SYNC ----------
+
+    def call(self, call, key=None):
+        """
+        Blocking counterpart of acall() for non-async callers
+        """
+
+        if key is None or not self.single_flight:
+            return self._call(call)
+
+        with self.inflight_lock:
+            shared = self.inflight.get(key)
+
+            if shared is None:
+                shared = Future()
+                self.inflight[key] = shared
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            self.coalesced += 1
+            metrics.llm_coalesced()
+            return shared.result()
+
+        try:
+            result = self._call(call)
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            with self.inflight_lock:
+                self.inflight.pop(key, None)
+
+    def _call(self, call):
+
+        attempt = 0
+
+        while True:
+
+            probe = self.breaker.before_call()
+
+            try:
+                with self.sync_slots:
+                    self.calls += 1
+                    result = call()
+
+            except Exception as e:
+                delay = self.should_retry(e, attempt)
+
+                if delay is None:
+                    raise
+
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            except BaseException:
+                self.breaker.abandoned(probe)
+                raise
+
+            self.breaker.success()
+            return result
+
+    def stream(self, open_stream, key=None):
+        """
+        Blocking counterpart of astream(). A shared stream is read
+        upstream by a background thread, so one subscriber stopping
+        early does not stall the others.
+        """
+
+        if key is None or not self.single_flight:
+            yield from self._stream(open_stream)
+            return
+
+        with self.inflight_lock:
+            shared = self.streams.get(key)
+            owner = shared is None
+
+            if owner:
+                shared = SharedStream(threading.Condition())
+                self.streams[key] = shared
+
+        if owner:
+            threading.Thread(
+                target=self._pump,
+                args=(key, shared, open_stream),
+                name="llm-stream",
+                daemon=True
+            ).start()
+        else:
+            self.coalesced += 1
+            metrics.llm_coalesced()
+
+        seen = 0
+
+        while True:
+
+            with shared.condition:
+                shared.condition.wait_for(lambda: len(shared.chunks) > seen or shared.done)
+                pending = shared.chunks[seen:]
+                finished = shared.done
+
+            yield from pending
+
+            seen += len(pending)
+
+            if finished:
+                if shared.error is not None:
+                    raise shared.error
+                return
+
+    def _pump(self, key, shared, open_stream):
+
+        try:
+            for chunk in self._stream(open_stream):
+                with shared.condition:
+                    shared.chunks.append(chunk)
+                    shared.condition.notify_all()
+
+        except Exception as e:
+            shared.error = e
+
+        finally:
+            with self.inflight_lock:
+                self.streams.pop(key, None)
+
+            with shared.condition:
+                shared.done = True
+                shared.condition.notify_all()
+
+    def _stream(self, open_stream):
+
+        attempt = 0
+
+        while True:
+
+            probe = self.breaker.before_call()
+            started = False
+
+            try:
+                with self.sync_slots:
+                    self.calls += 1
+
+                    for chunk in open_stream():
+
+                        if not started:
+                            started = True
+                            self.breaker.success()
+
+                        yield chunk
+
+                if not started:
+                    self.breaker.success()
+
+                return
+
+            except Exception as e:
+                delay = None if started else self.should_retry(e, attempt)
+
+                if delay is None:
+                    raise
+
+                attempt += 1
+                time.sleep(delay)
+
+            except BaseException:
+                if not started:
+                    self.breaker.abandoned(probe)
+                raise
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "in_flight_prompts": (
+                len(self.inflight) + len(self.async_inflight)
+                + len(self.streams) + len(self.async_streams)
+            ),
+            "circuit": self.breaker.state,
+            "circuit_trips": self.breaker.trips
+        }
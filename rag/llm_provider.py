@@ -0,0 +1,260 @@
+import os
+import re
+import time
+import random
+import asyncio
+
+
+# "[Source 1] Section IV.A.1 — Title" header + text, as written by PromptBuilder.format_span
+SOURCE_BLOCK = re.compile(
+    r"\[Source \d+\] Section (?P<section>.+?) — (?P<title>.+?)\n(?P<text>.*?)(?=\n\[Source \d+\]|\n\s*QUESTION:|\Z)",
+    re.S
+)
+
+
+class Usage:
+    """
+    Same field names as google-genai's usage_metadata
+    """
+
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class LLMResponse:
+
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeProviderError(Exception):
+    """
+    Injected failure; classify_error() treats it like a Gemini 503
+    """
+
+    def __init__(self, code=503):
+        super().__init__(f"Fake LLM injected error ({code})")
+        self.code = code
+
+
+# ---------- INTERFACE ----------
+
+class LLMProvider:
+    """
+    What RAGPipeline needs from an LLM backend.
+
+    generate / agenerate return an object with .text and
+    .usage_metadata; stream yields such objects, astream is a
+    coroutine returning an async iterator of them (the shape
+    LLMGuard.astream expects).
+    """
+
+    name = "base"
+    model_name = None
+
+    def generate(self, prompt):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt):
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        raise NotImplementedError
+
+    async def astream(self, prompt):
+        raise NotImplementedError
+
+
+# ---------- GEMINI ----------
+
+class GeminiProvider(LLMProvider):
+
+    name = "gemini"
+
+    def __init__(self, model_name, api_key=None):
+
+        from google import genai
+
+        self.model_name = model_name
+        self.client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt):
+        return self.client.models.generate_content(model=self.model_name, contents=prompt)
+
+    async def agenerate(self, prompt):
+        return await self.client.aio.models.generate_content(model=self.model_name, contents=prompt)
+
+    def stream(self, prompt):
+        return self.client.models.generate_content_stream(model=self.model_name, contents=prompt)
+
+    async def astream(self, prompt):
+        return await self.client.aio.models.generate_content_stream(
+            model=self.model_name, contents=prompt
+        )
+
+
+# ---------- FAKE (OFFLINE) ----------
+
+class FakeProvider(LLMProvider):
+    """
+    Offline stand-in for load tests: no network, no quota.
+
+    The answer is built deterministically from the [Source n] blocks in
+    the prompt (title, first words, citation). Timing mimics a hosted
+    model: `latency_ms` (± `jitter_ms`) before the first token, then
+    `tokens_per_s` output tokens (words) per second. `error_rate` of
+    calls fail with a retryable 503.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms=800,
+        tokens_per_s=80,
+        jitter_ms=0,
+        error_rate=0.0,
+        max_sources=3,
+        words_per_source=30,
+        seed=0
+    ):
+
+        self.model_name = "fake-llm"
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.max_sources = max_sources
+        self.words_per_source = words_per_source
+
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def from_config(fake_config):
+        return FakeProvider(
+            latency_ms=fake_config.get("latency_ms", 800),
+            tokens_per_s=fake_config.get("tokens_per_s", 80),
+            jitter_ms=fake_config.get("jitter_ms", 0),
+            error_rate=fake_config.get("error_rate", 0.0),
+            max_sources=fake_config.get("max_sources", 3),
+            words_per_source=fake_config.get("words_per_source", 30),
+            seed=fake_config.get("seed", 0)
+        )
+
+    def answer(self, prompt):
+
+        lines = ["**Offline answer (fake LLM)**", ""]
+
+        for match in list(SOURCE_BLOCK.finditer(prompt))[:self.max_sources]:
+
+            words = match.group("text").split()
+            excerpt = " ".join(words[:self.words_per_source])
+
+            if len(words) > self.words_per_source:
+                excerpt += " …"
+
+            lines.append(
+                f"- **{match.group('title').strip()}**: {excerpt} "
+                f"(Section {match.group('section').strip()})"
+            )
+
+        if len(lines) == 2:
+            lines.append("- No context was provided.")
+
+        return "\n".join(lines)
+
+    def plan(self, prompt):
+        """
+        (answer words, first-token delay s, per-token delay s);
+        raises the injected error, if this call draws one
+        """
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise FakeProviderError()
+
+        words = self.answer(prompt).split(" ")
+
+        jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        first = max(self.latency_ms + jitter, 0.0) / 1000
+        per_token = 1 / self.tokens_per_s if self.tokens_per_s else 0.0
+
+        return words, first, per_token
+
+    def usage(self, prompt, words):
+        # ~4 characters per token, as for Gemini's English text
+        return Usage(len(prompt) // 4, len(words))
+
+    def generate(self, prompt):
+
+        words, first, per_token = self.plan(prompt)
+        time.sleep(first + per_token * len(words))
+
+        return LLMResponse(" ".join(words), self.usage(prompt, words))
+
+    async def agenerate(self, prompt):
+
+        words, first, per_token = self.plan(prompt)
+        await asyncio.sleep(first + per_token * len(words))
+
+        return LLMResponse(" ".join(words), self.usage(prompt, words))
+
+    def stream(self, prompt):
+
+        words, first, per_token = self.plan(prompt)
+        time.sleep(first)
+
+        for i, word in enumerate(words):
+            time.sleep(per_token)
+
+            last = i == len(words) - 1
+            yield LLMResponse(
+                word + ("" if last else " "),
+                self.usage(prompt, words) if last else None
+            )
+
+    async def astream(self, prompt):
+
+        words, first, per_token = self.plan(prompt)
+
+        async def chunks():
+            await asyncio.sleep(first)
+
+            for i, word in enumerate(words):
+                await asyncio.sleep(per_token)
+
+                last = i == len(words) - 1
+                yield LLMResponse(
+                    word + ("" if last else " "),
+                    self.usage(prompt, words) if last else None
+                )
+
+        return chunks()
+
+
+# ---------- FACTORY ----------
+
+PROVIDERS = ("gemini", "fake")
+
+
+def build_provider(config):
+    """
+    llm.provider from config.yaml; LLM_PROVIDER in the environment
+    overrides it (e.g. LLM_PROVIDER=fake for an offline load test)
+    """
+
+    llm_cfg = config.get("llm", {})
+    provider = os.getenv("LLM_PROVIDER") or llm_cfg.get("provider", "gemini")
+
+    if provider == "fake":
+        print("🧪 Using the offline fake LLM provider")
+        return FakeProvider.from_config(llm_cfg.get("fake", {}))
+
+    if provider == "gemini":
+        return GeminiProvider(
+            config["gemini"]["model_name"],
+            api_key=os.getenv("GEMINI_API_KEY")
+        )
+
+    raise ValueError(f"Unknown llm.provider: {provider} (expected one of {PROVIDERS})")
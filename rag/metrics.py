@@ -0,0 +1,206 @@
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+
+# Spans of the request being served (None outside a traced request)
+_trace = ContextVar("rag_trace", default=None)
+
+# Returned by span() when nothing would record it
+NULL_SPAN = nullcontext()
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Trace:
+    """
+    (stage, seconds) pairs recorded while serving one request
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def breakdown(self):
+        """
+        Milliseconds per stage; repeated stages are summed
+        """
+
+        totals = {}
+
+        for name, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds * 1000
+
+        return {name: round(ms, 2) for name, ms in totals.items()}
+
+    def server_timing(self):
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.breakdown().items())
+
+
+class Span:
+
+    __slots__ = ("metrics", "name", "trace", "start")
+
+    def __init__(self, metrics, name, trace):
+        self.metrics = metrics
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+
+        seconds = time.perf_counter() - self.start
+
+        if self.trace is not None:
+            self.trace.spans.append((self.name, seconds))
+
+        if self.metrics.enabled:
+            self.metrics.stage_seconds.labels(self.name).observe(seconds)
+
+        return False
+
+
+class Metrics:
+    """
+    Stage timings and counters for the serving path.
+
+    Stage spans feed Prometheus histograms (when enabled) and the
+    current request's Trace (when Server-Timing is on). With both off
+    a span is a shared no-op context manager.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.server_timing = False
+        self.registry = None
+
+    def configure(self, metrics_config):
+
+        self.server_timing = metrics_config.get("server_timing", True)
+
+        if not metrics_config.get("enabled", False) or self.registry is not None:
+            return
+
+        try:
+            from prometheus_client import CollectorRegistry, Counter, Histogram
+        except ImportError as e:
+            print("⚠ prometheus_client not installed — /metrics disabled")
+            print(e)
+            return
+
+        buckets = tuple(metrics_config.get("buckets") or DEFAULT_BUCKETS)
+
+        self.registry = CollectorRegistry()
+
+        self.stage_seconds = Histogram(
+            "rag_stage_seconds", "Time spent per pipeline stage",
+            ["stage"], buckets=buckets, registry=self.registry
+        )
+        self.request_seconds = Histogram(
+            "rag_request_seconds", "End-to-end request latency",
+            ["endpoint", "status"], buckets=buckets, registry=self.registry
+        )
+        self.cache_hits = Counter(
+            "rag_cache_hits_total", "Answer cache hits", ["cache"], registry=self.registry
+        )
+        self.cache_misses = Counter(
+            "rag_cache_misses_total", "Answer cache misses", ["cache"], registry=self.registry
+        )
+        self.llm_errors = Counter(
+            "rag_llm_errors_total", "Failed LLM calls", ["kind"], registry=self.registry
+        )
+        self.llm_tokens = Counter(
+            "rag_llm_tokens_total", "Billed LLM tokens", ["direction"], registry=self.registry
+        )
+        self.llm_retries = Counter(
+            "rag_llm_retries_total", "LLM calls retried after backoff", ["kind"], registry=self.registry
+        )
+        self.llm_coalesced_calls = Counter(
+            "rag_llm_coalesced_total", "Requests that shared an identical in-flight LLM call",
+            registry=self.registry
+        )
+
+        self.enabled = True
+
+    # ---------- SPANS ----------
+
+    def start_trace(self):
+        """
+        Begin collecting spans for the current request / task.
+        Returns (trace, token) — pass the token to end_trace().
+        """
+
+        trace = Trace()
+        return trace, _trace.set(trace)
+
+    def end_trace(self, token):
+        _trace.reset(token)
+
+    def current_trace(self):
+        return _trace.get()
+
+    def span(self, name):
+
+        trace = _trace.get()
+
+        if trace is None and not self.enabled:
+            return NULL_SPAN
+
+        return Span(self, name, trace)
+
+    # ---------- COUNTERS ----------
+
+    def cache_lookup(self, hit, cache="answer"):
+
+        if not self.enabled:
+            return
+
+        (self.cache_hits if hit else self.cache_misses).labels(cache).inc()
+
+    def llm_error(self, kind):
+
+        if self.enabled:
+            self.llm_errors.labels(kind).inc()
+
+    def llm_retry(self, kind):
+
+        if self.enabled:
+            self.llm_retries.labels(kind).inc()
+
+    def llm_coalesced(self):
+
+        if self.enabled:
+            self.llm_coalesced_calls.inc()
+
+    def llm_usage(self, input_tokens, output_tokens):
+
+        if not self.enabled:
+            return
+
+        self.llm_tokens.labels("input").inc(input_tokens or 0)
+        self.llm_tokens.labels("output").inc(output_tokens or 0)
+
+    def request(self, endpoint, status, seconds):
+
+        if self.enabled:
+            self.request_seconds.labels(endpoint, str(status)).observe(seconds)
+
+    # ---------- EXPOSITION ----------
+
+    def render(self):
+        """
+        (body, content_type) in the Prometheus text format
+        """
+
+        from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+
+# Shared by the pipeline, retriever, batcher and API server
+metrics = Metrics()
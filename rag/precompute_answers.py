@@ -0,0 +1,122 @@
+"""
+Precompute answers for the canonical questions (config/canonical_questions.yaml:
+recommended, example and follow-up questions) and store them next to
+each document's FAISS index. The server answers those queries from the
+store without retrieval or an LLM call, until the index is rebuilt.
+
+Runs after run_embedding / run_pipeline when precomputed.build_on_index
+is set; run it by hand otherwise. Calls the configured LLM provider.
+
+Usage:
+    python -m rag.precompute_answers
+    python -m rag.precompute_answers --doc handbook_emea --concurrency 8
+"""
+
+import time
+import asyncio
+import argparse
+
+from rag.answer_cache import file_version
+from rag.precomputed import canonical_queries, normalize_query, write_store
+from retrieval.namespaces import namespace_paths
+
+
+async def build_answers(rag, doc_id, queries, concurrency):
+
+    from rag.rag_pipeline import GENERATION_ERROR_ANSWERS
+
+    paths = namespace_paths(rag.config, doc_id)
+    watch_paths = [paths["vector_index"], paths["vector_metadata"]]
+
+    version = file_version(watch_paths)
+
+    entries = {}
+    failed = []
+
+    start = time.perf_counter()
+
+    # Vectorised retrieval, bounded parallel generation (as /chat/batch)
+    async for index, answer, chunks in rag.aask_batch(queries, doc_id, concurrency):
+
+        query = queries[index]
+
+        if not answer or not answer.strip() or answer in GENERATION_ERROR_ANSWERS:
+            failed.append(query)
+            print(f"❌ [{index}] {query}")
+            continue
+
+        entries[normalize_query(query)] = {
+            "query": query,
+            "answer": answer,
+            "sources": chunks
+        }
+
+    if file_version(watch_paths) != version:
+        print(f"⚠ {doc_id}: index changed while answering — not saving")
+        return False
+
+    write_store(
+        paths["precomputed_answers"],
+        version,
+        entries,
+        meta={"doc_id": doc_id, "llm": rag.llm.model_name, "failed": failed}
+    )
+
+    print(
+        f"💾 {doc_id}: {len(entries)}/{len(queries)} answers saved to "
+        f"{paths['precomputed_answers']} in {time.perf_counter() - start:.1f} s"
+    )
+
+    if failed:
+        print(f"⚠ {len(failed)} questions failed — they will be answered live")
+
+    return True
+
+
+def build_all(doc_ids=None, concurrency=None):
+    """
+    Precompute for the given documents (default: the default document)
+    """
+
+    from rag.rag_pipeline import RAGPipeline
+
+    rag = RAGPipeline()
+
+    # Fresh answers only: neither old store nor answer cache may answer
+    rag.precomputed_enabled = False
+    rag.answer_cache = None
+
+    precomputed_cfg = rag.config.get("precomputed", {})
+    queries = canonical_queries(precomputed_cfg)
+
+    print(f"📚 {len(queries)} canonical questions")
+
+    concurrency = concurrency or precomputed_cfg.get("concurrency", 4)
+
+    # One event loop for every document: the LLM guard's semaphore is bound to it
+    async def run():
+        for doc_id in doc_ids or [rag.default_doc_id]:
+            await build_answers(rag, doc_id, queries, concurrency)
+
+    try:
+        asyncio.run(run())
+
+    finally:
+        rag.executor.shutdown(wait=False)
+
+        if rag.batcher is not None:
+            rag.batcher.close()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Precompute answers for the canonical questions")
+    parser.add_argument("--doc", action="append", default=[], help="doc_id (repeatable; default document if omitted)")
+    parser.add_argument("--concurrency", type=int, default=None, help="parallel generations")
+    args = parser.parse_args()
+
+    build_all(args.doc, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import threading
+
+import yaml
+
+from rag.answer_cache import file_version
+
+
+# Same rewrite as rephrase_query() in app.py and the Streamlit UI
+FOLLOWUP_TEMPLATE = (
+    "Previous question: {previous}. "
+    "Follow-up question: {followup}. "
+    "Answer using the policy document."
+)
+
+DEFAULT_QUESTIONS_PATH = "config/canonical_questions.yaml"
+
+
+def followup_query(previous, followup):
+    return FOLLOWUP_TEMPLATE.format(previous=previous, followup=followup)
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split()).rstrip(" ?.!")
+
+
+# ---------- CANONICAL QUESTIONS ----------
+
+def load_canonical_questions(path=DEFAULT_QUESTIONS_PATH):
+    """
+    {"recommended": [...], "examples": [...], "followups": [...], "extra": [...]}
+    """
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            questions = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        print(f"⚠ {path} not found — no canonical questions")
+        questions = {}
+
+    return {
+        key: list(questions.get(key) or [])
+        for key in ("recommended", "examples", "followups", "extra")
+    }
+
+
+def canonical_queries(precomputed_config):
+    """
+    Every query string to precompute: the questions themselves, then
+    each follow-up template as asked right after a recommended question
+    """
+
+    questions = load_canonical_questions(
+        precomputed_config.get("questions_path", DEFAULT_QUESTIONS_PATH)
+    )
+
+    queries = questions["recommended"] + questions["examples"] + questions["extra"]
+
+    if precomputed_config.get("followups_after_recommended", True):
+        queries += [
+            followup_query(previous, followup)
+            for previous in questions["recommended"]
+            for followup in questions["followups"]
+        ]
+
+    # Unique after normalisation, first spelling wins
+    unique = {}
+
+    for query in queries:
+        unique.setdefault(normalize_query(query), query)
+
+    return list(unique.values())
+
+
+# ---------- STORE ----------
+
+def write_store(path, version, entries, meta=None):
+    """
+    Atomically replace the store: readers see the old file or the new one
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": version, "built_at": time.time(), "meta": meta or {}, "entries": entries},
+            f,
+            ensure_ascii=False
+        )
+
+    os.replace(tmp_path, path)
+
+
+class PrecomputedAnswers:
+    """
+    Answers built at index time for one namespace's canonical questions,
+    keyed by normalised query text and stored next to its FAISS index.
+
+    The store records the version (file_version) of the index and
+    metadata it was built from; once either is rebuilt the store no
+    longer matches and is ignored until it is built again. The files
+    are stat'ed at most once per check_interval_s.
+    """
+
+    def __init__(self, path, watch_paths, check_interval_s=1.0):
+
+        self.path = path
+        self.watch_paths = list(watch_paths)
+        self.check_interval_s = check_interval_s
+
+        self.entries = {}
+        self.loaded_version = None
+        self.checked_at = None
+        self.stale = False
+
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+
+    def _refresh(self):
+
+        now = time.monotonic()
+
+        if self.checked_at is not None and now - self.checked_at < self.check_interval_s:
+            return
+
+        self.checked_at = now
+
+        current = (file_version([self.path]), file_version(self.watch_paths))
+
+        if current == self.loaded_version:
+            return
+
+        self.loaded_version = current
+        self.entries = {}
+        self.stale = False
+
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                store = json.load(f)
+        except Exception as e:
+            print(f"⚠ Could not read {self.path} — ignoring precomputed answers")
+            print(e)
+            return
+
+        if store.get("version") != current[1]:
+            self.stale = True
+            print(f"♻ {self.path} was built for an older index — ignoring it until rebuilt")
+            return
+
+        self.entries = store.get("entries", {})
+        print(f"✅ {len(self.entries)} precomputed answers loaded from {self.path}")
+
+    def lookup(self, query):
+        """
+        Returns (answer, sources) for a canonical question, else None
+        """
+
+        with self.lock:
+            self._refresh()
+
+            entry = self.entries.get(normalize_query(query))
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return entry["answer"], entry["sources"]
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "stale": self.stale,
+            "hits": self.hits,
+            "misses": self.misses
+        }
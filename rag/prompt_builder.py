@@ -0,0 +1,266 @@
+import re
+from functools import lru_cache
+
+from chunking.semantic_chunker import estimate_tokens
+
+
+CHUNK_INDEX_PATTERN = re.compile(r"_chunk_(\d+)$")
+WORD_PATTERN = re.compile(r"\S+")
+
+
+# ---------- TOKEN COUNTING ----------
+
+class TokenCounter:
+    """
+    Counts Gemini tokens offline with the SDK's local tokenizer
+    (needs sentencepiece); falls back to the word-based estimate.
+    """
+
+    def __init__(self, model_name, method="gemini", cache_size=4096):
+
+        self.tokenizer = None
+
+        if method == "gemini":
+            try:
+                from google.genai.local_tokenizer import LocalTokenizer
+
+                self.tokenizer = LocalTokenizer(model_name=model_name)
+
+            except Exception as e:
+                print("⚠ Local Gemini tokenizer unavailable — estimating tokens")
+                print(e)
+
+        self.method = "gemini" if self.tokenizer is not None else "estimate"
+
+        # Retrieved chunks repeat across requests; count each text once
+        self.count = lru_cache(maxsize=cache_size)(self.count_uncached)
+
+    def count_uncached(self, text):
+
+        if self.tokenizer is not None:
+            return self.tokenizer.count_tokens(text).total_tokens
+
+        return estimate_tokens(text)
+
+
+# ---------- CONTEXT ASSEMBLY ----------
+
+def chunk_index(chunk):
+    match = CHUNK_INDEX_PATTERN.search(chunk.get("chunk_id") or "")
+    return int(match.group(1)) if match else None
+
+
+def word_ends(text):
+    """
+    (words, end offset of each word in text)
+    """
+
+    matches = list(WORD_PATTERN.finditer(text))
+
+    return [m.group() for m in matches], [m.end() for m in matches]
+
+
+def overlap_length(left, right):
+    """
+    Longest k such that the last k words of left are the first k of right
+    """
+
+    if not left or not right:
+        return 0
+
+    first = right[0]
+
+    for i, word in enumerate(left):
+        k = len(left) - i
+
+        if word == first and k <= len(right) and left[i:] == right[:k]:
+            return k
+
+    return 0
+
+
+def merge_spans(contexts):
+    """
+    Group retrieved chunks into spans. Consecutive chunks of the same
+    section are joined with their shared overlap removed, exact
+    duplicates are dropped. Each span keeps the best (lowest) rank of
+    its chunks, so spans stay in relevance order.
+
+    Span text is the chunks' own text (whitespace and all); "ends" are
+    the word end offsets in it, so trimming cuts on word boundaries.
+
+    Returns (spans, overlap_words_removed)
+    """
+
+    groups = {}
+
+    for rank, ctx in enumerate(contexts):
+        key = (ctx.get("doc_id"), ctx.get("section_id"))
+        groups.setdefault(key, []).append((rank, ctx))
+
+    spans = []
+    removed = 0
+    seen_texts = set()
+
+    for members in groups.values():
+
+        members.sort(key=lambda m: (chunk_index(m[1]) is None, chunk_index(m[1]) or 0, m[0]))
+
+        open_spans = []
+
+        for rank, ctx in members:
+
+            if ctx["text"] in seen_texts:
+                continue
+
+            seen_texts.add(ctx["text"])
+
+            words, ends = word_ends(ctx["text"])
+            index = chunk_index(ctx)
+
+            # Chunk ids can repeat across sections with the same id,
+            # so only join when the chunk really continues the span
+            previous = None
+            k = 0
+
+            if index is not None:
+                for span in open_spans:
+                    if span["last_index"] == index - 1:
+                        k = overlap_length(span["words"], words)
+
+                        if k:
+                            previous = span
+                            break
+
+            if previous is not None:
+                removed += k
+
+                # Continue from the end of the shared overlap in this chunk
+                base = len(previous["text"].rstrip())
+                previous["text"] = previous["text"][:base] + ctx["text"][ends[k - 1]:]
+                previous["ends"].extend(base + end - ends[k - 1] for end in ends[k:])
+
+                previous["words"].extend(words[k:])
+                previous["last_index"] = index
+                previous["rank"] = min(previous["rank"], rank)
+                previous["chunk_ids"].append(ctx.get("chunk_id"))
+                continue
+
+            span = {
+                "rank": rank,
+                "section_id": ctx.get("section_id"),
+                "title": ctx.get("title"),
+                "text": ctx["text"],
+                "words": words,
+                "ends": ends,
+                "last_index": index,
+                "chunk_ids": [ctx.get("chunk_id")]
+            }
+            open_spans.append(span)
+            spans.append(span)
+
+    spans.sort(key=lambda s: s["rank"])
+
+    return spans, removed
+
+
+class PromptBuilder:
+    """
+    Fits retrieved context into an input-token budget: overlapping
+    chunks are merged first, then spans are added most relevant first
+    and the first one that does not fit is trimmed to the remainder.
+    """
+
+    def __init__(self, counter, max_input_tokens=3000, min_trim_tokens=50):
+        self.counter = counter
+        self.max_input_tokens = max_input_tokens
+        self.min_trim_tokens = min_trim_tokens
+
+    def format_span(self, i, span, text=None):
+        return (
+            f"\n[Source {i}] "
+            f"Section {span['section_id']} — {span['title']}\n"
+            f"{span['text'] if text is None else text}\n"
+        )
+
+    def trim(self, i, span, budget):
+        """
+        Longest prefix of the span (in words) whose block fits the budget
+        """
+
+        ends = span["ends"]
+        lo, hi = 0, len(ends)
+
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+
+            if self.counter.count_uncached(self.format_span(i, span, span["text"][:ends[mid - 1]])) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+
+        if lo == 0:
+            return None
+
+        block = self.format_span(i, span, span["text"][:ends[lo - 1]])
+
+        return block, self.counter.count(block)
+
+    def build_context(self, contexts, budget):
+        """
+        Returns (context_block, report)
+        """
+
+        # What the chunks would cost concatenated as-is, for the log
+        raw_tokens = sum(
+            self.counter.count(self.format_span(i, ctx))
+            for i, ctx in enumerate(contexts, 1)
+        )
+
+        spans, overlap_removed = merge_spans(contexts)
+
+        blocks = []
+        used = 0
+        trimmed = 0
+        dropped = 0
+
+        # Template and query already use the whole input budget
+        if budget <= 0:
+            print(f"⚠ No input budget left for context ({budget} tokens) — sending none")
+            budget = 0
+
+        for span in spans:
+
+            i = len(blocks) + 1
+            block = self.format_span(i, span)
+            tokens = self.counter.count(block)
+
+            if used + tokens <= budget:
+                blocks.append(block)
+                used += tokens
+                continue
+
+            remaining = budget - used
+
+            if remaining >= self.min_trim_tokens:
+                fitted = self.trim(i, span, remaining)
+
+                if fitted is not None:
+                    blocks.append(fitted[0])
+                    used += fitted[1]
+                    trimmed += 1
+                    continue
+
+            dropped += 1
+
+        report = {
+            "chunks": len(contexts),
+            "spans": len(spans),
+            "raw_context_tokens": raw_tokens,
+            "context_tokens": used,
+            "overlap_words_removed": overlap_removed,
+            "trimmed": trimmed,
+            "dropped": dropped
+        }
+
+        return "".join(blocks), report
@@ -1,14 +1,58 @@
-import os
+import asyncio
+import contextvars
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from google import genai
 
-from retrieval.retriever import Retriever
+from retrieval.batcher import QueryBatcher
+from rag.answer_cache import SemanticAnswerCache
+from retrieval.namespaces import NamespaceManager, default_doc_id, namespace_paths
+from rag import timing
+from rag.metrics import metrics
+from rag.llm_guard import LLMGuard, classify_error, prompt_key
+from rag.llm_provider import build_provider
+from rag.precomputed import PrecomputedAnswers
+from embeddings.backends import backend_options
+from rag.prompt_builder import TokenCounter, PromptBuilder
 
 
 load_dotenv()
 
 
+NOT_FOUND_ANSWER = "This information isn't in the document."
+
+CIRCUIT_OPEN_ANSWER = "The assistant is receiving too many requests. Please try again in a minute."
+RATE_LIMIT_ANSWER = "Today's free usage limit is over. Please try again later."
+CONTEXT_TOO_LONG_ANSWER = "The document context is too large. Please try a shorter question."
+
+# Shown instead of an answer when generation failed
+GENERATION_ERROR_ANSWERS = (CIRCUIT_OPEN_ANSWER, RATE_LIMIT_ANSWER, CONTEXT_TOO_LONG_ANSWER)
+
+
+PROMPT_TEMPLATE = """
+You are an AI assistant answering questions strictly from the provided policy document.
+
+RULES:
+- Use bullet points or numbered lists when listing policies.
+- Keep answers concise.
+- Use line breaks.
+- Highlight headings in bold.
+- Always include inline citations like (Section IV.A.1).
+- If answer not found say: "{not_found}"
+
+CONTEXT:
+{context}
+
+QUESTION:
+{query}
+
+FORMAT:
+Use Markdown formatting.
+
+ANSWER:
+"""
+
+
 class RAGPipeline:
 
     def __init__(self):
@@ -22,110 +66,675 @@ class RAGPipeline:
             print(e)
             return
 
-        # Gemini Client (NEW SDK)
+        metrics.configure(self.config.get("metrics", {}))
+
+        # Heavy modules (faiss, torch) are imported here, not at module load
         try:
-            self.client = genai.Client(
-                api_key=os.getenv("GEMINI_API_KEY")
-            )
+            with timing.phase("import retriever"):
+                import retrieval.retriever  # faiss + sentence-transformers
+        except Exception as e:
+            print("❌ Failed to import pipeline dependencies")
+            print(e)
+            return
+
+        # LLM provider: Gemini (google-genai SDK) or the offline fake
+        try:
+            with timing.phase("create LLM provider"):
+                self.llm = build_provider(self.config)
         except Exception as e:
-            print("❌ Failed to initialize Gemini client")
+            print("❌ Failed to initialize LLM provider")
             print(e)
             return
 
         self.model_name = self.config["gemini"]["model_name"]
 
-        # Retriever init
+        # Single-flight, concurrency cap, backoff and circuit breaker
+        llm_cfg = self.config.get("llm", {})
+
+        self.llm_guard = LLMGuard(
+            max_concurrent=llm_cfg.get("max_concurrent", 4),
+            max_retries=llm_cfg.get("max_retries", 3),
+            base_delay=llm_cfg.get("base_delay_s", 0.5),
+            max_delay=llm_cfg.get("max_delay_s", 8.0),
+            failure_threshold=llm_cfg.get("breaker_failures", 5),
+            reset_seconds=llm_cfg.get("breaker_reset_s", 30.0),
+            single_flight=llm_cfg.get("single_flight", True)
+        )
+
+        # Real token counts for the input budget
+        prompt_cfg = self.config.get("prompt", {})
+
+        with timing.phase("load tokenizer"):
+            self.token_counter = TokenCounter(
+                self.model_name,
+                method=prompt_cfg.get("tokenizer", "gemini")
+            )
+
+        self.prompt_builder = PromptBuilder(
+            self.token_counter,
+            max_input_tokens=prompt_cfg.get("max_input_tokens", 3000),
+            min_trim_tokens=prompt_cfg.get("min_trim_tokens", 50)
+        )
+
+        # Retriever init (default document; others load on demand)
+        self.default_doc_id = default_doc_id(self.config)
+
         try:
-            self.retriever = Retriever(
-    model_name=self.config["embedding"]["model_name"],
-    index_path=self.config["paths"]["vector_index"],
-    metadata_path=self.config["paths"]["vector_metadata"],
-    chunk_path=self.config["paths"]["chunked_input"]
-)
+            self.retriever = self.build_retriever(self.default_doc_id)
 
         except Exception as e:
             print("❌ Failed to initialize Retriever")
             print(e)
             return
 
+        self.namespaces = NamespaceManager(
+            self.config,
+            self.build_retriever,
+            pinned=self.default_doc_id,
+            on_load=self.namespace_loaded
+        )
+        self.namespaces.add(self.default_doc_id, self.retriever)
+
         self.top_k = self.config["retrieval"]["top_k"]
 
+        # Bounded pool for blocking embedding + FAISS work (async path)
+        server_cfg = self.config.get("server", {})
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=server_cfg.get("retrieval_workers", 4),
+            thread_name_prefix="retrieval"
+        )
+
+        # Micro-batching of concurrent query encodes + FAISS searches
+        batching_cfg = self.config.get("batching", {})
+        self.batcher = None
+
+        if batching_cfg.get("enabled", False):
+            self.batcher = QueryBatcher(
+                self.retriever,
+                window_ms=batching_cfg.get("window_ms", 5),
+                max_batch_size=batching_cfg.get("max_batch_size", 32)
+            )
+
+        # Semantic answer cache (near-duplicate questions skip Gemini)
+        cache_cfg = self.config.get("cache", {})
+        self.answer_cache = None
+
+        if cache_cfg.get("enabled", False):
+            # Other namespaces add their files as they load (namespace_loaded)
+            self.answer_cache = SemanticAnswerCache(
+                watch_paths=self.index_files(self.default_doc_id),
+                max_distance=cache_cfg.get("max_distance", 0.08),
+                max_entries=cache_cfg.get("max_entries", 512),
+                ttl_seconds=cache_cfg.get("ttl_seconds", 3600),
+                persist_path=cache_cfg.get("persist_path"),
+                check_interval_s=cache_cfg.get("version_check_s", 1.0)
+            )
+
+        # Answers built at index time for the canonical questions (per namespace)
+        self.precomputed_enabled = self.config.get("precomputed", {}).get("enabled", False)
+        self.precomputed = {}
+
+        # Optional cross-encoder rerank of a wider candidate set
+        rerank_cfg = self.config.get("rerank", {})
+        self.reranker = None
+        self.search_k = self.top_k
+
+        if rerank_cfg.get("enabled", False):
+            try:
+                from retrieval.reranker import CrossEncoderReranker
+
+                with timing.phase("load cross-encoder"):
+                    self.reranker = CrossEncoderReranker(
+                        rerank_cfg["model_name"],
+                        max_latency_ms=rerank_cfg.get("max_latency_ms", 150),
+                        batch_size=rerank_cfg.get("batch_size", 16),
+                        cache_size=rerank_cfg.get("cache_size", 4096)
+                    )
+
+                self.search_k = max(self.top_k, rerank_cfg.get("candidates", 20))
+                self.top_k = rerank_cfg.get("top_n", self.top_k)
+
+            except Exception as e:
+                print("⚠ Failed to load reranker — using dense order")
+                print(e)
+
+    def build_retriever(self, doc_id):
+
+        from retrieval.retriever import Retriever
+
+        paths = namespace_paths(self.config, doc_id)
+
+        return Retriever(
+            model_name=self.config["embedding"]["model_name"],
+            index_path=paths["vector_index"],
+            metadata_path=paths["vector_metadata"],
+            chunk_path=paths["chunks"],
+            index_config=self.config.get("index", {}),
+            min_score=self.config["retrieval"].get("min_score"),
+            max_score_gap=self.config["retrieval"].get("max_score_gap"),
+            embedding_cache_dir=self.config["embedding"].get("cache_dir"),
+            embedding_cache_max_mb=self.config["embedding"].get("cache_max_mb", 512),
+            sparse_index_path=paths["sparse_index"],
+            hybrid_config=self.config.get("hybrid", {}),
+            backend_options=backend_options(self.config["embedding"])
+        )
+
+    def index_files(self, doc_id):
+        paths = namespace_paths(self.config, doc_id)
+        return [paths["vector_index"], paths["vector_metadata"]]
+
+    def namespace_loaded(self, doc_id):
+
+        if self.answer_cache is not None:
+            self.answer_cache.watch(self.index_files(doc_id))
+
+    def warm_up(self):
+        """
+        Run one dummy encode + search so the first real request
+        does not pay for lazy initialisation (kernels, caches, page-ins)
+        """
+
+        with timing.phase("warm-up encode + search"):
+            query_vector = self.retriever.encode(["warm-up query"])
+            chunks = self.retriever.search_vectors(
+                query_vector, self.search_k, queries=["warm-up query"]
+            )[0]
+
+            if self.reranker is not None and chunks:
+                self.reranker.rerank("warm-up query", chunks, self.top_k)
+
     def build_prompt(self, query, contexts):
+        """
+        Fill the template with as much context as the input-token
+        budget allows (overlaps merged, most relevant first)
+        """
+
+        overhead = self.token_counter.count(
+            PROMPT_TEMPLATE.format(not_found=NOT_FOUND_ANSWER, context="", query=query)
+        )
+
+        context_block, report = self.prompt_builder.build_context(
+            contexts,
+            self.prompt_builder.max_input_tokens - overhead
+        )
+
+        prompt = PROMPT_TEMPLATE.format(
+            not_found=NOT_FOUND_ANSWER,
+            context=context_block,
+            query=query
+        ).strip()
+
+        print(
+            f"🧮 Prompt: {overhead + report['context_tokens']}/"
+            f"{self.prompt_builder.max_input_tokens} tokens ({self.token_counter.method}) — "
+            f"context {report['context_tokens']} of {report['raw_context_tokens']}, "
+            f"{report['chunks']} chunks → {report['spans']} spans, "
+            f"{report['overlap_words_removed']} overlap words removed, "
+            f"{report['trimmed']} trimmed, {report['dropped']} dropped"
+        )
+
+        return prompt
+
+    def precomputed_answer(self, query, doc_ids):
+        """
+        (answer, sources) if the query is a canonical question of a
+        single namespace with a current precomputed store, else None
+        """
+
+        if not self.precomputed_enabled or len(doc_ids) != 1:
+            return None
+
+        doc_id = doc_ids[0]
+        store = self.precomputed.get(doc_id)
+
+        if store is None:
+            paths = namespace_paths(self.config, doc_id)
+
+            store = self.precomputed[doc_id] = PrecomputedAnswers(
+                paths["precomputed_answers"],
+                [paths["vector_index"], paths["vector_metadata"]],
+                check_interval_s=self.config.get("precomputed", {}).get("version_check_s", 1.0)
+            )
+
+        answer = store.lookup(query)
+        metrics.cache_lookup(answer is not None, cache="precomputed")
 
-        context_block = ""
+        if answer is not None:
+            print("⚡ Precomputed answer")
 
-        for i, ctx in enumerate(contexts, 1):
+        return answer
 
-            context_block += (
-                f"\n[Source {i}] "
-                f"Section {ctx['section_id']} — {ctx['title']}\n"
-                f"{ctx['text']}\n"
+    def retrieve(self, query, doc_ids=None):
+        """
+        Embed the query once, then either serve it from the answer
+        cache or search FAISS with the same vector.
+        Returns (query_vector, cached, retrieved_chunks)
+        """
+
+        doc_ids = doc_ids or [self.default_doc_id]
+
+        # Canonical questions skip the encode too
+        precomputed = self.precomputed_answer(query, doc_ids)
+
+        if precomputed is not None:
+            return None, precomputed, precomputed[1]
+
+        if self.batcher is not None and doc_ids == [self.default_doc_id]:
+            query_vector, retrieved_chunks = self.batcher.search(query, self.search_k)
+            return self.resolve_retrieval(query, query_vector, retrieved_chunks)
+
+        # Every namespace shares the model, so one encode serves them all
+        query_vector = self.retriever.encode([query])[0]
+
+        return self.resolve_retrieval(query, query_vector, None, doc_ids)
+
+    async def aretrieve(self, query, doc_ids=None):
+
+        doc_ids = doc_ids or [self.default_doc_id]
+
+        precomputed = self.precomputed_answer(query, doc_ids)
+
+        if precomputed is not None:
+            return None, precomputed, precomputed[1]
+
+        if self.batcher is not None and doc_ids == [self.default_doc_id]:
+            # Awaiting the batch future does not hold a pool thread
+            query_vector, retrieved_chunks = await asyncio.wrap_future(
+                self.batcher.submit(query, self.search_k)
             )
 
-        prompt = f"""
-You are an AI assistant answering questions strictly from the provided policy document.
+            if self.reranker is None:
+                return self.resolve_retrieval(query, query_vector, retrieved_chunks)
 
-RULES:
-- Use bullet points or numbered lists when listing policies.
-- Keep answers concise.
-- Use line breaks.
-- Highlight headings in bold.
-- Always include inline citations like (Section IV.A.1).
-- If answer not found say: "This information isn't in the document."
+            # Reranking is CPU-bound: keep it off the event loop
+            loop = asyncio.get_running_loop()
 
-CONTEXT:
-{context_block}
+            return await loop.run_in_executor(
+                self.executor,
+                contextvars.copy_context().run,
+                self.resolve_retrieval,
+                query,
+                query_vector,
+                retrieved_chunks
+            )
 
-QUESTION:
-{query}
+        loop = asyncio.get_running_loop()
 
-FORMAT:
-Use Markdown formatting.
+        # Executor threads do not inherit the request's trace by themselves
+        return await loop.run_in_executor(
+            self.executor, contextvars.copy_context().run, self.retrieve, query, doc_ids
+        )
 
-ANSWER:
-"""
+    def resolve_retrieval(self, query, query_vector, retrieved_chunks, doc_ids=None):
+        """
+        Check the answer cache, then run the FAISS search
+        if the batcher has not already done it, then rerank.
+        Several namespaces are searched separately and merged by score.
+        """
+
+        doc_ids = doc_ids or [self.default_doc_id]
+
+        if self.answer_cache is not None:
+            with metrics.span("cache_lookup"):
+                cached = self.answer_cache.lookup(query_vector, scope=self.cache_scope(doc_ids))
+
+            metrics.cache_lookup(cached is not None)
+
+            if cached is not None:
+                print("⚡ Answer cache hit")
+                return query_vector, cached, cached[1]
+
+        if retrieved_chunks is None:
+            print("🔍 Performing semantic retrieval...")
+            retrieved_chunks = self.namespaces.search(
+                query_vector, query, doc_ids, self.search_k
+            )
+
+        if self.reranker is not None and retrieved_chunks:
+            with metrics.span("rerank"):
+                retrieved_chunks = self.reranker.rerank(query, retrieved_chunks, self.top_k)
+
+        if not retrieved_chunks:
+            print("⚠ No chunk cleared the similarity floor — skipping Gemini")
+
+        return query_vector, None, retrieved_chunks
 
+    def cache_scope(self, doc_ids):
+        # The default document keeps the unscoped entries
+        if doc_ids == [self.default_doc_id]:
+            return None
 
-        return prompt.strip()
+        return ",".join(sorted(doc_ids))
 
-    def ask(self, query):
+    def remember(self, query, query_vector, answer, retrieved_chunks, doc_ids=None):
+
+        if self.answer_cache is not None and answer and answer.strip():
+            self.answer_cache.put(
+                query,
+                query_vector,
+                answer,
+                retrieved_chunks,
+                scope=self.cache_scope(doc_ids or [self.default_doc_id])
+            )
+
+    def ask(self, query, doc_id=None):
 
         if not query.strip():
             print("❌ Empty user query")
             return "", []
 
-        print("🔍 Performing semantic retrieval...")
-        retrieved_chunks = self.retriever.search(query, self.top_k)
+        doc_ids = self.namespaces.resolve(doc_id)
+
+        with metrics.span("retrieve"):
+            query_vector, cached, retrieved_chunks = self.retrieve(query, doc_ids)
+
+        if cached is not None:
+            return cached
 
         if not retrieved_chunks:
-            print("⚠ No relevant context found")
+            return NOT_FOUND_ANSWER, []
 
-        prompt = self.build_prompt(query, retrieved_chunks)
+        with metrics.span("build_prompt"):
+            prompt = self.build_prompt(query, retrieved_chunks)
 
-        print("🤖 Sending prompt to Gemini...")
+        print(f"🤖 Sending prompt to {self.llm.name}...")
 
         try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
+            with metrics.span("llm"):
+                response = self.llm_guard.call(
+                    lambda: self.llm.generate(prompt),
+                    key=prompt_key(self.llm.model_name, prompt)
+                )
 
         except Exception as e:
+            return self.handle_generation_error(e), retrieved_chunks
 
-            error_msg = str(e).lower()
+        self.log_usage(response)
+        self.remember(query, query_vector, response.text, retrieved_chunks, doc_ids)
 
-            # ---- Daily free tier / quota exhausted ----
-            if "quota" in error_msg or "rate limit" in error_msg or "exceeded" in error_msg:
-                print("⚠ Free tier usage limit reached")
-                return "Today's free usage limit is over. Please try again later.", retrieved_chunks
+        return response.text, retrieved_chunks
 
-            # ---- Token / context length overflow ----
-            if "token" in error_msg or "context length" in error_msg:
-                print("⚠ Token limit exceeded")
-                return "The document context is too large. Please try a shorter question.", retrieved_chunks
+    async def aask(self, query, doc_id=None):
+        """
+        Non-blocking variant of ask() for the API server.
+        Retrieval runs in the bounded thread pool, generation
+        uses the provider's async client.
+        """
 
-            print("❌ Gemini API call failed")
-            print(e)
-            return "", retrieved_chunks
+        if not query.strip():
+            print("❌ Empty user query")
+            return "", []
+
+        doc_ids = self.namespaces.resolve(doc_id)
+
+        with metrics.span("retrieve"):
+            query_vector, cached, retrieved_chunks = await self.aretrieve(query, doc_ids)
+
+        return await self.agenerate(query, query_vector, cached, retrieved_chunks, doc_ids)
+
+    async def agenerate(self, query, query_vector, cached, retrieved_chunks, doc_ids):
+        """
+        Answer from an aretrieve() / retrieve_batch() result
+        """
+
+        if cached is not None:
+            return cached
+
+        if not retrieved_chunks:
+            return NOT_FOUND_ANSWER, []
+
+        with metrics.span("build_prompt"):
+            prompt = self.build_prompt(query, retrieved_chunks)
+
+        print(f"🤖 Sending prompt to {self.llm.name}...")
+
+        try:
+            with metrics.span("llm"):
+                # Identical prompts in flight share this call
+                response = await self.llm_guard.acall(
+                    lambda: self.llm.agenerate(prompt),
+                    key=prompt_key(self.llm.model_name, prompt)
+                )
+
+        except Exception as e:
+            return self.handle_generation_error(e), retrieved_chunks
+
+        self.log_usage(response)
+        self.remember(query, query_vector, response.text, retrieved_chunks, doc_ids)
 
         return response.text, retrieved_chunks
+
+    def retrieve_batch(self, queries, doc_ids=None):
+        """
+        retrieve() for many queries: one encode call and one FAISS
+        search per namespace with the whole query matrix.
+        Returns one (query_vector, cached, retrieved_chunks) per query.
+        """
+
+        doc_ids = doc_ids or [self.default_doc_id]
+
+        retrievals = []
+
+        for query in queries:
+            precomputed = self.precomputed_answer(query, doc_ids)
+            retrievals.append(None if precomputed is None else (None, precomputed, precomputed[1]))
+
+        pending = [i for i, retrieval in enumerate(retrievals) if retrieval is None]
+
+        if not pending:
+            return retrievals
+
+        pending_queries = [queries[i] for i in pending]
+
+        query_vectors = self.retriever.encode(pending_queries)
+        results = self.namespaces.search_batch(query_vectors, pending_queries, doc_ids, self.search_k)
+
+        for i, query, query_vector, retrieved_chunks in zip(pending, pending_queries, query_vectors, results):
+            retrievals[i] = self.resolve_retrieval(query, query_vector, retrieved_chunks, doc_ids)
+
+        return retrievals
+
+    async def aask_batch(self, queries, doc_id=None, concurrency=4):
+        """
+        Answer a list of queries for the batch endpoint / CLI.
+        Retrieval is vectorised (retrieve_batch in the thread pool),
+        then at most `concurrency` generations run at once.
+        Yields (index, answer, retrieved_chunks) as each one finishes.
+        """
+
+        doc_ids = self.namespaces.resolve(doc_id)
+
+        loop = asyncio.get_running_loop()
+
+        with metrics.span("retrieve"):
+            retrievals = await loop.run_in_executor(
+                self.executor, contextvars.copy_context().run, self.retrieve_batch, queries, doc_ids
+            )
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def answer(index, retrieval):
+            async with slots:
+                text, chunks = await self.agenerate(queries[index], *retrieval, doc_ids)
+                return index, text, chunks
+
+        tasks = [asyncio.ensure_future(answer(i, r)) for i, r in enumerate(retrievals)]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+
+        finally:
+            # Client went away: drop the generations nobody will read
+            for task in tasks:
+                task.cancel()
+
+    def stream(self, query, doc_id=None):
+        """
+        Streaming variant of ask() for Streamlit.
+        Returns (token_generator, retrieved_chunks); retrieval has
+        already happened, generation runs as the generator is consumed.
+        """
+
+        if not query.strip():
+            print("❌ Empty user query")
+            return iter(()), []
+
+        doc_ids = self.namespaces.resolve(doc_id)
+
+        with metrics.span("retrieve"):
+            query_vector, cached, retrieved_chunks = self.retrieve(query, doc_ids)
+
+        def tokens():
+
+            if cached is not None:
+                yield cached[0]
+                return
+
+            if not retrieved_chunks:
+                yield NOT_FOUND_ANSWER
+                return
+
+            with metrics.span("build_prompt"):
+                prompt = self.build_prompt(query, retrieved_chunks)
+
+            print(f"🤖 Streaming prompt to {self.llm.name}...")
+
+            parts = []
+            last = None
+
+            try:
+                with metrics.span("llm"):
+                    for chunk in self.llm_guard.stream(
+                        lambda: self.llm.stream(prompt),
+                        key=prompt_key(self.llm.model_name, prompt)
+                    ):
+                        last = chunk
+
+                        if chunk.text:
+                            parts.append(chunk.text)
+                            yield chunk.text
+
+            except Exception as e:
+                yield self.handle_generation_error(e) or NOT_FOUND_ANSWER
+                return
+
+            answer = "".join(parts)
+            self.log_usage(last)
+
+            if not answer.strip():
+                yield NOT_FOUND_ANSWER
+                return
+
+            self.remember(query, query_vector, answer, retrieved_chunks, doc_ids)
+
+        return tokens(), retrieved_chunks
+
+    async def astream(self, query, doc_id=None):
+        """
+        Async generator for the SSE endpoint.
+        Yields ("sources", chunks) as soon as retrieval is done,
+        then ("token", text) for every piece Gemini streams back.
+        """
+
+        if not query.strip():
+            print("❌ Empty user query")
+            return
+
+        doc_ids = self.namespaces.resolve(doc_id)
+
+        with metrics.span("retrieve"):
+            query_vector, cached, retrieved_chunks = await self.aretrieve(query, doc_ids)
+
+        yield "sources", retrieved_chunks
+
+        if cached is not None:
+            yield "token", cached[0]
+            return
+
+        if not retrieved_chunks:
+            yield "token", NOT_FOUND_ANSWER
+            return
+
+        with metrics.span("build_prompt"):
+            prompt = self.build_prompt(query, retrieved_chunks)
+
+        print(f"🤖 Streaming prompt to {self.llm.name}...")
+
+        parts = []
+        last = None
+
+        try:
+            with metrics.span("llm"):
+                # Identical prompts in flight share one upstream stream
+                response_stream = self.llm_guard.astream(
+                    lambda: self.llm.astream(prompt),
+                    key=prompt_key(self.llm.model_name, prompt)
+                )
+
+                async for chunk in response_stream:
+                    last = chunk
+
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield "token", chunk.text
+
+        except Exception as e:
+            yield "token", self.handle_generation_error(e) or NOT_FOUND_ANSWER
+            return
+
+        answer = "".join(parts)
+        self.log_usage(last)
+
+        if not answer.strip():
+            yield "token", NOT_FOUND_ANSWER
+            return
+
+        self.remember(query, query_vector, answer, retrieved_chunks, doc_ids)
+
+    @staticmethod
+    def log_usage(response):
+        """
+        Billed token counts as reported by the provider (last chunk when streaming)
+        """
+
+        usage = getattr(response, "usage_metadata", None)
+
+        if usage is None:
+            return
+
+        print(
+            f"🧮 LLM usage: {usage.prompt_token_count} input, "
+            f"{usage.candidates_token_count} output tokens"
+        )
+
+        metrics.llm_usage(usage.prompt_token_count, usage.candidates_token_count)
+
+    @staticmethod
+    def handle_generation_error(e):
+        """
+        Map a Gemini failure to the answer shown to the user
+        """
+
+        kind = classify_error(e)
+        metrics.llm_error(kind)
+
+        # ---- Provider still throttling: failing fast ----
+        if kind == "circuit_open":
+            print("⚠ LLM circuit open — not calling Gemini")
+            return CIRCUIT_OPEN_ANSWER
+
+        # ---- Rate limit / daily quota (HTTP 429), retries exhausted ----
+        if kind == "rate_limit":
+            print("⚠ Free tier usage limit reached")
+            return RATE_LIMIT_ANSWER
+
+        # ---- Token / context length overflow ----
+        if kind == "context_length":
+            print("⚠ Token limit exceeded")
+            return CONTEXT_TOO_LONG_ANSWER
+
+        print("❌ Gemini API call failed")
+        print(e)
+        return ""
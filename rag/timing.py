@@ -0,0 +1,70 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# The timer phase() records into; set with PhaseTimer.active()
+_active_timer = ContextVar("active_timer", default=None)
+
+
+class PhaseTimer:
+    """
+    Records how long each named phase takes, e.g. the cold-start
+    breakdown (config → imports → model → index → warm-up)
+    """
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.phases.append((name, elapsed_ms))
+            print(f"⏱ {name}: {elapsed_ms:.0f} ms")
+
+    @contextmanager
+    def active(self):
+        """
+        Make phase() record into this timer for the enclosed block
+        """
+
+        token = _active_timer.set(self)
+
+        try:
+            yield self
+        finally:
+            _active_timer.reset(token)
+
+    def total_ms(self):
+        return sum(ms for _, ms in self.phases)
+
+    def breakdown(self):
+        # A phase that ran more than once is summed, not overwritten
+        totals = {}
+
+        for name, ms in self.phases:
+            totals[name] = totals.get(name, 0.0) + ms
+
+        return {name: round(ms, 1) for name, ms in totals.items()}
+
+    def report(self, budget_ms=None):
+
+        total = self.total_ms()
+        print(f"⏱ Startup total: {total:.0f} ms")
+
+        if budget_ms and total > budget_ms:
+            print(f"⚠ Cold start over budget ({total:.0f} ms > {budget_ms} ms)")
+
+
+def phase(name):
+    """
+    Time a phase into the active PhaseTimer (only logged if there is none)
+    """
+
+    return (_active_timer.get() or PhaseTimer()).phase(name)
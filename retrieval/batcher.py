@@ -0,0 +1,140 @@
+import time
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+from rag.metrics import metrics
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent queries into one model.encode call and
+    one index.search call, then fans the results back out.
+
+    A query waits at most window_ms for company; a batch is flushed
+    early once it reaches max_batch_size.
+    """
+
+    def __init__(self, retriever, window_ms=5, max_batch_size=32):
+
+        self.retriever = retriever
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self.queue = queue.Queue()
+
+        # Batch-size distribution
+        self.batch_sizes = Counter()
+        self.stats_lock = threading.Lock()
+
+        self.worker = threading.Thread(
+            target=self._run,
+            name="query-batcher",
+            daemon=True
+        )
+        self.worker.start()
+
+    # ---------- PUBLIC ----------
+
+    def submit(self, query, top_k):
+        """
+        Queue a query; the Future resolves to (query_vector, results).
+        The caller's trace receives the batch's encode / search spans.
+        """
+
+        future = Future()
+        self.queue.put((query, top_k, future, metrics.current_trace()))
+        return future
+
+    def search(self, query, top_k):
+        return self.submit(query, top_k).result()
+
+    def close(self):
+        self.queue.put(None)
+
+    def stats(self):
+
+        with self.stats_lock:
+            histogram = dict(sorted(self.batch_sizes.items()))
+
+        batches = sum(histogram.values())
+        queries = sum(size * count for size, count in histogram.items())
+
+        return {
+            "batches": batches,
+            "queries": queries,
+            "mean_batch_size": round(queries / batches, 2) if batches else 0.0,
+            "max_batch_size": max(histogram) if histogram else 0,
+            "histogram": histogram
+        }
+
+    # ---------- WORKER ----------
+
+    def _run(self):
+
+        while True:
+
+            first = self.queue.get()
+
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            stop = False
+
+            while len(batch) < self.max_batch_size:
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    break
+
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                if item is None:
+                    stop = True
+                    break
+
+                batch.append(item)
+
+            self._process(batch)
+
+            if stop:
+                return
+
+    def _process(self, batch):
+
+        with self.stats_lock:
+            self.batch_sizes[len(batch)] += 1
+
+        traces = [trace for _, _, _, trace in batch if trace is not None]
+
+        # Collect the spans once for the whole batch, copy to each request
+        batch_trace, token = metrics.start_trace() if traces else (None, None)
+
+        try:
+            queries = [query for query, _, _, _ in batch]
+            query_vectors = self.retriever.encode(queries)
+
+            max_k = max(top_k for _, top_k, _, _ in batch)
+            results = self.retriever.search_vectors(query_vectors, max_k, queries=queries)
+
+        except Exception as e:
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        finally:
+            if token is not None:
+                metrics.end_trace(token)
+
+                for trace in traces:
+                    trace.spans.extend(batch_trace.spans)
+
+        for (_, top_k, future, _), vector, rows in zip(batch, query_vectors, results):
+            future.set_result((vector, rows[:top_k]))
@@ -0,0 +1,65 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from chunking.inverted_index import load_inverted_index, tokenize
+
+
+class BM25Scorer:
+    """
+    Sparse BM25 over the inverted index written at chunking time.
+
+    Per-(term, chunk) BM25 weights are precomputed at load, so a query
+    only sums the rows of its own terms — cost grows with the postings
+    touched, not with the corpus.
+    """
+
+    def __init__(self, index_path, k1=1.5, b=0.75):
+
+        index = load_inverted_index(index_path)
+
+        self.vocab = {term: i for i, term in enumerate(index["terms"].tolist())}
+        self.chunk_ids = index["chunk_ids"].tolist()
+
+        doc_lengths = index["doc_lengths"].astype("float32")
+        n_docs = len(doc_lengths)
+        avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+
+        indptr = index["indptr"]
+        docs = index["indices"]
+        tf = index["freqs"].astype("float32")
+
+        df = np.diff(indptr).astype("float32")
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        # Expand idf to one value per posting
+        posting_idf = np.repeat(idf, np.diff(indptr))
+
+        norm = k1 * (1.0 - b + b * doc_lengths[docs] / (avg_length or 1.0))
+        weights = posting_idf * tf * (k1 + 1.0) / (tf + norm)
+
+        self.weights = csr_matrix(
+            (weights, docs, indptr),
+            shape=(len(self.vocab), n_docs)
+        )
+
+    def search(self, query, top_k):
+        """
+        Returns [(bm25_score, chunk_position)] best first
+        """
+
+        term_ids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+
+        if not term_ids:
+            return []
+
+        scores = np.asarray(self.weights[term_ids].sum(axis=0)).ravel()
+
+        candidates = np.flatnonzero(scores)
+
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[top]
+
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [(round(float(scores[pos]), 4), int(pos)) for pos in order]
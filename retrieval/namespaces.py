@@ -0,0 +1,301 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from rag.timing import PhaseTimer
+
+
+DOC_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class UnknownNamespaceError(KeyError):
+    pass
+
+
+# ---------- LAYOUT ----------
+
+def default_doc_id(config):
+    return config.get("namespaces", {}).get("default_doc_id", "employee_handbook_v1")
+
+
+def iter_documents(config):
+    """
+    (doc_id, google_doc_url) for every configured document.
+    The default document uses the top-level google_doc_url.
+    """
+
+    yield default_doc_id(config), config.get("google_doc_url")
+
+    for doc in config.get("namespaces", {}).get("documents", []) or []:
+        yield doc["doc_id"], doc.get("google_doc_url")
+
+
+def selected_documents(config, argv):
+    """
+    Documents to process in a pipeline step: all configured ones,
+    or only those named with --doc <doc_id> (repeatable)
+    """
+
+    wanted = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == "--doc"]
+
+    documents = list(iter_documents(config))
+
+    if not wanted:
+        return documents
+
+    known = dict(documents)
+
+    # Unconfigured doc_ids are allowed when their files already exist
+    return [(doc_id, known.get(doc_id)) for doc_id in wanted]
+
+
+def namespace_paths(config, doc_id):
+    """
+    File locations for one document. The default document keeps the
+    top-level paths.* entries; others live under namespaces.dir/<doc_id>/
+    """
+
+    if not DOC_ID_PATTERN.match(doc_id):
+        raise ValueError(f"Invalid doc_id: {doc_id!r}")
+
+    if doc_id == default_doc_id(config):
+        paths = config["paths"]
+
+        return {
+            "raw": paths["raw_data"],
+            "structured": paths["structured_input"],
+            "chunks_output": paths["chunked_output"],
+            "chunks": paths["chunked_input"],
+            "sparse_index": paths.get("sparse_index"),
+            "vector_index": paths["vector_index"],
+            "vector_metadata": paths["vector_metadata"],
+            "precomputed_answers": paths.get(
+                "precomputed_answers",
+                os.path.join(os.path.dirname(paths["vector_index"]), "precomputed_answers.json")
+            )
+        }
+
+    base = os.path.join(config.get("namespaces", {}).get("dir", "data/namespaces"), doc_id)
+
+    return {
+        "raw": base,
+        "structured": os.path.join(base, "structured_doc.json"),
+        "chunks_output": os.path.join(base, "chunked_doc.json"),
+        "chunks": os.path.join(base, "chunked_doc.json"),
+        "sparse_index": os.path.join(base, "sparse_index.npz"),
+        "vector_index": os.path.join(base, "faiss.index"),
+        "vector_metadata": os.path.join(base, "metadata.db"),
+        "precomputed_answers": os.path.join(base, "precomputed_answers.json")
+    }
+
+
+def available_doc_ids(config):
+    """
+    Configured documents plus any namespace directory that has an index
+    """
+
+    doc_ids = [doc_id for doc_id, _ in iter_documents(config)]
+
+    base = config.get("namespaces", {}).get("dir", "data/namespaces")
+
+    if os.path.isdir(base):
+        for name in sorted(os.listdir(base)):
+            if (
+                name not in doc_ids
+                and DOC_ID_PATTERN.match(name)
+                and os.path.exists(os.path.join(base, name, "faiss.index"))
+            ):
+                doc_ids.append(name)
+
+    return doc_ids
+
+
+# ---------- RESIDENT NAMESPACES ----------
+
+class NamespaceManager:
+    """
+    Loads one Retriever per document on demand and keeps the hot ones
+    resident, evicting least recently used namespaces when either
+    max_resident or max_memory_mb is exceeded. The default namespace
+    is pinned. on_load(doc_id) runs after each namespace is loaded.
+    """
+
+    def __init__(self, config, build_retriever, pinned=None, on_load=None):
+
+        ns_cfg = config.get("namespaces", {})
+
+        self.config = config
+        self.build_retriever = build_retriever
+        self.pinned = pinned
+        self.on_load = on_load
+        self.max_resident = ns_cfg.get("max_resident", 8)
+        self.max_bytes = ns_cfg.get("max_memory_mb", 1024) * 1024 * 1024
+
+        self.resident = OrderedDict()
+        self.sizes = {}
+        self.load_ms = {}
+
+        self.lock = threading.Lock()
+        self.loading = {}
+
+        self.loads = 0
+        self.evictions = 0
+
+    def resolve(self, doc_id):
+        """
+        Request doc_id (None, a string or a list) → validated list of doc_ids
+        """
+
+        if not doc_id:
+            return [self.pinned]
+
+        doc_ids = [doc_id] if isinstance(doc_id, str) else list(dict.fromkeys(doc_id))
+
+        known = None
+
+        for name in doc_ids:
+            if name in self.resident:
+                continue
+
+            if known is None:
+                known = available_doc_ids(self.config)
+
+            if name not in known:
+                raise UnknownNamespaceError(name)
+
+        return doc_ids
+
+    def add(self, doc_id, retriever):
+
+        with self.lock:
+            self.resident[doc_id] = retriever
+            self.sizes[doc_id] = estimate_memory_bytes(retriever)
+            self.loads += 1
+            self._evict(keep=doc_id)
+
+    def get(self, doc_id):
+
+        with self.lock:
+
+            if doc_id in self.resident:
+                self.resident.move_to_end(doc_id)
+                return self.resident[doc_id]
+
+        # Lists the namespaces directory: keep it out of the global lock
+        if doc_id not in available_doc_ids(self.config):
+            raise UnknownNamespaceError(doc_id)
+
+        with self.lock:
+
+            if doc_id in self.resident:
+                return self.resident[doc_id]
+
+            # One loader per namespace; concurrent callers wait for it
+            load_lock = self.loading.setdefault(doc_id, threading.Lock())
+
+        with load_lock:
+
+            with self.lock:
+                if doc_id in self.resident:
+                    return self.resident[doc_id]
+
+            print(f"📚 Loading namespace {doc_id}...")
+
+            # Its own timer: lazy loads stay out of the startup breakdown
+            timer = PhaseTimer()
+
+            with timer.active():
+                retriever = self.build_retriever(doc_id)
+
+            self.load_ms[doc_id] = timer.breakdown()
+
+            self.add(doc_id, retriever)
+
+            if self.on_load is not None:
+                self.on_load(doc_id)
+
+            # Resident now: later callers never reach the loader lock
+            with self.lock:
+                self.loading.pop(doc_id, None)
+
+        return retriever
+
+    def _evict(self, keep):
+
+        while (
+            len(self.resident) > self.max_resident
+            or sum(self.sizes.values()) > self.max_bytes
+        ):
+            victim = next(
+                (d for d in self.resident if d not in (keep, self.pinned)),
+                None
+            )
+
+            if victim is None:
+                return
+
+            # No explicit close: a search may still hold this retriever,
+            # its SQLite connection closes once the last reference is gone
+            self.resident.pop(victim)
+            self.sizes.pop(victim)
+            self.evictions += 1
+
+            print(f"🧹 Evicted namespace {victim}")
+
+    def search(self, query_vector, query, doc_ids, top_k):
+        """
+        Search several namespaces with one query vector and merge by score
+        """
+
+        return self.search_batch(query_vector.reshape(1, -1), [query], doc_ids, top_k)[0]
+
+    def search_batch(self, query_vectors, queries, doc_ids, top_k):
+        """
+        search() for a query matrix: one FAISS search per namespace
+        """
+
+        results = [[] for _ in queries]
+
+        for doc_id in doc_ids:
+            rows = self.get(doc_id).search_vectors(query_vectors, top_k, queries=queries)
+
+            for merged, row in zip(results, rows):
+                merged.extend(row)
+
+        if len(doc_ids) > 1:
+            for merged in results:
+                merged.sort(key=merge_score, reverse=True)
+
+        return [merged[:top_k] for merged in results]
+
+    def stats(self):
+        return {
+            "resident": list(self.resident),
+            "memory_mb": round(sum(self.sizes.values()) / (1024 * 1024), 2),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "load_ms": dict(self.load_ms)
+        }
+
+
+def merge_score(chunk):
+    # Hybrid results rank by fused score; dense-only by cosine
+    if chunk.get("fused_score") is not None:
+        return chunk["fused_score"]
+
+    return chunk["score"] if chunk.get("score") is not None else float("-inf")
+
+
+def estimate_memory_bytes(retriever):
+
+    size = os.path.getsize(retriever.index_path) if os.path.exists(retriever.index_path) else 0
+
+    if retriever.bm25 is not None:
+        weights = retriever.bm25.weights
+        size += weights.data.nbytes + weights.indices.nbytes + weights.indptr.nbytes
+
+    # Slotted ChunkRecord + dict entry, roughly
+    size += 200 * len(retriever.records)
+
+    return size
@@ -0,0 +1,105 @@
+import time
+import threading
+from collections import OrderedDict
+
+from embeddings.indexer import content_hash
+from embeddings.model_registry import get_cross_encoder
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved chunks with a local cross-encoder (CPU, batched).
+
+    If scoring runs past max_latency_ms the dense order is kept,
+    so a slow reranker never costs more than its budget plus one batch.
+    """
+
+    def __init__(
+        self,
+        model_name,
+        max_latency_ms=150,
+        batch_size=16,
+        cache_size=4096
+    ):
+
+        self.model = get_cross_encoder(model_name)
+        self.max_latency_ms = max_latency_ms
+        self.batch_size = batch_size
+
+        # (query, chunk id, content hash) -> score
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+        self.calls = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+
+    def rerank(self, query, chunks, top_n):
+
+        start = time.perf_counter()
+        self.calls += 1
+
+        scores = {}
+        pending = []
+
+        with self.lock:
+            for pos, chunk in enumerate(chunks):
+                key = self.cache_key(query, chunk)
+
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    scores[pos] = self.cache[key]
+                    self.cache_hits += 1
+                else:
+                    pending.append(pos)
+
+        for i in range(0, len(pending), self.batch_size):
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if elapsed_ms > self.max_latency_ms:
+                print(f"⏱ Rerank budget exceeded ({elapsed_ms:.0f} ms) — keeping dense order")
+                self.fallbacks += 1
+                return chunks[:top_n]
+
+            batch = pending[i:i + self.batch_size]
+
+            predictions = self.model.predict(
+                [(query, chunks[pos]["text"]) for pos in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+
+            with self.lock:
+                for pos, score in zip(batch, predictions):
+                    scores[pos] = float(score)
+                    self.cache[self.cache_key(query, chunks[pos])] = float(score)
+
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        order = sorted(scores, key=scores.get, reverse=True)[:top_n]
+
+        return [
+            dict(chunks[pos], rerank_score=round(scores[pos], 4))
+            for pos in order
+        ]
+
+    @staticmethod
+    def cache_key(query, chunk):
+        # FAISS ids repeat across namespaces and legacy rows have no hash
+        return (
+            query,
+            chunk.get("doc_id"),
+            chunk.get("chunk_id"),
+            chunk.get("content_hash") or content_hash(chunk["text"])
+        )
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self.cache)
+        }
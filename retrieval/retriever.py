@@ -1,9 +1,15 @@
+import os
 import numpy as np
 import json
 
-from sentence_transformers import SentenceTransformer
-from embeddings.vector_store import FAISSStore, faiss_exists
+from embeddings.model_registry import get_model
+from embeddings.vector_store import FAISSStore, faiss_exists, similarity_scores
 from embeddings.embedder import EmbeddingModel
+from embeddings.indexer import build_index, occurrence_keys
+from embeddings.metadata_store import MetadataStore
+from retrieval.bm25 import BM25Scorer
+from rag import timing
+from rag.metrics import metrics
 
 
 class Retriever:
@@ -13,24 +19,38 @@ class Retriever:
         model_name,
         index_path,
         metadata_path,
-        chunk_path
+        chunk_path,
+        index_config=None,
+        min_score=None,
+        max_score_gap=None,
+        embedding_cache_dir=None,
+        embedding_cache_max_mb=512,
+        sparse_index_path=None,
+        hybrid_config=None,
+        backend_options=None
     ):
 
-        print("🔄 Loading embedding model...")
-        self.model = SentenceTransformer(model_name)
+        with timing.phase("load embedding model"):
+            self.model = get_model(model_name, **(backend_options or {}))
 
         self.index_path = index_path
         self.metadata_path = metadata_path
 
+        # Similarity floor and adaptive top-k cut-off
+        self.min_score = min_score
+        self.max_score_gap = max_score_gap
+
         # ---------- LOAD OR BUILD INDEX ----------
 
         if faiss_exists(index_path):
 
             print("✅ FAISS index found — loading...")
-            self.index = FAISSStore.load(index_path)
+            with timing.phase("load FAISS index"):
+                self.index = FAISSStore.load(index_path, index_config)
 
             print("✅ Loading metadata...")
-            self.metadata = FAISSStore.load_metadata(metadata_path)
+            with timing.phase("open metadata store"):
+                self.metadata_store = MetadataStore.open(metadata_path)
 
         else:
 
@@ -39,37 +59,191 @@ class Retriever:
             with open(chunk_path, "r", encoding="utf-8") as f:
                 chunks = json.load(f)
 
-            texts = [chunk["text"] for chunk in chunks]
-
-            embedder = EmbeddingModel(model_name)
+            chunks = [c for c in chunks if c.get("text", "").strip()]
 
-            embeddings = embedder.generate_embeddings(texts)
-            embeddings = np.array(embeddings).astype("float32")
+            embedder = EmbeddingModel(
+                model_name,
+                cache_dir=embedding_cache_dir,
+                cache_max_mb=embedding_cache_max_mb,
+                backend_options=backend_options
+            )
 
-            store = FAISSStore(embeddings.shape[1])
-            store.add_embeddings(embeddings)
+            self.index = build_index(chunks, embedder, index_config)
 
             print("💾 Saving FAISS index...")
-            store.save(index_path)
+            FAISSStore.save_index(self.index, index_path)
 
             print("💾 Saving metadata...")
-            store.save_metadata(chunks, metadata_path)
+            MetadataStore.write(chunks, metadata_path)
+
+            self.metadata_store = MetadataStore(metadata_path)
+
+        # Small per-chunk fields only; text is fetched per search
+        with timing.phase("load chunk records"):
+            self.records = self.metadata_store.load_records()
+
+        # ---------- OPTIONAL BM25 (HYBRID) ----------
+
+        self.hybrid = hybrid_config or {}
+        self.bm25 = None
+
+        if self.hybrid.get("enabled", False):
+
+            if sparse_index_path and os.path.exists(sparse_index_path):
+                with timing.phase("load BM25 index"):
+                    self.load_bm25(sparse_index_path)
+            else:
+                print("⚠ Sparse index not found — dense retrieval only")
 
-            self.index = store.index
-            self.metadata = chunks
 
     # ---------- SEARCH ----------
 
-    def search(self, query, top_k):
+    def load_bm25(self, sparse_index_path):
+
+        self.bm25 = BM25Scorer(
+            sparse_index_path,
+            k1=self.hybrid.get("k1", 1.5),
+            b=self.hybrid.get("b", 0.75)
+        )
+
+        # Sparse postings refer to chunk positions; map them to FAISS ids
+        ids_by_key = dict(zip(
+            occurrence_keys(r.chunk_id for r in self.records.values()),
+            self.records.keys()
+        ))
+
+        self.sparse_to_id = np.array(
+            [ids_by_key.get(key, -1) for key in occurrence_keys(self.bm25.chunk_ids)],
+            dtype="int64"
+        )
+
+    def encode(self, queries):
+
+        with metrics.span("encode"):
+            query_embedding = self.model.encode(queries, normalize_embeddings=True)
+
+        return np.array(query_embedding).astype("float32")
+
+    def search_vectors(self, query_embeddings, top_k, queries=None):
+        """
+        Search FAISS with already-encoded queries (one row per query).
+        Every result carries its cosine `score`; results below the
+        similarity floor or too far below the best hit are dropped.
+
+        When BM25 is loaded and the query texts are given, dense and
+        sparse candidates are fused with reciprocal rank fusion.
+        """
+
+        hybrid = self.bm25 is not None and queries is not None
+
+        fetch_k = max(top_k, self.hybrid.get("candidates", 20)) if hybrid else top_k
+
+        with metrics.span("search"):
+            distances, indices = self.index.search(query_embeddings, fetch_k)
+
+        scores = similarity_scores(self.index, distances)
+
+        selected = []
 
-        query_embedding = self.model.encode([query])
-        query_embedding = np.array(query_embedding).astype("float32")
+        for row, (score_row, id_row) in enumerate(zip(scores, indices)):
 
-        distances, indices = self.index.search(query_embedding, top_k)
+            hits = [
+                (round(float(score), 4), int(idx))
+                for score, idx in zip(score_row, id_row)
+                if idx != -1
+            ]
 
-        results = []
+            if hybrid:
+                selected.append(self.fuse(hits, queries[row], top_k))
+            else:
+                selected.append([(s, i, {}) for s, i in self.select_by_score(hits)])
+
+        # One text lookup for every chunk returned in the batch
+        with metrics.span("fetch_texts"):
+            texts = self.metadata_store.fetch_texts(
+                idx for hits in selected for _, idx, _ in hits
+            )
+
+        return [
+            [
+                dict(self.records[idx].to_dict(), text=texts[idx], score=score, **extra)
+                for score, idx, extra in hits
+            ]
+            for hits in selected
+        ]
+
+    def fuse(self, dense_hits, query, top_k):
+        """
+        Reciprocal rank fusion: sum of weight / (rrf_k + rank) per list.
+        Dense hits still have to clear the similarity floor; sparse-only
+        hits carry score=None and their bm25_score instead.
+
+        BM25 only adds to a query the dense side found relevant: when no
+        dense hit clears the floor the result is empty, so off-topic
+        questions still take the not-found path instead of reaching the
+        LLM on shared stop-words alone.
+        """
+
+        rrf_k = self.hybrid.get("rrf_k", 60)
+        dense_weight = self.hybrid.get("dense_weight", 1.0)
+        sparse_weight = self.hybrid.get("sparse_weight", 1.0)
+        sparse_min_score = self.hybrid.get("sparse_min_score", 0.0)
+
+        if self.min_score is not None:
+            dense_hits = [h for h in dense_hits if h[0] >= self.min_score]
+
+            if not dense_hits:
+                return []
+
+        with metrics.span("bm25"):
+            candidates = self.bm25.search(query, self.hybrid.get("candidates", 20))
+
+        sparse_hits = [
+            (score, int(self.sparse_to_id[pos]))
+            for score, pos in candidates
+            if score > sparse_min_score and self.sparse_to_id[pos] != -1
+        ]
+
+        fused = {}
+        dense_scores = {}
+        sparse_scores = {}
+
+        for rank, (score, idx) in enumerate(dense_hits, 1):
+            fused[idx] = fused.get(idx, 0.0) + dense_weight / (rrf_k + rank)
+            dense_scores[idx] = score
+
+        for rank, (score, idx) in enumerate(sparse_hits, 1):
+            fused[idx] = fused.get(idx, 0.0) + sparse_weight / (rrf_k + rank)
+            sparse_scores[idx] = score
+
+        best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+        return [
+            (
+                dense_scores.get(idx),
+                idx,
+                {"bm25_score": sparse_scores.get(idx), "fused_score": round(fused[idx], 6)}
+            )
+            for idx in best
+        ]
+
+    def select_by_score(self, hits):
+        """
+        hits: [(score, id)] best first
+        """
+
+        if self.min_score is not None:
+            hits = [h for h in hits if h[0] >= self.min_score]
+
+        # Adaptive top-k: stop at the first large drop from the best hit
+        if hits and self.max_score_gap is not None:
+            best = hits[0][0]
+            hits = [h for h in hits if best - h[0] <= self.max_score_gap]
+
+        return hits
+
+    def search(self, query, top_k):
 
-        for idx in indices[0]:
-            results.append(self.metadata[idx])
+        query_embedding = self.encode([query])
 
-        return results
+        return self.search_vectors(query_embedding, top_k, queries=[query])[0]
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from rag import answer_cache
+from rag.answer_cache import SemanticAnswerCache
+
+
+VECTOR = np.array([1.0, 0.0, 0.0], dtype="float32")
+
+
+def touch(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_version_check_is_throttled(tmp_path, monkeypatch):
+
+    index = str(tmp_path / "faiss.index")
+    touch(index, "v1")
+
+    cache = SemanticAnswerCache([index], check_interval_s=60)
+    cache.put("q", VECTOR, "answer", [])
+
+    stats = []
+    monkeypatch.setattr(answer_cache.os, "stat", lambda path: stats.append(path) or os.lstat(path))
+
+    for _ in range(20):
+        assert cache.lookup(VECTOR) is not None
+
+    assert stats == []
+
+
+def test_namespace_registered_on_load_invalidates(tmp_path):
+
+    default_index = str(tmp_path / "faiss.index")
+    other_index = str(tmp_path / "other.index")
+    touch(default_index, "v1")
+    touch(other_index, "v1")
+
+    cache = SemanticAnswerCache([default_index], check_interval_s=0)
+    cache.watch([other_index])
+    cache.put("q", VECTOR, "answer", [], scope="other")
+
+    assert cache.lookup(VECTOR, scope="other") is not None
+
+    touch(other_index, "rebuilt with more vectors")
+
+    assert cache.lookup(VECTOR, scope="other") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_persisted_entries_keep_namespaces_not_loaded_yet(tmp_path):
+
+    default_index = str(tmp_path / "faiss.index")
+    other_index = str(tmp_path / "other.index")
+    persist_path = str(tmp_path / "cache.npz")
+    touch(default_index, "v1")
+    touch(other_index, "v1")
+
+    cache = SemanticAnswerCache([default_index], persist_path=persist_path, check_interval_s=0)
+    cache.watch([other_index])
+    cache.put("q", VECTOR, "answer", [], scope="other")
+    cache.save()
+
+    restored = SemanticAnswerCache([default_index], persist_path=persist_path, check_interval_s=0)
+
+    assert restored.lookup(VECTOR, scope="other") is not None
+    assert other_index in restored.watch_paths
+
+    touch(other_index, "rebuilt while the server was down")
+
+    stale = SemanticAnswerCache([default_index], persist_path=persist_path, check_interval_s=0)
+
+    assert stale.stats()["entries"] == 0
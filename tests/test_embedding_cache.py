@@ -0,0 +1,59 @@
+import numpy as np
+
+from embeddings.embedding_cache import EmbeddingCache, shared_cache
+
+
+def vectors_for(texts, dim=4):
+    # Deterministic, distinct vector per text
+    return np.array(
+        [np.random.default_rng(abs(hash(text)) % 2**32).random(dim) for text in texts],
+        dtype="float32"
+    )
+
+
+def test_two_writers_on_one_directory_keep_rows_aligned(tmp_path):
+
+    server = EmbeddingCache(str(tmp_path), "model")
+    indexer = EmbeddingCache(str(tmp_path), "model")
+
+    a = ["alpha", "beta"]
+    b = ["gamma", "delta", "epsilon"]
+    c = ["zeta"]
+
+    server.store(a, vectors_for(a))
+    indexer.store(b, vectors_for(b))
+    server.store(c, vectors_for(c))
+
+    texts = a + b + c
+
+    for cache in (server, indexer, EmbeddingCache(str(tmp_path), "model")):
+        vectors, missing = cache.lookup(texts)
+
+        assert missing == []
+        np.testing.assert_array_equal(vectors, vectors_for(texts))
+
+
+def test_eviction_by_another_writer_is_picked_up(tmp_path):
+
+    texts = [f"text {i}" for i in range(50)]
+
+    reader = EmbeddingCache(str(tmp_path), "model")
+    reader.store(texts[:10], vectors_for(texts[:10]))
+
+    # 4 dims * 4 bytes = 16 bytes per row; the limit keeps ~20 rows
+    writer = EmbeddingCache(str(tmp_path), "model", max_mb=400 / (1024 * 1024))
+    writer.store(texts[10:], vectors_for(texts[10:]))
+
+    vectors, missing = reader.lookup(texts)
+    found = [i for i in range(len(texts)) if i not in missing]
+
+    assert 0 < len(found) < len(texts)
+    np.testing.assert_array_equal(vectors[found], vectors_for([texts[i] for i in found]))
+
+
+def test_shared_cache_is_one_instance_per_directory(tmp_path):
+
+    first = shared_cache(str(tmp_path), "model")
+
+    assert shared_cache(str(tmp_path) + "/", "model") is first
+    assert shared_cache(str(tmp_path), "other-model") is not first
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+from chunking.inverted_index import build_inverted_index, save_inverted_index
+from retrieval.bm25 import BM25Scorer
+from retrieval.retriever import Retriever
+
+
+CHUNKS = "data/processed/chunked_doc.json"
+
+OFF_TOPIC = ["What is the weather in Paris today?", "how do I bake a chocolate cake"]
+
+
+@pytest.fixture(scope="module")
+def sparse_index(tmp_path_factory):
+    # Built from the shipped chunks, as run_chunking does
+    with open(CHUNKS, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    path = str(tmp_path_factory.mktemp("sparse") / "sparse_index.npz")
+    save_inverted_index(build_inverted_index(chunks), path)
+
+    return path
+
+
+def hybrid_retriever(sparse_index, min_score=0.2):
+    """
+    Just enough of a Retriever for fuse(): a BM25 index of the shipped
+    chunks, sparse positions mapped straight to ids, the default hybrid config
+    """
+
+    retriever = Retriever.__new__(Retriever)
+
+    retriever.min_score = min_score
+    retriever.hybrid = {"enabled": True, "candidates": 20, "rrf_k": 60, "sparse_min_score": 0.0}
+    retriever.bm25 = BM25Scorer(sparse_index)
+    retriever.sparse_to_id = np.arange(len(retriever.bm25.chunk_ids), dtype="int64")
+
+    return retriever
+
+
+def test_off_topic_queries_match_bm25_terms(sparse_index):
+    # Otherwise the regression test below would pass trivially
+    retriever = hybrid_retriever(sparse_index)
+
+    for query in OFF_TOPIC:
+        assert retriever.bm25.search(query, 20)
+
+
+def test_off_topic_query_in_hybrid_mode_is_not_found(sparse_index):
+
+    retriever = hybrid_retriever(sparse_index)
+
+    # Dense side: nothing clears retrieval.min_score
+    dense_hits = [(0.12, 4), (0.08, 17), (0.05, 3)]
+
+    for query in OFF_TOPIC:
+        assert retriever.fuse(dense_hits, query, top_k=3) == []
+
+
+def test_sparse_hits_still_fused_when_dense_clears_floor(sparse_index):
+
+    retriever = hybrid_retriever(sparse_index)
+
+    fused = retriever.fuse([(0.55, 4), (0.1, 17)], "How do I request time off?", top_k=3)
+
+    assert fused
+    # Dense scores below the floor are dropped; BM25-only hits carry None
+    assert all(score is None or score >= 0.2 for score, _, _ in fused)
+    assert any(score is None for score, _, _ in fused)
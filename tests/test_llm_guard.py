@@ -0,0 +1,207 @@
+import gc
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rag.llm_guard import LLMGuard, CircuitOpenError
+
+
+class ServerError(Exception):
+    code = 503
+
+
+def tripped_guard():
+    """
+    A guard whose circuit has opened and is now half-open
+    """
+
+    guard = LLMGuard(max_retries=0, failure_threshold=1, reset_seconds=0.0)
+
+    async def fail():
+        raise ServerError()
+
+    with pytest.raises(ServerError):
+        asyncio.run(guard.acall(fail))
+
+    assert guard.breaker.state == "half_open"
+    return guard
+
+
+def test_cancelled_probe_reopens_half_open_circuit():
+
+    guard = tripped_guard()
+
+    async def scenario():
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def ok():
+            return "ok"
+
+        probe = asyncio.ensure_future(guard._acall(hang))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        # The next caller becomes the probe instead of failing fast
+        return [await guard.acall(ok), await guard.acall(ok)]
+
+    assert asyncio.run(scenario()) == ["ok", "ok"]
+    assert guard.breaker.state == "closed"
+
+
+def test_stream_closed_before_first_chunk_releases_probe():
+
+    guard = tripped_guard()
+
+    async def scenario():
+
+        async def open_stream():
+            async def chunks():
+                await asyncio.sleep(10)
+                yield "never"
+            return chunks()
+
+        stream = guard.astream(open_stream)
+        task = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def ok():
+            return "ok"
+
+        return await guard.acall(ok)
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_probe_in_flight_still_fails_fast():
+
+    guard = tripped_guard()
+
+    async def scenario():
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        probe = asyncio.ensure_future(guard.acall(slow))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(CircuitOpenError):
+            await guard.acall(slow)
+
+        return await probe
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+class CountingProvider:
+
+    def __init__(self, words):
+        self.words = words
+        self.calls = 0
+
+    async def open_async(self):
+        self.calls += 1
+
+        async def chunks():
+            for word in self.words:
+                await asyncio.sleep(0.02)
+                yield word
+
+        return chunks()
+
+    def open_sync(self):
+        self.calls += 1
+
+        def chunks():
+            for word in self.words:
+                time.sleep(0.02)
+                yield word
+
+        return chunks()
+
+
+def test_identical_concurrent_astreams_share_one_upstream_call():
+
+    guard = LLMGuard()
+    provider = CountingProvider(["a ", "b ", "c"])
+
+    async def consume():
+        return "".join([chunk async for chunk in guard.astream(provider.open_async, key="same")])
+
+    async def scenario():
+        return await asyncio.gather(*(consume() for _ in range(8)))
+
+    assert asyncio.run(scenario()) == ["a b c"] * 8
+    assert provider.calls == 1
+    assert guard.coalesced == 7
+    assert guard.stats()["in_flight_prompts"] == 0
+
+
+def test_identical_concurrent_sync_streams_share_one_upstream_call():
+
+    guard = LLMGuard()
+    provider = CountingProvider(["a ", "b ", "c"])
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        answers = list(pool.map(
+            lambda _: "".join(guard.stream(provider.open_sync, key="same")),
+            range(6)
+        ))
+
+    assert answers == ["a b c"] * 6
+    assert provider.calls == 1
+
+
+def test_shared_stream_error_reaches_every_subscriber():
+
+    guard = LLMGuard(max_retries=0)
+
+    async def open_stream():
+        raise ValueError("bad request")
+
+    async def consume():
+        return [chunk async for chunk in guard.astream(open_stream, key="same")]
+
+    async def scenario():
+        return await asyncio.gather(*(consume() for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_stream_pump_outlives_its_first_subscriber():
+
+    guard = LLMGuard()
+    provider = CountingProvider(["a ", "b ", "c"])
+
+    async def scenario():
+
+        first = guard.astream(provider.open_async, key="same")
+        assert await first.__anext__() == "a "
+
+        await first.aclose()
+        del first
+        gc.collect()
+
+        assert len(guard.pumps) == 1
+
+        late = "".join([chunk async for chunk in guard.astream(provider.open_async, key="same")])
+
+        await asyncio.sleep(0)
+
+        return late
+
+    assert asyncio.run(scenario()) == "a b c"
+    assert provider.calls == 1
+    assert guard.pumps == set()
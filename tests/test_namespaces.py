@@ -0,0 +1,70 @@
+import threading
+import time
+
+from retrieval.namespaces import NamespaceManager
+
+
+class FakeRetriever:
+    index_path = "missing.index"
+    bm25 = None
+    records = {}
+
+
+def manager_with(monkeypatch, build):
+
+    manager = NamespaceManager({}, build, pinned="default")
+
+    def available(config):
+        # Must not run while the global lock is held
+        assert not manager.lock.locked()
+        return ["default", "a", "b"]
+
+    monkeypatch.setattr("retrieval.namespaces.available_doc_ids", available)
+
+    return manager
+
+
+def test_loader_locks_are_pruned_once_resident(monkeypatch):
+
+    calls = []
+
+    def build(doc_id):
+        calls.append(doc_id)
+        time.sleep(0.05)
+        return FakeRetriever()
+
+    manager = manager_with(monkeypatch, build)
+
+    threads = [threading.Thread(target=manager.get, args=(doc_id,)) for doc_id in "aabb" * 3]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ["a", "b"]
+    assert manager.loading == {}
+    assert set(manager.resident) == {"a", "b"}
+
+
+def test_failed_load_can_be_retried(monkeypatch):
+
+    attempts = []
+
+    def build(doc_id):
+        attempts.append(doc_id)
+
+        if len(attempts) == 1:
+            raise RuntimeError("index missing")
+
+        return FakeRetriever()
+
+    manager = manager_with(monkeypatch, build)
+
+    try:
+        manager.get("a")
+    except RuntimeError:
+        pass
+
+    assert isinstance(manager.get("a"), FakeRetriever)
+    assert manager.loading == {}
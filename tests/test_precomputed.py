@@ -0,0 +1,40 @@
+import os
+
+from rag import answer_cache
+from rag.precomputed import PrecomputedAnswers, write_store
+from rag.answer_cache import file_version
+
+
+def test_lookups_are_throttled_and_still_see_rebuilds(tmp_path, monkeypatch):
+
+    index = str(tmp_path / "faiss.index")
+    store_path = str(tmp_path / "precomputed_answers.json")
+
+    with open(index, "w") as f:
+        f.write("v1")
+
+    write_store(store_path, file_version([index]), {
+        "what is the vacation policy": {"query": "What is the vacation policy?", "answer": "20 days", "sources": []}
+    })
+
+    store = PrecomputedAnswers(store_path, [index], check_interval_s=60)
+
+    assert store.lookup("What is the vacation policy?") == ("20 days", [])
+
+    stats = []
+    monkeypatch.setattr(answer_cache.os, "stat", lambda path: stats.append(path) or os.lstat(path))
+
+    for _ in range(20):
+        assert store.lookup("What is the vacation policy?") is not None
+
+    assert stats == []
+
+    monkeypatch.undo()
+
+    with open(index, "w") as f:
+        f.write("rebuilt index")
+
+    store.check_interval_s = 0
+
+    assert store.lookup("What is the vacation policy?") is None
+    assert store.stats()["stale"]
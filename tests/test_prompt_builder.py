@@ -0,0 +1,59 @@
+from rag.prompt_builder import PromptBuilder, TokenCounter, merge_spans
+
+
+def ctx(index, text, section="1"):
+    return {
+        "doc_id": "handbook",
+        "section_id": section,
+        "title": "Leave",
+        "chunk_id": f"sec_{section}_chunk_{index}",
+        "text": text
+    }
+
+
+def builder(**kwargs):
+    return PromptBuilder(TokenCounter("gemini-2.5-flash", method="estimate"), **kwargs)
+
+
+def test_chunk_text_passes_through_unchanged():
+
+    text = "Employees accrue 1.5 days\nper month.\n\n- Unused days  roll over."
+
+    context, report = builder().build_context([ctx(0, text)], budget=1000)
+
+    assert text in context
+    assert report["trimmed"] == report["dropped"] == 0
+
+
+def test_merged_span_keeps_source_whitespace():
+
+    first = "Leave is approved by\nthe line manager"
+    second = "the line manager\nand HR.  Requests go through the portal."
+
+    spans, removed = merge_spans([ctx(0, first), ctx(1, second)])
+
+    assert removed == 3
+    assert len(spans) == 1
+    assert spans[0]["text"] == "Leave is approved by\nthe line manager\nand HR.  Requests go through the portal."
+
+
+def test_trim_cuts_the_source_text_on_a_word_boundary():
+
+    text = "Alpha  beta\ngamma delta " * 40
+
+    context, report = builder(min_trim_tokens=1).build_context([ctx(0, text)], budget=60)
+
+    assert report["trimmed"] == 1
+    body = context.split("\n", 2)[2].rstrip("\n")
+    assert text.startswith(body)
+    assert text[len(body)].isspace()
+
+
+def test_non_positive_budget_gives_empty_context():
+
+    for budget in (0, -25):
+        context, report = builder(min_trim_tokens=0).build_context([ctx(0, "Some policy text")], budget)
+
+        assert context == ""
+        assert report["context_tokens"] == 0
+        assert report["dropped"] == 1
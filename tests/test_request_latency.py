@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import app as server
+from rag.metrics import metrics
+
+
+def client_with(monkeypatch, observed):
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    monkeypatch.setattr(metrics, "server_timing", False)
+    monkeypatch.setattr(metrics, "request", lambda *args: observed.append(args))
+
+    api = FastAPI()
+    api.middleware("http")(server.stage_timing)
+
+    @api.post("/chat")
+    def chat():
+        return {"answer": "ok"}
+
+    @api.post("/chat/stream")
+    def chat_stream():
+
+        async def body():
+            for i in range(3):
+                await asyncio.sleep(0.05)
+                yield f"{i}\n"
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    return TestClient(api)
+
+
+def test_streaming_latency_covers_the_whole_body(monkeypatch):
+
+    observed = []
+
+    with client_with(monkeypatch, observed) as client:
+        response = client.post("/chat/stream")
+
+    assert response.text == "0\n1\n2\n"
+    assert len(observed) == 1
+
+    endpoint, status, seconds = observed[0]
+    assert (endpoint, status) == ("/chat/stream", 200)
+    assert seconds >= 0.15
+
+
+def test_plain_response_is_observed_once(monkeypatch):
+
+    observed = []
+
+    with client_with(monkeypatch, observed) as client:
+        assert client.post("/chat").json() == {"answer": "ok"}
+
+    assert [(endpoint, status) for endpoint, status, _ in observed] == [("/chat", 200)]
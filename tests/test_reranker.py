@@ -0,0 +1,20 @@
+from retrieval.reranker import CrossEncoderReranker
+
+
+def chunk(doc_id, text, content_hash=None):
+    return {"id": 7, "doc_id": doc_id, "chunk_id": "3_chunk_0", "text": text, "content_hash": content_hash}
+
+
+def test_cache_key_separates_namespaces_with_the_same_faiss_id():
+
+    key = CrossEncoderReranker.cache_key
+
+    assert key("q", chunk("handbook_emea", "Leave", "h1")) != key("q", chunk("handbook_us", "Leave", "h1"))
+
+
+def test_cache_key_uses_the_text_when_legacy_rows_have_no_hash():
+
+    key = CrossEncoderReranker.cache_key
+
+    assert key("q", chunk("handbook", "Old text")) != key("q", chunk("handbook", "New text"))
+    assert key("q", chunk("handbook", "Same text")) == key("q", chunk("handbook", "Same text"))
@@ -0,0 +1,56 @@
+import json
+
+from embeddings.indexer import StableIds, content_hash, plan_update
+from pipeline.stream import jsonl_to_json, tee_jsonl
+
+
+def chunk(chunk_id, text):
+    return {"chunk_id": chunk_id, "text": text, "content_hash": content_hash(text)}
+
+
+def test_stable_ids_match_plan_update():
+
+    previous = [dict(chunk(c, t), id=i) for i, (c, t) in enumerate(
+        [("a", "x"), ("b", "y"), ("b", "y2"), ("c", "z")]
+    )]
+
+    chunks = [chunk("new", "n"), chunk("b", "y"), chunk("a", "x"), chunk("b", "y3"), chunk("b", "y4")]
+
+    planned = [dict(c) for c in chunks]
+    plan_update(planned, previous)
+
+    ids = StableIds(previous)
+    streamed = [ids.assign(dict(c)) for c in chunks]
+
+    assert streamed == [c["id"] for c in planned]
+    assert streamed[1:4] == [1, 0, 2]
+    assert ids.reused == 3
+
+
+def test_stable_ids_start_at_zero_without_metadata():
+
+    ids = StableIds()
+    assert [ids.assign(chunk(c, "t")) for c in "abc"] == [0, 1, 2]
+
+
+def test_jsonl_to_json_matches_json_dump(tmp_path):
+
+    records = [{"chunk_id": "a", "text": "é\nline"}, {"chunk_id": "b", "nested": {"k": [1, 2]}}]
+
+    jsonl = str(tmp_path / "chunks.jsonl")
+    out = str(tmp_path / "chunks.json")
+
+    list(tee_jsonl(iter(records), jsonl))
+
+    assert jsonl_to_json(jsonl, out) == 2
+
+    with open(out, encoding="utf-8") as f:
+        text = f.read()
+
+    assert text == json.dumps(records, indent=2, ensure_ascii=False)
+
+    list(tee_jsonl(iter([]), jsonl))
+    jsonl_to_json(jsonl, out)
+
+    with open(out, encoding="utf-8") as f:
+        assert json.load(f) == []
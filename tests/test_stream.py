@@ -0,0 +1,61 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from pipeline.stream import threaded
+
+
+def stage_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("pipeline-test")]
+
+
+def wait_for_no_stage_threads(timeout=2.0):
+
+    deadline = time.monotonic() + timeout
+
+    while stage_threads() and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    return stage_threads()
+
+
+def embed(records):
+    # Consumer that fails part-way (embedding error, disk full...)
+    for i, record in enumerate(records):
+        if i == 3:
+            raise RuntimeError("disk full")
+
+
+def test_producer_stops_when_the_consumer_raises():
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        embed(threaded(itertools.count(), maxsize=2, name="test-single"))
+
+    assert wait_for_no_stage_threads() == []
+
+
+def test_chained_stages_stop_when_the_consumer_raises():
+
+    sections = threaded(itertools.count(), maxsize=2, name="test-sections")
+    chunks = threaded((s * 10 for s in sections), maxsize=2, name="test-chunks")
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        embed(chunks)
+
+    del sections, chunks
+
+    assert wait_for_no_stage_threads() == []
+
+
+def test_records_and_producer_errors_still_pass_through():
+
+    assert list(threaded(iter(range(5)), maxsize=2, name="test-ok")) == [0, 1, 2, 3, 4]
+
+    def failing():
+        yield 1
+        raise ValueError("bad section")
+
+    with pytest.raises(ValueError, match="bad section"):
+        list(threaded(failing(), maxsize=2, name="test-error"))
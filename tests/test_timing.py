@@ -0,0 +1,52 @@
+from rag import timing
+from rag.timing import PhaseTimer
+from retrieval.namespaces import NamespaceManager
+
+
+def test_phase_records_only_into_the_active_timer():
+
+    startup = PhaseTimer()
+
+    with startup.active():
+        with timing.phase("load FAISS index"):
+            pass
+
+    # Outside the block: logged, not recorded
+    with timing.phase("load FAISS index"):
+        pass
+
+    assert list(startup.breakdown()) == ["load FAISS index"]
+    assert len(startup.phases) == 1
+
+
+def test_repeated_phases_are_summed():
+
+    timer = PhaseTimer()
+    timer.phases = [("load FAISS index", 10.0), ("warm-up", 1.0), ("load FAISS index", 5.0)]
+
+    assert timer.breakdown() == {"load FAISS index": 15.0, "warm-up": 1.0}
+
+
+def test_namespace_load_does_not_touch_the_startup_timer(monkeypatch):
+
+    class FakeRetriever:
+        index_path = "missing.index"
+        bm25 = None
+        records = {}
+
+    def build(doc_id):
+        with timing.phase("load FAISS index"):
+            return FakeRetriever()
+
+    monkeypatch.setattr("retrieval.namespaces.available_doc_ids", lambda config: ["default", "other"])
+
+    startup = PhaseTimer()
+
+    with startup.active():
+        manager = NamespaceManager({}, build, pinned="default")
+        manager.add("default", build("default"))
+
+    manager.get("other")
+
+    assert len(startup.phases) == 1
+    assert list(manager.stats()["load_ms"]["other"]) == ["load FAISS index"]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from embeddings.vector_store import FAISSStore, index_type_of
+from embeddings.indexer import can_update
+
+
+def vectors(n=64, dim=16, seed=0):
+    x = np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def saved_index(tmp_path, index_config):
+
+    store = FAISSStore(16, index_config, n_train=64)
+    store.add_embeddings(vectors())
+
+    path = str(tmp_path / "faiss.index")
+    store.save(path)
+
+    return path
+
+
+@pytest.mark.parametrize("built, configured", [
+    ("flat", "ivf_flat"),
+    ("flat", "hnsw"),
+    ("hnsw", "ivf_flat"),
+    ("ivf_flat", "hnsw"),
+    ("sq8", "ivf_pq"),
+])
+def test_load_with_another_configured_type(tmp_path, built, configured):
+
+    path = saved_index(tmp_path, {"type": built, "nlist": 4})
+
+    index = FAISSStore.load(path, {"type": configured, "nprobe": 3, "ef_search": 48})
+
+    assert index_type_of(index) == built
+    assert index.search(vectors(2), 3)[1].shape == (2, 3)
+
+
+def test_search_parameters_follow_loaded_index(tmp_path):
+
+    import faiss
+
+    ivf = FAISSStore.load(saved_index(tmp_path, {"type": "ivf_flat", "nlist": 4}), {"type": "ivf_flat", "nprobe": 3})
+    assert faiss.extract_index_ivf(faiss.downcast_index(ivf.index)).nprobe == 3
+
+    hnsw = FAISSStore.load(saved_index(tmp_path, {"type": "hnsw"}), {"type": "hnsw", "ef_search": 48})
+    assert faiss.downcast_index(hnsw.index).hnsw.efSearch == 48
+
+
+def test_type_mismatch_forces_full_rebuild(tmp_path):
+
+    index = FAISSStore.load(saved_index(tmp_path, {"type": "flat"}), {"type": "hnsw"})
+    metadata = [{"content_hash": "x"}]
+
+    assert can_update(index, metadata, {"type": "flat"})
+    assert not can_update(index, metadata, {"type": "hnsw"})
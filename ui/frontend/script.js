@@ -76,8 +76,8 @@ async function sendMessage() {
   showLoading();
 
   try {
-    // Call API
-    const response = await fetch(`${API_URL}/chat`, {
+    // Call streaming API (Server-Sent Events over POST)
+    const response = await fetch(`${API_URL}/chat/stream`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -88,17 +88,11 @@ async function sendMessage() {
       }),
     });
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       throw new Error("Failed to get response from server");
     }
 
-    const data = await response.json();
-
-    // Remove loading
-    removeLoading();
-
-    // Add assistant message
-    addAssistantMessage(data.answer, data.sources, data.rephrased_query);
+    await readAnswerStream(response);
   } catch (error) {
     console.error("Error:", error);
     removeLoading();
@@ -109,6 +103,82 @@ async function sendMessage() {
   }
 }
 
+// Render the answer incrementally as SSE events arrive
+async function readAnswerStream(response) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+
+  let buffer = "";
+  let answer = "";
+  let sources = [];
+  let messageDiv = null;
+  let renderPending = false;
+
+  const render = () => {
+    renderPending = false;
+    messageDiv.querySelector(".message-content").innerHTML = marked.parse(
+      formatMarkdown(answer),
+    );
+    scrollToBottom();
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    const events = buffer.split("\n\n");
+    buffer = events.pop();
+
+    for (const rawEvent of events) {
+      const { event, data } = parseSseEvent(rawEvent);
+
+      if (event === "sources") {
+        sources = data;
+        removeLoading();
+        messageDiv = createAssistantMessage(sources);
+      } else if (event === "token") {
+        if (!messageDiv) {
+          removeLoading();
+          messageDiv = createAssistantMessage(sources);
+        }
+        answer += data.text;
+
+        // Re-render at most once per animation frame
+        if (!renderPending) {
+          renderPending = true;
+          requestAnimationFrame(render);
+        }
+      } else if (event === "error") {
+        throw new Error(data.detail);
+      }
+    }
+  }
+
+  if (!messageDiv) {
+    throw new Error("Empty response from server");
+  }
+
+  render();
+  recordAssistantTurn(answer, sources);
+}
+
+function parseSseEvent(rawEvent) {
+  let event = "message";
+  const dataLines = [];
+
+  for (const line of rawEvent.split("\n")) {
+    if (line.startsWith("event:")) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith("data:")) {
+      dataLines.push(line.slice(5).trim());
+    }
+  }
+
+  return { event, data: dataLines.length ? JSON.parse(dataLines.join("\n")) : null };
+}
+
 function addUserMessage(content) {
   const messagesArea = document.getElementById("messagesArea");
   const timestamp = new Date();
@@ -141,9 +211,8 @@ function addUserMessage(content) {
   }
 }
 
-function addAssistantMessage(content, sources = [], rephrasedQuery = null) {
+function createAssistantMessage(sources = [], content = "") {
   const messagesArea = document.getElementById("messagesArea");
-  const timestamp = new Date();
 
   const messageDiv = document.createElement("div");
   messageDiv.className = "message assistant-message";
@@ -174,9 +243,13 @@ function addAssistantMessage(content, sources = [], rephrasedQuery = null) {
                                 <div class="source-title">${escapeHtml(
                                   source.title,
                                 )}</div>
-                                <div class="source-relevance">${Math.round(
-                                  source.relevance * 100,
-                                )}% match</div>
+                                ${
+                                  source.relevance != null
+                                    ? `<div class="source-relevance">${Math.round(
+                                        source.relevance * 100,
+                                      )}% match</div>`
+                                    : ""
+                                }
                             </div>
                             <div class="source-meta">
                                 Section ${escapeHtml(
@@ -211,6 +284,17 @@ function addAssistantMessage(content, sources = [], rephrasedQuery = null) {
   messagesArea.appendChild(messageDiv);
   scrollToBottom();
 
+  return messageDiv;
+}
+
+function addAssistantMessage(content, sources = [], rephrasedQuery = null) {
+  createAssistantMessage(sources, content);
+  recordAssistantTurn(content, sources);
+}
+
+function recordAssistantTurn(content, sources = []) {
+  const timestamp = new Date();
+
   // Add to history
   conversationHistory.push({
     type: "assistant",
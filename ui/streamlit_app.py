@@ -5,6 +5,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
 from rag.rag_pipeline import RAGPipeline
+from rag.precomputed import load_canonical_questions, followup_query
 from datetime import datetime
 
 
@@ -21,22 +22,20 @@ st.caption("Semantic Search + Gemini Answer Generation")
 
 
 # ---------------- STATIC RECOMMENDED QUESTIONS ----------------
+# Shared with the precomputed answers (python -m rag.precompute_answers)
 
-RECOMMENDED_QUESTIONS = [
-    "What is the conflict of interest policy?",
-    "Who is responsible for compliance?",
-    "What actions are prohibited under this policy?",
-    "How are policy violations handled?",
-    "What is the data privacy policy?",
-    "When does this policy apply?",
-]
+CANONICAL_QUESTIONS = load_canonical_questions()
+
+RECOMMENDED_QUESTIONS = CANONICAL_QUESTIONS["recommended"]
 
 
 # ---------------- PIPELINE LOADER ----------------
 
 @st.cache_resource(show_spinner=False)
 def load_rag():
-    return RAGPipeline()
+    rag = RAGPipeline()
+    rag.warm_up()
+    return rag
 
 
 # ---------------- QUERY REPHRASING ----------------
@@ -56,12 +55,7 @@ def rephrase_query(query, history):
         is_followup = True
 
     if is_followup:
-        rewritten = (
-            f"Previous question: {last_turn['question']}. "
-            f"Follow-up question: {query}. "
-            f"Answer using the policy document."
-        )
-        return rewritten
+        return followup_query(last_turn['question'], query)
 
     return query
 
@@ -70,15 +64,7 @@ def rephrase_query(query, history):
 
 def generate_followups(last_question):
 
-    templates = [
-        "Who is responsible for this?",
-        "How is this implemented?",
-        "What happens if this is violated?",
-        "When does this apply?",
-        "Are there any exceptions?",
-    ]
-
-    return templates
+    return CANONICAL_QUESTIONS["followups"]
 
 
 # ---------------- SESSION STATE ----------------
@@ -124,49 +110,60 @@ if st.button("Ask"):
 
     else:
 
-        with st.spinner("🔍 Retrieving and generating answer..."):
+        answered = False
 
-            try:
+        try:
 
-                # Use last 5 messages for context
-                history = st.session_state.chat_history[-5:]
+            # Use last 5 messages for context
+            history = st.session_state.chat_history[-5:]
 
-                final_query = rephrase_query(query, history)
+            final_query = rephrase_query(query, history)
 
-                answer, sources = st.session_state.rag.ask(final_query)
+            with st.spinner("🔍 Retrieving relevant sections..."):
+                token_stream, sources = st.session_state.rag.stream(final_query)
 
-                # Fallback
-                if not answer or len(answer.strip()) == 0:
-                    answer = "This information isn't in the document."
-                    sources = []
+            # Render tokens as Gemini generates them
+            st.markdown("### 🤖 Assistant")
+            answer = st.write_stream(token_stream)
 
-                followups = generate_followups(query)
+            # Fallback
+            if not answer or len(answer.strip()) == 0:
+                answer = "This information isn't in the document."
+                sources = []
 
-                st.session_state.chat_history.append(
-                    {
-                        "question": query,
-                        "answer": answer,
-                        "sources": sources,
-                        "time": datetime.now(),
-                        "followups": followups
-                    }
-                )
+            followups = generate_followups(query)
+
+            st.session_state.chat_history.append(
+                {
+                    "question": query,
+                    "answer": answer,
+                    "sources": sources,
+                    "time": datetime.now(),
+                    "followups": followups
+                }
+            )
+
+            st.session_state.prefilled_query = ""
+
+            answered = True
 
-                st.session_state.prefilled_query = ""
+        except Exception as e:
 
-            except Exception as e:
+            error_msg = str(e).lower()
 
-                error_msg = str(e).lower()
+            if "quota" in error_msg or "limit" in error_msg:
+                st.error("🚫 API limit reached. Please try again later.")
 
-                if "quota" in error_msg or "limit" in error_msg:
-                    st.error("🚫 API limit reached. Please try again later.")
+            elif "permission" in error_msg or "empty" in error_msg:
+                st.error("📄 Document is empty or access is restricted.")
 
-                elif "permission" in error_msg or "empty" in error_msg:
-                    st.error("📄 Document is empty or access is restricted.")
+            else:
+                st.error("❌ Internal server error")
+                st.exception(e)
 
-                else:
-                    st.error("❌ Internal server error")
-                    st.exception(e)
+        # Redraw so the streamed answer moves into the chat history
+        if answered:
+            st.rerun()
 
 
 # ---------------- CHAT DISPLAY ----------------
@@ -188,7 +185,8 @@ for chat in reversed(st.session_state.chat_history):
                     f"""
                     **Section:** {src['section_id']}  
                     **Title:** {src['title']}  
-                    **Chunk ID:** {src['chunk_id']}
+                    **Chunk ID:** {src['chunk_id']}  
+                    **Relevance:** {src.get('score', 'N/A')}
                     """
                 )
 